@@ -0,0 +1,52 @@
+"""
+STAR EMPIRE — достижения
+Невзятые пороги каждой статистики лежат в отсортированном списке с курсором:
+изменение статистики проверяет только ближайший порог, поэтому стоимость
+не зависит от размера каталога достижений.
+"""
+
+
+class AchievementIndex:
+    def __init__(self, definitions, unlocked=(), convert=None):
+        # definitions: {key: {'stat', 'threshold', ...}}; unlocked — уже полученные ключи;
+        # convert: {stat: тип} — порог приводится к типу статистики один раз, а не при каждом сравнении
+        self.definitions = definitions
+        convert = convert or {}
+        done = set(unlocked)
+        self.pending = {}
+        for key, ach in definitions.items():
+            if key not in done:
+                stat = ach['stat']
+                threshold = convert[stat](ach['threshold']) if stat in convert else ach['threshold']
+                self.pending.setdefault(stat, []).append((threshold, key))
+        # stat -> (пороги по возрастанию, курсор на ближайший невзятый)
+        for stat, entries in self.pending.items():
+            entries.sort()
+            self.pending[stat] = [entries, 0]
+    
+    def stats(self):
+        # Статистики, по которым ещё есть что получать
+        return list(self.pending)
+    
+    def next_threshold(self, stat):
+        entry = self.pending.get(stat)
+        if entry is None:
+            return None
+        entries, cursor = entry
+        return entries[cursor][0]
+    
+    def advance(self, stat, value):
+        # -> ключи, открытые новым значением статистики (обычно ни одного: одно сравнение)
+        entry = self.pending.get(stat)
+        if entry is None:
+            return []
+        entries, cursor = entry
+        unlocked = []
+        while cursor < len(entries) and value >= entries[cursor][0]:
+            unlocked.append(entries[cursor][1])
+            cursor += 1
+        if cursor == len(entries):
+            del self.pending[stat]
+        else:
+            entry[1] = cursor
+        return unlocked
@@ -0,0 +1,260 @@
+"""
+STAR EMPIRE — советник
+Очередь покупок по окупаемости и поиск момента престижа с максимумом очков в час.
+Ресурсы сравниваются по весам престижа (PRESTIGE_WEIGHTS): очки считаются
+из той же взвешенной суммы. Работает на экране престижа и без Kivy по сохранению:
+
+    python advisor.py                            # сохранение по умолчанию
+    python advisor.py path/to/save.json --clicks 2 --top 15
+"""
+
+import argparse
+import heapq
+import math
+import os
+import sys
+
+from bignum import format_duration
+from game import (GameManager, RESOURCES, UPGRADES, SHIPS,
+                  PRESTIGE_WEIGHTS, PRESTIGE_DIVISOR, PRESTIGE_MIN_TOTAL)
+
+
+# Сколько покупок вперёд перебирает поиск момента престижа
+PLAN_DEPTH = 40
+
+# Дальше этого горизонта ожидание не рассматривается (секунды)
+HORIZON = 7 * 86400
+
+WEIGHTS = tuple(PRESTIGE_WEIGHTS.get(res, 0) for res in RESOURCES)
+
+
+# ============== ВЕКТОРЫ РЕСУРСОВ ==============
+
+def vec(amounts):
+    # {ресурс: количество} -> кортеж float по RESOURCES; Big вне диапазона float -> inf
+    return tuple(float(amounts.get(res, 0)) for res in RESOURCES)
+
+
+def weigh(v):
+    return sum(x * w for x, w in zip(v, WEIGHTS))
+
+
+def prestige_points(total):
+    # Та же формула, что в GameManager.prestige_earn/do_prestige
+    if total < PRESTIGE_MIN_TOTAL:
+        return 0
+    return int(math.sqrt(total) / PRESTIGE_DIVISOR)
+
+
+def click_rate(game):
+    # Средний темп кликов за всю игру: советник не знает, как часто игрок будет нажимать
+    data = game.data
+    return data.total_clicks / data.play_time if data.play_time > 0 else 0.0
+
+
+def ship_yield(key, mult):
+    # Средняя добыча одного корабля в секунду при непрерывных экспедициях
+    ship = SHIPS[key]
+    return tuple(mult * sum(ship['rewards'].get(res, (0, 0))) / 2 / ship['time'] for res in RESOURCES)
+
+
+def income(game, clicks):
+    # Доход в секунду: автодоход, клики в среднем темпе и экспедиции имеющегося флота
+    mult = game.get_prestige_mult()
+    effects = game.upgrade_effects()
+    rate = [(effects['auto'][res] + effects['click'][res] * clicks) * mult for res in RESOURCES]
+    for key, count in game.data.ships.items():
+        if key in SHIPS:
+            for i, gain in enumerate(ship_yield(key, mult)):
+                rate[i] += gain * count
+    return tuple(rate)
+
+
+# ============== ОЧЕРЕДЬ ПОКУПОК ==============
+
+def upgrade_option(game, key, level, clicks, mult):
+    upg = UPGRADES[key]
+    per_level = upg.get('power', 1) * mult * (clicks if upg['effect'] == 'click' else 1)
+    cost = vec({upg['resource']: game.upgrade_cost(key, 1, level)})
+    gain = vec({upg['resource']: per_level})
+    return cost, gain
+
+
+def payback(cost, gain):
+    # Секунды, за которые покупка возвращает свою взвешенную цену
+    value = weigh(gain)
+    return weigh(cost) / value if value > 0 else math.inf
+
+
+def purchase_queue(game, clicks=None):
+    # Куча (окупаемость, №, вид, ключ, уровень, цена, прибавка): по одной записи на каждую покупку
+    if clicks is None:
+        clicks = click_rate(game)
+    mult = game.get_prestige_mult()
+    heap = []
+    for key in UPGRADES:
+        level = game.data.upgrades.get(key, 0)
+        cost, gain = upgrade_option(game, key, level, clicks, mult)
+        heap.append((payback(cost, gain), len(heap), 'upgrade', key, level, cost, gain))
+    for key, ship in SHIPS.items():
+        cost, gain = vec(ship['cost']), ship_yield(key, mult)
+        heap.append((payback(cost, gain), len(heap), 'ship', key, game.data.ships.get(key, 0), cost, gain))
+    heapq.heapify(heap)
+    return heap, clicks, mult
+
+
+def entry(item):
+    seconds, _, kind, key, level, cost, gain = item
+    name = (UPGRADES if kind == 'upgrade' else SHIPS)[key]['name']
+    return {'kind': kind, 'key': key, 'name': name, 'level': level,
+            'payback': seconds, 'cost': cost, 'gain': gain}
+
+
+def rank_purchases(game, clicks=None):
+    # Все покупки каталога от лучшей окупаемости к худшей
+    heap, _, _ = purchase_queue(game, clicks)
+    return [entry(heapq.heappop(heap)) for _ in range(len(heap))]
+
+
+def purchase_order(game, count, clicks=None):
+    # Жадный план из count покупок: после покупки улучшения в кучу встаёт его следующий уровень
+    heap, clicks, mult = purchase_queue(game, clicks)
+    seq = len(heap)
+    plan = []
+    while heap and len(plan) < count:
+        item = heapq.heappop(heap)
+        if item[0] == math.inf:
+            break
+        plan.append(entry(item))
+        _, _, kind, key, level, cost, gain = item
+        if kind == 'upgrade':
+            cost, gain = upgrade_option(game, key, level + 1, clicks, mult)
+        heapq.heappush(heap, (payback(cost, gain), seq, kind, key, level + 1, cost, gain))
+        seq += 1
+    return plan
+
+
+# ============== МОМЕНТ ПРЕСТИЖА ==============
+
+def best_prestige_time(run, start, have, rate, horizon):
+    # Максимум очков в час на отрезке [start, horizon] при линейном росте запасов после start.
+    # Без округления очков максимум sqrt(W)/(run + t) — там, где R * (run + t) = 2W(t)
+    base = weigh(have)
+    speed = weigh(rate)
+    candidates = {start}
+    if speed > 0:
+        peak = min(horizon, max(start, run + 2 * start - 2 * base / speed))
+        candidates.add(peak)
+        # Очки целые: тот же результат раньше — выгоднее, следующее очко — позже
+        earned = prestige_points(base + speed * (peak - start))
+        for target in (earned, earned + 1):
+            need = max(PRESTIGE_MIN_TOTAL, (target * PRESTIGE_DIVISOR) ** 2)
+            at = start + (need - base) / speed
+            if start <= at <= horizon:
+                candidates.add(at)
+    best = None
+    for t in candidates:
+        points = prestige_points(base + speed * (t - start))
+        per_hour = points * 3600 / max(1.0, run + t)
+        if best is None or per_hour > best[0]:
+            best = (per_hour, t, points)
+    return best
+
+
+def buy_next(state, item, horizon):
+    # (момент, запасы, доход) после покупки item, как только на неё хватит; None — не успеть в горизонт
+    t, stock, rate = state
+    wait = 0.0
+    for c, h, r in zip(item['cost'], stock, rate):
+        if c > h:
+            if r <= 0:
+                return None
+            wait = max(wait, (c - h) / r)
+    if t + wait > horizon:
+        return None
+    stock = tuple(h + r * wait - c for c, h, r in zip(item['cost'], stock, rate))
+    rate = tuple(r + g for r, g in zip(rate, item['gain']))
+    return t + wait, stock, rate
+
+
+def advise_prestige(game, clicks=None, depth=PLAN_DEPTH, horizon=HORIZON):
+    # Перебор «купить первые k покупок плана, потом копить до престижа».
+    # states[k] — состояние после k покупок, строится из запомненного states[k - 1]
+    if clicks is None:
+        clicks = click_rate(game)
+    plan = purchase_order(game, depth, clicks)
+    run = game.data.run_time
+    have = vec({res: getattr(game.data, res) for res in RESOURCES})
+    if not all(math.isfinite(x) for x in have):
+        return None
+    states = [(0.0, have, income(game, clicks))]
+    best = best_prestige_time(run, *states[0], horizon) + (0,)
+    for item in plan:
+        state = buy_next(states[-1], item, horizon)
+        if state is None:
+            break
+        states.append(state)
+        found = best_prestige_time(run, *state, horizon)
+        if found[0] > best[0]:
+            best = found + (len(states) - 1,)
+    
+    now_points = prestige_points(weigh(have))
+    per_hour, wait, points, buys = best
+    return {
+        'points_now': now_points,
+        'rate_now': now_points * 3600 / max(1.0, run),
+        'wait': wait,
+        'points': points,
+        'rate': per_hour,
+        'buys': [item['key'] for item in plan[:buys]],
+        'next': plan[0] if plan else None,
+        'clicks_per_sec': clicks,
+    }
+
+
+# ============== CLI ==============
+
+def summarize_buys(keys):
+    # ['scout', 'scout', 'metal_auto'] -> "2x Scout, 1x Auto Metal"
+    counts = {}
+    for key in keys:
+        counts[key] = counts.get(key, 0) + 1
+    return ', '.join(f"{n}x {(UPGRADES.get(key) or SHIPS[key])['name']}" for key, n in counts.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Star Empire purchase and prestige advisor')
+    parser.add_argument('save', nargs='?', help='save file (default: the game save)')
+    parser.add_argument('--clicks', type=float, help='taps per second to assume (default: lifetime average)')
+    parser.add_argument('--top', type=int, default=10, help='purchases to list')
+    parser.add_argument('--depth', type=int, default=PLAN_DEPTH, help='purchases the prestige search looks ahead')
+    args = parser.parse_args()
+    
+    from catalog import load_packs
+    load_packs()
+    # Оффлайн-начисление применяется в памяти; файл сохранения не перезаписывается
+    game = GameManager(save_path=args.save)
+    if not os.path.exists(game.save_path):
+        print(f"no save at {game.save_path}")
+        return 1
+    
+    ranking = rank_purchases(game, args.clicks)
+    print(f"{'purchase':<22}{'level':>6}{'payback':>10}")
+    for item in ranking[:args.top]:
+        print(f"{item['name']:<22}{item['level']:>6}{format_duration(item['payback']):>10}")
+    
+    advice = advise_prestige(game, args.clicks, args.depth)
+    if advice is None:
+        print("\nresources beyond float range: prestige timing not estimated")
+        return 0
+    print(f"\nclicks assumed: {advice['clicks_per_sec']:.2f}/s")
+    print(f"prestige now:   {advice['points_now']} points ({advice['rate_now']:.2f}/h)")
+    print(f"best:           {advice['points']} points in {format_duration(advice['wait'])} "
+          f"after {len(advice['buys'])} buys ({advice['rate']:.2f}/h)")
+    if advice['buys']:
+        print("buy first:      " + summarize_buys(advice['buys']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
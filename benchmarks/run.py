@@ -0,0 +1,367 @@
+"""
+STAR EMPIRE — бенчмарки горячих путей
+Задержка на вызов (перцентили), выделения памяти через tracemalloc,
+сравнение с сохранённым baseline.json.
+
+    python benchmarks/run.py                    # прогон и сравнение с baseline
+    python benchmarks/run.py --update-baseline  # записать новый baseline
+    python benchmarks/run.py --only mine,save   # только выбранные кейсы
+    python benchmarks/run.py --require-screens  # ошибка, если экраны не измерить (CI)
+
+Задержки и пики памяти зависят от машины и версии Python, поэтому baseline.json
+в репозиторий не коммитится: локально его пишут до изменений (--update-baseline)
+на той же машине, а в CI (.github/workflows/bench.yml) он снимается с базовой
+ветки на том же раннере прямо перед сравнением.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from achievements import AchievementIndex
+from advisor import advise_prestige
+from bignum import Big
+from game import GameManager, RESOURCES, UPGRADES, SHIPS, BOSSES, ACHIEVEMENT_STATS
+from saves import JournalWriter
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Допустимое ухудшение относительно baseline (0.25 = +25%)
+DEFAULT_THRESHOLD = 0.25
+
+# Абсолютные допуски, чтобы не падать на шуме микросекундных кейсов
+LATENCY_SLACK_NS = 2000
+ALLOC_SLACK_BYTES = 1024
+
+SEED = 1234
+
+
+# ============== СОСТОЯНИЯ ==============
+
+def make_game(workdir, size='small'):
+    game = GameManager(save_path=os.path.join(workdir, f'{size}.json'))
+    d = game.data
+    for res in RESOURCES:
+        d[res] = Big(1e6)
+    d['upgrades'] = {key: 10 for key in UPGRADES}
+    d['ships'] = {key: 5 for key in SHIPS}
+    d['target_boss'] = 'asteroid'
+    if size == 'large':
+        # Поздняя игра: огромные числа, тысячи групп экспедиций, длинные списки
+        for res in RESOURCES:
+            d[res] = Big('1e450')
+        d['upgrades'] = {key: 900 for key in UPGRADES}
+        d['ships'] = {key: 100000 for key in SHIPS}
+        d['expeditions'] = [{'ship': key, 'count': 10, 'return': time.time() + 3600 + i}
+                            for i in range(5000) for key in SHIPS]
+        d['achievements'] = [f'achievement_{i}' for i in range(5000)]
+        d['bosses_killed'] = list(BOSSES)
+    # Состояние собрано в обход методов: сбрасываем кеши, завязанные на ревизии
+    game.mark('upgrades', 'ships', 'expeditions', *RESOURCES)
+    return game
+
+
+# ============== КЕЙСЫ ==============
+
+def case_mine(game):
+    return lambda: game.mine('energy')
+
+
+def case_buy_upgrade(game):
+    level = game.data['upgrades']['energy_click']
+    budget = game.data['energy']
+    def run():
+        # Каждый вызов — успешная покупка с одинаковой ценой
+        game.data['upgrades']['energy_click'] = level
+        game.data['energy'] = budget
+        game.buy_upgrade('energy_click')
+    return run
+
+
+def case_buy_upgrade_max(game):
+    level = game.data['upgrades']['metal_click']
+    budget = game.data['metal']
+    def run():
+        game.data['upgrades']['metal_click'] = level
+        game.data['metal'] = budget
+        game.buy_upgrade('metal_click', 'max')
+    return run
+
+
+def case_buy_ship(game):
+    return lambda: game.buy_ship('scout')
+
+
+def case_send_collect(game):
+    def run():
+        game.send_expedition('scout', 1)
+        game.collect_returned(time.time() + 3600)
+    return run
+
+
+def case_attack_boss(game):
+    def run():
+        game.data['bosses'].pop('pirate', None)
+        game.attack_boss('pirate')
+    return run
+
+
+def case_auto_collect(game):
+    # last_save в будущем: сохранение измеряется отдельным кейсом
+    game.last_save = time.time() + 1e9
+    return lambda: game.auto_collect(1.0)
+
+
+def case_catch_up(game):
+    def run():
+        game.data['last_seen'] = time.time() - 7 * 86400
+        game.catch_up()
+    return run
+
+
+def case_check_achievements(game):
+    # Сотня порогов на каждую статистику: проверка смотрит только ближайший порог изменившихся
+    definitions = {f'bench_{stat}_{i}': {'name': f'{stat} {i}', 'stat': stat, 'threshold': 10 ** 12 + i}
+                   for stat in ACHIEVEMENT_STATS for i in range(100)}
+    game.achievements = AchievementIndex(definitions, game.data.achievements,
+                                         convert={res: Big for res in RESOURCES})
+    def run():
+        game.mark('total_clicks', 'play_time', *RESOURCES)
+        game.check_achievements()
+    return run
+
+
+def case_advise_prestige(game):
+    # Полный пересчёт совета, как на экране престижа после покупки
+    return lambda: advise_prestige(game, clicks=2.0)
+
+
+def case_save(game):
+    return lambda: game.save_game(wait=True)
+
+
+def case_save_journal(game):
+    # Полный снимок только первым вызовом, дальше — записи журнала с изменившимися ключами
+    game.writer = JournalWriter(game.save_path)
+    def run():
+        game.data['energy'] += 1
+        game.save_game(wait=True)
+    return run
+
+
+def case_load(game):
+    game.save_game(wait=True)
+    return game.load_game
+
+
+CORE_CASES = [
+    ('mine', case_mine),
+    ('buy_upgrade', case_buy_upgrade),
+    ('buy_upgrade_max', case_buy_upgrade_max),
+    ('buy_ship', case_buy_ship),
+    ('send_collect', case_send_collect),
+    ('attack_boss', case_attack_boss),
+    ('auto_collect', case_auto_collect),
+    ('catch_up', case_catch_up),
+    ('check_achievements', case_check_achievements),
+    ('advise_prestige', case_advise_prestige),
+    ('save', case_save),
+    ('save_journal', case_save_journal),
+    ('load', case_load),
+]
+
+
+def screen_cases():
+    # Экраны под безоконным Kivy; без Kivy эти кейсы пропускаются
+    os.environ.setdefault('KIVY_NO_ARGS', '1')
+    os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+    os.environ.setdefault('KIVY_NO_FILELOG', '1')
+    os.environ.setdefault('KIVY_GL_BACKEND', 'mock')
+    os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+    try:
+        import main
+    except Exception as e:
+        print(f"screen benchmarks skipped: {e.__class__.__name__}: {e}")
+        return []
+    
+    def make(screen_cls):
+        def factory(game):
+            screen = screen_cls(game, name='bench')
+            def run():
+                # Меняем ресурс, чтобы update() действительно что-то перерисовывал
+                game.data['energy'] += 1
+                game.mark('energy')
+                screen.update()
+            return run
+        return factory
+    
+    return [
+        (f'screen_{name}', make(cls)) for name, cls in (
+            ('main', main.MainScreen),
+            ('upgrades', main.UpgradesScreen),
+            ('ships', main.ShipsScreen),
+            ('boss', main.BossScreen),
+            ('prestige', main.PrestigeScreen),
+        )
+    ]
+
+
+# ============== ИЗМЕРЕНИЕ ==============
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(factory, workdir, size, iterations, warmup, repeat):
+    random.seed(SEED)
+    game = make_game(workdir, size)
+    fn = factory(game)
+    for _ in range(warmup):
+        fn()
+    
+    # Из нескольких прогонов берётся самый быстрый: шум планировщика только замедляет
+    perf = time.perf_counter_ns
+    samples = None
+    for _ in range(repeat):
+        run_samples = []
+        for _ in range(iterations):
+            start = perf()
+            fn()
+            run_samples.append(perf() - start)
+        run_samples.sort()
+        if samples is None or percentile(run_samples, 0.5) < percentile(samples, 0.5):
+            samples = run_samples
+    
+    # Память — отдельным проходом: tracemalloc сам замедляет вызовы
+    alloc_iterations = max(1, iterations // 10)
+    tracemalloc.start()
+    peak = 0
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(alloc_iterations):
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        fn()
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    net = (tracemalloc.get_traced_memory()[0] - before) / alloc_iterations
+    tracemalloc.stop()
+    game.writer.flush()
+    
+    return {
+        'iterations': iterations,
+        'mean_ns': int(statistics.fmean(samples)),
+        'p50_ns': percentile(samples, 0.50),
+        'p90_ns': percentile(samples, 0.90),
+        'p99_ns': percentile(samples, 0.99),
+        'max_ns': samples[-1],
+        'alloc_peak_bytes': peak,
+        'alloc_net_bytes': int(net),
+    }
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        limit = base['p50_ns'] * (1 + threshold) + LATENCY_SLACK_NS
+        if result['p50_ns'] > limit:
+            regressions.append(f"{name}: p50 {result['p50_ns']}ns > {int(limit)}ns (baseline {base['p50_ns']}ns)")
+        limit = base['alloc_peak_bytes'] * (1 + threshold) + ALLOC_SLACK_BYTES
+        if result['alloc_peak_bytes'] > limit:
+            regressions.append(f"{name}: alloc peak {result['alloc_peak_bytes']}B > {int(limit)}B "
+                               f"(baseline {base['alloc_peak_bytes']}B)")
+    return regressions
+
+
+def fmt_ns(ns):
+    if ns >= 1000000:
+        return f"{ns / 1000000:.2f}ms"
+    if ns >= 1000:
+        return f"{ns / 1000:.1f}us"
+    return f"{ns}ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Star Empire hot-path benchmarks')
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--only', default='', help='comma-separated case name prefixes')
+    parser.add_argument('--no-screens', action='store_true')
+    parser.add_argument('--require-screens', action='store_true',
+                        help='fail instead of skipping screen cases when Kivy cannot be loaded')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+    
+    cases = list(CORE_CASES)
+    if not args.no_screens:
+        screens = screen_cases()
+        if not screens and args.require_screens:
+            print("screen benchmarks are required but could not be loaded")
+            return 1
+        cases += screens
+    only = [p for p in args.only.split(',') if p]
+    
+    workdir = tempfile.mkdtemp(prefix='starempire-bench-')
+    results = {}
+    try:
+        print(f"{'case':<28}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}{'alloc peak':>12}{'alloc net':>11}")
+        for name, factory in cases:
+            for size in ('small', 'large'):
+                key = f"{name}[{size}]"
+                if only and not any(key.startswith(p) for p in only):
+                    continue
+                # Сохранение/загрузка большого файла на порядки дороже — меньше итераций
+                iterations = args.iterations if name not in ('save', 'save_journal', 'load') else max(20, args.iterations // 20)
+                r = measure(factory, workdir, size, iterations, min(args.warmup, iterations), args.repeat)
+                results[key] = r
+                print(f"{key:<28}{fmt_ns(r['p50_ns']):>10}{fmt_ns(r['p90_ns']):>10}{fmt_ns(r['p99_ns']):>10}"
+                      f"{fmt_ns(r['max_ns']):>10}{r['alloc_peak_bytes']:>11}B{r['alloc_net_bytes']:>10}B")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"baseline written: {args.baseline}")
+        return 0
+    
+    if not os.path.exists(args.baseline):
+        print("no baseline found; run with --update-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\nREGRESSIONS (threshold +{args.threshold:.0%}):")
+        for line in regressions:
+            print("  " + line)
+        return 1
+    print(f"\nno regressions against baseline (threshold +{args.threshold:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+STAR EMPIRE — GameState против словаря
+Скорость типичных обращений к состоянию и байты на одно состояние в памяти
+для прежнего dict-формата и GameState, плюс проверка перевода JSON туда-обратно.
+
+    python benchmarks/state_model.py                 # все сравнения
+    python benchmarks/state_model.py --states 5000   # больше состояний для замера памяти
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bignum import Big
+from game import RESOURCES, UPGRADES, SHIPS, BOSSES
+from state import UPGRADE_SLOTS, GameState
+
+
+# ============== СОСТОЯНИЯ ==============
+
+def sample_json(size):
+    # Сохранение в формате файла: 'small' — середина игры, 'large' — длинные списки
+    data = GameState().to_json()
+    for res in RESOURCES:
+        data[res] = Big(1e6 if size == 'small' else '1.5e450').to_json()
+    data['upgrades'] = {key: 10 for key in UPGRADES}
+    data['ships'] = {key: 5 for key in SHIPS}
+    data['bosses'] = {key: {'hp': boss['hp'], 'cooldown': 0} for key, boss in BOSSES.items()}
+    data['prestige_points'] = 3
+    data['target_boss'] = 'asteroid'
+    data['seed'] = 1234
+    data['rng'] = {'mine': [1, None], 'expeditions': [2, None]}
+    if size == 'large':
+        data['expeditions'] = [{'ship': key, 'count': 10, 'return': 1.7e9 + i}
+                               for i in range(500) for key in SHIPS]
+        data['achievements'] = [f'achievement_{i}' for i in range(500)]
+        data['bosses_killed'] = list(BOSSES)
+    return data
+
+
+def dict_state(saved):
+    # Прежний GameManager.restore: словарь с Big вместо чисел ресурсов
+    for res in RESOURCES:
+        saved[res] = Big.from_json(saved[res])
+    return saved
+
+
+def check_round_trip(saved):
+    # JSON -> GameState -> JSON не теряет и не добавляет ключей, включая чужие
+    saved = dict(saved, future_field={'nested': [1, 2]})
+    saved['upgrades'] = dict(saved['upgrades'], removed_pack_upgrade=4)
+    return GameState.from_json(json.loads(json.dumps(saved))).to_json() == saved
+
+
+# ============== ОБРАЩЕНИЯ ==============
+
+def lookup_cases(saved):
+    d = dict_state(json.loads(json.dumps(saved)))
+    s = GameState.from_json(json.loads(json.dumps(saved)))
+    key = 'metal_auto'
+    slot = UPGRADE_SLOTS[key]
+    env = {'d': d, 's': s, 'key': key, 'slot': slot, 'RESOURCES': RESOURCES}
+    # (название, выражение для словаря, выражение для GameState)
+    cases = [
+        ('resource', "d['energy']", "s.energy"),
+        ('counter with default', "d.get('prestige_points', 0)", "s.prestige_points"),
+        ('upgrade level', "d['upgrades'].get(key, 0)", "s.upgrades.get(key, 0)"),
+        ('upgrade level by slot', "d['upgrades'].get(key, 0)", "s.upgrades.at(slot)"),
+        ('guarded ship level', "d.get('ships', {}).get('scout', 0)", "s.ships.get('scout', 0)"),
+        ('total ships', "sum(d.get('ships', {}).values())", "s.ships.total()"),
+        ('resource by name', "d[RESOURCES[1]]", "getattr(s, RESOURCES[1])"),
+        ('increment counter', "d['total_clicks'] = d.get('total_clicks', 0) + 1", "s.total_clicks += 1"),
+    ]
+    return env, cases
+
+
+def best_ns(stmt, env, number, repeat):
+    return min(timeit.repeat(stmt, globals=env, number=number, repeat=repeat)) / number * 1e9
+
+
+# ============== ПАМЯТЬ ==============
+
+def bytes_per_state(build, saved, count):
+    # Все состояния строятся из своей копии JSON; считается только то, что осталось живым
+    texts = [json.dumps(saved)] * count
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    states = [build(json.loads(text)) for text in texts]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del states
+    return used / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Star Empire state model: GameState vs dict')
+    parser.add_argument('--number', type=int, default=200000, help='lookups per timing run')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--states', type=int, default=2000, help='states kept alive for the memory test')
+    args = parser.parse_args()
+    
+    for size in ('small', 'large'):
+        if not check_round_trip(sample_json(size)):
+            print(f"round trip [{size}]: MISMATCH")
+            return 1
+    print("round trip: JSON -> GameState -> JSON is lossless\n")
+    
+    env, cases = lookup_cases(sample_json('small'))
+    print(f"{'lookup':<26}{'dict':>10}{'GameState':>12}{'speedup':>10}")
+    for name, dict_stmt, state_stmt in cases:
+        d_ns = best_ns(dict_stmt, env, args.number, args.repeat)
+        s_ns = best_ns(state_stmt, env, args.number, args.repeat)
+        print(f"{name:<26}{d_ns:>8.1f}ns{s_ns:>10.1f}ns{d_ns / s_ns:>9.2f}x")
+    
+    print(f"\n{'bytes per state':<26}{'dict':>10}{'GameState':>12}{'saved':>10}")
+    for size in ('small', 'large'):
+        saved = sample_json(size)
+        d_bytes = bytes_per_state(dict_state, saved, args.states)
+        s_bytes = bytes_per_state(GameState.from_json, saved, args.states)
+        print(f"{size:<26}{d_bytes:>9.0f}B{s_bytes:>11.0f}B{1 - s_bytes / d_bytes:>10.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
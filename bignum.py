@@ -0,0 +1,287 @@
+"""
+STAR EMPIRE — большие числа
+Big: мантисса/порядок (m * 10^e) для ресурсов и цен без потери точности
+и переполнения float, плюс кешированное форматирование для UI.
+"""
+
+import math
+
+
+# Суффиксы по тысячам; дальше — научная запись
+SUFFIXES = ('', 'K', 'M', 'B', 'T', 'Qa', 'Qi', 'Sx', 'Sp', 'Oc', 'No',
+            'Dc', 'UDc', 'DDc', 'TDc', 'QaDc', 'QiDc', 'SxDc', 'SpDc', 'OcDc', 'NoDc', 'Vg')
+
+# Разница порядков, после которой меньшее слагаемое не влияет на мантиссу
+PRECISION_DIGITS = 17
+
+# В сохранение пишутся обычные числа, пока они точно помещаются во float
+JSON_FLOAT_LIMIT = 300
+
+
+class Big:
+    # f — точное значение float, если число пришло из float (None — считается из m и e):
+    # сложение в диапазоне float идёт через него, без потерь на переводе в мантиссу и обратно
+    __slots__ = ('m', 'e', 'f')
+    
+    def __init__(self, value=0):
+        if isinstance(value, Big):
+            self.m, self.e, self.f = value.m, value.e, value.f
+            return
+        f = None
+        if isinstance(value, str):
+            mantissa, _, exponent = value.lower().partition('e')
+            m, e = float(mantissa), int(exponent or 0)
+        elif isinstance(value, int) and not -2 ** 1000 < value < 2 ** 1000:
+            digits = str(abs(value))
+            m = float(digits[:PRECISION_DIGITS]) * (-1 if value < 0 else 1)
+            e = len(digits) - min(len(digits), PRECISION_DIGITS)
+        else:
+            m, e = float(value), 0
+            f = m
+        self.m, self.e = normalize(m, e)
+        self.f = f
+    
+    @classmethod
+    def raw(cls, m, e):
+        # Без нормализации: m уже в [1, 10) или 0
+        big = object.__new__(cls)
+        big.m = m
+        big.e = e
+        big.f = None
+        return big
+    
+    @classmethod
+    def from_float(cls, value):
+        # Точный float без разбора типа аргумента (горячие пути арифметики)
+        big = object.__new__(cls)
+        big.m, big.e = normalize(value, 0)
+        big.f = value
+        return big
+    
+    @classmethod
+    def from_json(cls, value):
+        return value if isinstance(value, Big) else cls(value)
+    
+    def to_json(self):
+        if self.e < JSON_FLOAT_LIMIT:
+            value = float(self)
+            return int(value) if value == int(value) else value
+        return f"{self.m!r}e{self.e}"
+    
+    # ---------- арифметика ----------
+    
+    def __add__(self, other):
+        if not isinstance(other, Big):
+            other = Big(other)
+        if other.m == 0:
+            return self
+        if self.m == 0:
+            return other
+        if self.e < PRECISION_DIGITS and other.e < PRECISION_DIGITS:
+            # В диапазоне точных целых float складываем как float: 200 кликов по +1 дают ровно 200
+            return Big.from_float(float(self) + float(other))
+        diff = self.e - other.e
+        if diff >= PRECISION_DIGITS:
+            return self
+        if diff <= -PRECISION_DIGITS:
+            return other
+        if diff >= 0:
+            m, e = self.m + other.m * 10.0 ** -diff, self.e
+        else:
+            m, e = other.m + self.m * 10.0 ** diff, other.e
+        if 1 <= abs(m) < 10:
+            return Big.raw(m, e)
+        return Big.raw(*normalize(m, e))
+    
+    __radd__ = __add__
+    
+    def __neg__(self):
+        big = Big.raw(-self.m, self.e)
+        if self.f is not None:
+            big.f = -self.f
+        return big
+    
+    def __sub__(self, other):
+        if not isinstance(other, Big):
+            other = Big(other)
+        return self + (-other)
+    
+    def __rsub__(self, other):
+        return Big(other) - self
+    
+    def __mul__(self, other):
+        if not isinstance(other, Big):
+            if other == 0:
+                return Big.raw(0.0, 0)
+            other = Big(other)
+        if self.f is not None and other.f is not None:
+            # Оба — точные float: произведение как в float (веса престижа, цены за штуку)
+            value = self.f * other.f
+            if math.isfinite(value):
+                return Big.from_float(value)
+        m = self.m * other.m
+        e = self.e + other.e
+        if 1 <= abs(m) < 10 or m == 0:
+            return Big.raw(m, e if m else 0)
+        return Big.raw(m / 10, e + 1)
+    
+    __rmul__ = __mul__
+    
+    def __truediv__(self, other):
+        if not isinstance(other, Big):
+            other = Big(other)
+        if other.m == 0:
+            raise ZeroDivisionError('Big division by zero')
+        if self.f is not None and other.f is not None:
+            value = self.f / other.f
+            if value and math.isfinite(value):
+                return Big.from_float(value)
+        return Big.raw(*normalize(self.m / other.m, self.e - other.e))
+    
+    def __rtruediv__(self, other):
+        return Big(other) / self
+    
+    def __pow__(self, power):
+        if self.m == 0:
+            return Big.raw(1.0, 0) if power == 0 else Big.raw(0.0, 0)
+        if self.m < 0:
+            raise ValueError('Big power of a negative number')
+        if self.e < JSON_FLOAT_LIMIT:
+            # В диапазоне float — точный pow: через log10 корень из 62500 давал 249.99999999999997
+            try:
+                value = float(self) ** power
+            except OverflowError:
+                value = math.inf
+            if math.isfinite(value):
+                return Big.from_float(value)
+        log = self.log10() * power
+        e = math.floor(log)
+        return Big.raw(*normalize(10.0 ** (log - e), e))
+    
+    def log10(self):
+        return math.log10(self.m) + self.e
+    
+    # ---------- сравнение и преобразования ----------
+    
+    def key(self):
+        if self.m > 0:
+            return (1, self.e, self.m)
+        if self.m < 0:
+            return (-1, -self.e, self.m)
+        return (0, 0, 0.0)
+    
+    def __eq__(self, other):
+        # В диапазоне float сравнивается значение float: так же считается __hash__,
+        # и Big(5) == 5 согласовано с hash(5)
+        if isinstance(other, Big):
+            a, b = float(self), float(other)
+            if math.isfinite(a) and math.isfinite(b):
+                return a == b
+            return self.key() == other.key()
+        if isinstance(other, (int, float)):
+            return float(self) == other
+        return NotImplemented
+    
+    def __lt__(self, other):
+        return self.key() < Big.from_json(other).key()
+    
+    def __le__(self, other):
+        return self.key() <= Big.from_json(other).key()
+    
+    def __gt__(self, other):
+        return self.key() > Big.from_json(other).key()
+    
+    def __ge__(self, other):
+        return self.key() >= Big.from_json(other).key()
+    
+    def __hash__(self):
+        value = float(self)
+        return hash(value) if math.isfinite(value) else hash(self.key())
+    
+    def __bool__(self):
+        return self.m != 0
+    
+    def __float__(self):
+        if self.f is not None:
+            return self.f
+        # Кратчайшая запись мантиссы и разбор десятичной строки округляются корректно:
+        # m * 10.0 ** e дал бы 122.99999999999999 вместо 123; вне диапазона float — ±inf
+        return float(f"{self.m!r}e{self.e}")
+    
+    def __int__(self):
+        if self.e < PRECISION_DIGITS:
+            return int(float(self))
+        return int(self.m * 10.0 ** (PRECISION_DIGITS - 1)) * 10 ** (self.e - PRECISION_DIGITS + 1)
+    
+    def __repr__(self):
+        return f"Big('{self.m!r}e{self.e}')"
+
+
+def normalize(m, e):
+    if m == 0 or not math.isfinite(m):
+        return (0.0, 0) if m == 0 else (m, e)
+    shift = math.floor(math.log10(abs(m)))
+    m /= 10.0 ** shift
+    # Поправка на погрешность log10 около степеней десяти
+    if abs(m) >= 10:
+        m /= 10
+        shift += 1
+    elif abs(m) < 1:
+        m *= 10
+        shift -= 1
+    return m, e + shift
+
+
+# ============== ФОРМАТИРОВАНИЕ ==============
+
+format_cache = {}
+FORMAT_CACHE_SIZE = 4096
+
+
+def format_duration(seconds):
+    # Длительность для UI и CLI: "45s", "3m 20s", "2h 5m", "1d 3h"; бесконечность — "never"
+    if seconds == math.inf:
+        return 'never'
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60}s"
+    if seconds < 86400:
+        return f"{seconds // 3600}h {seconds % 3600 // 60}m"
+    return f"{seconds // 86400}d {seconds % 86400 // 3600}h"
+
+
+def format_num(n):
+    if not isinstance(n, Big):
+        if -1000 < n < 1000:
+            return str(int(n))
+        if not math.isfinite(n):
+            return str(n)
+        n = Big(n)
+    if n.e < 3:
+        return str(int(n))
+    
+    tier = n.e // 3
+    # Ключ — то, что видно на экране: порядок и мантисса с точностью отображения
+    scaled = n.m * 10 ** (n.e - tier * 3)
+    key = (n.e, round(scaled * 10) if tier < len(SUFFIXES) else round(n.m * 100))
+    text = format_cache.get(key)
+    if text is None:
+        e, digits = n.e, key[1]
+        # Округление до следующей тысячи переносится в следующий разряд: 999960 -> "1.0M", не "1000.0K"
+        if tier < len(SUFFIXES) and abs(digits) >= 10000:
+            tier += 1
+            e = tier * 3
+            digits = round(digits / (1000 if tier < len(SUFFIXES) else 100))
+        elif tier >= len(SUFFIXES) and abs(digits) >= 1000:
+            digits = round(digits / 10)
+            e += 1
+        if tier < len(SUFFIXES):
+            text = f"{digits / 10:.1f}{SUFFIXES[tier]}"
+        else:
+            text = f"{digits / 100:.2f}e{e}"
+        if len(format_cache) >= FORMAT_CACHE_SIZE:
+            format_cache.clear()
+        format_cache[key] = text
+    return text
@@ -4,6 +4,8 @@ package.name = starempire
 package.domain = org.game
 source.dir = .
 source.include_exts = py,png,jpg,kv,atlas,json
+source.exclude_dirs = benchmarks
+source.exclude_patterns = server.py,popsim.py
 version = 1.0
 requirements = python3,kivy
 orientation = portrait
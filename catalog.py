@@ -0,0 +1,95 @@
+"""
+STAR EMPIRE — контент-паки
+Загрузка дополнительных улучшений, кораблей и достижений из data/packs/*.json
+в общие словари UPGRADES/SHIPS/ACHIEVEMENTS с пересборкой индекса каталога.
+
+Формат пака:
+    {"upgrades": {"key": {"name", "base_cost", "cost_mult", "resource", "effect", "power"}},
+     "ships": {"key": {"name", "cost": {res: n}, "time", "rewards": {res: [min, max]}}},
+     "achievements": {"key": {"name", "stat", "threshold"}}}
+"""
+
+import os
+
+from game import (RESOURCES, UPGRADES, SHIPS, ACHIEVEMENTS, ACHIEVEMENT_STATS, UPGRADE_EFFECTS,
+                  index_catalog)
+
+
+PACKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'packs')
+
+UPGRADE_FIELDS = ('name', 'base_cost', 'cost_mult', 'resource', 'effect')
+SHIP_FIELDS = ('name', 'cost', 'time', 'rewards')
+ACHIEVEMENT_FIELDS = ('name', 'stat', 'threshold')
+
+
+def check_upgrade(key, upg):
+    missing = [field for field in UPGRADE_FIELDS if field not in upg]
+    if missing:
+        raise ValueError(f"upgrade {key}: missing {', '.join(missing)}")
+    if upg['resource'] not in RESOURCES:
+        raise ValueError(f"upgrade {key}: unknown resource {upg['resource']}")
+    if upg['effect'] not in UPGRADE_EFFECTS:
+        raise ValueError(f"upgrade {key}: unknown effect {upg['effect']}")
+    if upg['cost_mult'] <= 1 or upg['base_cost'] <= 0:
+        raise ValueError(f"upgrade {key}: cost must grow")
+    return dict(upg, power=upg.get('power', 1))
+
+
+def check_ship(key, ship):
+    missing = [field for field in SHIP_FIELDS if field not in ship]
+    if missing:
+        raise ValueError(f"ship {key}: missing {', '.join(missing)}")
+    unknown = set(ship['cost']) - set(RESOURCES) | set(ship['rewards']) - set(RESOURCES)
+    if unknown:
+        raise ValueError(f"ship {key}: unknown resource {', '.join(sorted(unknown))}")
+    # Диапазоны наград в JSON — списки; в коде они распаковываются как пары
+    rewards = {res: (int(low), int(high)) for res, (low, high) in ship['rewards'].items()}
+    if any(low > high for low, high in rewards.values()):
+        raise ValueError(f"ship {key}: empty reward range")
+    return dict(ship, rewards=rewards)
+
+
+def check_achievement(key, ach):
+    missing = [field for field in ACHIEVEMENT_FIELDS if field not in ach]
+    if missing:
+        raise ValueError(f"achievement {key}: missing {', '.join(missing)}")
+    if ach['stat'] not in ACHIEVEMENT_STATS:
+        raise ValueError(f"achievement {key}: unknown stat {ach['stat']}")
+    if isinstance(ach['threshold'], bool) or not isinstance(ach['threshold'], (int, float)):
+        raise ValueError(f"achievement {key}: threshold must be a number")
+    return dict(ach)
+
+
+def load_pack(path):
+    import json
+    with open(path, 'r') as f:
+        pack = json.load(f)
+    if not isinstance(pack, dict):
+        raise ValueError('pack must be an object')
+    upgrades = {key: check_upgrade(key, upg) for key, upg in pack.get('upgrades', {}).items()}
+    ships = {key: check_ship(key, ship) for key, ship in pack.get('ships', {}).items()}
+    achievements = {key: check_achievement(key, ach) for key, ach in pack.get('achievements', {}).items()}
+    return upgrades, ships, achievements
+
+
+def load_packs(directory=PACKS_DIR):
+    # Паки применяются по имени файла; битый пак пропускается целиком
+    loaded = []
+    errors = {}
+    try:
+        names = sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+    except OSError:
+        names = []
+    for name in names:
+        try:
+            upgrades, ships, achievements = load_pack(os.path.join(directory, name))
+        except (OSError, ValueError, TypeError) as e:
+            errors[name] = str(e)
+            continue
+        UPGRADES.update(upgrades)
+        SHIPS.update(ships)
+        ACHIEVEMENTS.update(achievements)
+        loaded.append(name)
+    if loaded:
+        index_catalog()
+    return loaded, errors
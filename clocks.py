@@ -0,0 +1,75 @@
+"""
+STAR EMPIRE — часы игры
+Всё игровое время читается через GameManager.clock: RealClock — системное время,
+FixedClock — стоит, пока его не сдвинут (тесты, реплей), ScaledClock — идёт
+в scale раз быстрее реального. advance() у всех часов перематывает вперёд
+без ожидания — на нём построен GameManager.fast_forward.
+
+    STAREMPIRE_TIME_SCALE=1000 python main.py    # QA: сутки за полторы минуты, F8 — +1 час
+
+Перемотанное время попадает в сохранение (last_seen, кулдауны): QA-сохранение
+после перемотки с обычными часами «живёт в будущем», пока реальное время не догонит.
+"""
+
+import os
+import time
+
+
+TIME_SCALE_ENV = 'STAREMPIRE_TIME_SCALE'
+
+
+class RealClock:
+    # Системное время плюс перемотанное вперёд
+    __slots__ = ('offset',)
+    
+    def __init__(self, offset=0.0):
+        self.offset = offset
+    
+    def __call__(self):
+        return time.time() + self.offset
+    
+    def advance(self, seconds):
+        self.offset += seconds
+
+
+class FixedClock:
+    # Время стоит: now выставляется напрямую (реплей) или сдвигается advance
+    __slots__ = ('now',)
+    
+    def __init__(self, now=0.0):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+    
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class ScaledClock:
+    # Ускоренное время: от точки отсчёта base идёт scale игровых секунд за реальную
+    __slots__ = ('scale', 'source', 'base', 'base_real')
+    
+    def __init__(self, scale, start=None, source=time.time):
+        self.scale = scale
+        self.source = source
+        self.base_real = source()
+        self.base = self.base_real if start is None else start
+    
+    def __call__(self):
+        return self.base + (self.source() - self.base_real) * self.scale
+    
+    def advance(self, seconds):
+        self.base += seconds
+    
+    def set_scale(self, scale):
+        # Смена темпа без скачка: отсчёт продолжается от текущего показания
+        self.base = self()
+        self.base_real = self.source()
+        self.scale = scale
+
+
+def make_clock(environ=os.environ):
+    # Часы приложения: масштаб из STAREMPIRE_TIME_SCALE (QA), иначе реальное время
+    scale = float(environ.get(TIME_SCALE_ENV, 1))
+    return RealClock() if scale == 1 else ScaledClock(scale)
@@ -0,0 +1,207 @@
+"""
+STAR EMPIRE — эффекты
+Всплывающие числа и частицы рисуются пачкой: по одному Mesh на вид эффекта
+поверх всех экранов. Вершины лежат в заранее выделенных пулах, число живых
+частиц и чисел ограничено бюджетом; без живых эффектов кадр не тратится.
+"""
+
+import random
+
+from kivy.clock import Clock
+from kivy.graphics import Mesh, RenderContext
+from kivy.metrics import dp, sp
+from kivy.uix.widget import Widget
+
+from glyphs import GlyphAtlas
+
+
+# Бюджет: больше одновременно не рисуется (частицы сверх него не рождаются,
+# новое число вытесняет самое старое)
+MAX_PARTICLES = 512
+MAX_NUMBERS = 48
+MAX_NUMBER_GLYPHS = 10
+
+PARTICLE_LIFE = (0.4, 0.9)
+NUMBER_LIFE = 1.0
+NUMBER_RISE = dp(70)
+NUMBER_FONT_SP = 18
+GRAVITY = dp(600)
+
+# Позиция, текстурные координаты и цвет вершины: прозрачность у каждой частицы своя
+VERTEX_FORMAT = [(b'vPosition', 2, 'float'), (b'vTexCoords0', 2, 'float'), (b'vColor', 4, 'float')]
+VERTEX_SIZE = 8
+QUAD_SIZE = 4 * VERTEX_SIZE
+
+# Стандартный вершинный шейдер Kivy плюс цвет из вершины
+EFFECTS_VS = '''
+$HEADER$
+attribute vec4 vColor;
+
+void main(void) {
+    frag_color = vColor * color * vec4(1.0, 1.0, 1.0, opacity);
+    tex_coord0 = vTexCoords0;
+    gl_Position = projection_mat * modelview_mat * vec4(vPosition.xy, 0.0, 1.0);
+}
+'''
+
+
+def quad_indices(count):
+    indices = []
+    for i in range(0, 4 * count, 4):
+        indices += (i, i + 1, i + 2, i + 2, i + 3, i)
+    return indices
+
+
+class EffectsLayer(Widget):
+    # Слой не принимает касаний: детей нет, on_touch_down пропускает всё ниже
+    
+    def __init__(self, **kwargs):
+        self.canvas = RenderContext(use_parent_projection=True, use_parent_modelview=True,
+                                    use_parent_frag_modelview=True)
+        self.canvas.shader.vs = EFFECTS_VS
+        super().__init__(**kwargs)
+        self.atlas = GlyphAtlas.get()
+        self.random = random.Random()
+        self.ticker = None
+        
+        # Частицы: параллельные списки по слотам, живые — в [0, particles)
+        self.particles = 0
+        self.px = [0.0] * MAX_PARTICLES
+        self.py = [0.0] * MAX_PARTICLES
+        self.vx = [0.0] * MAX_PARTICLES
+        self.vy = [0.0] * MAX_PARTICLES
+        self.age = [0.0] * MAX_PARTICLES
+        self.life = [1.0] * MAX_PARTICLES
+        self.size_of = [0.0] * MAX_PARTICLES
+        self.rgb = [(1.0, 1.0, 1.0)] * MAX_PARTICLES
+        self.particle_vertices = [0.0] * (MAX_PARTICLES * QUAD_SIZE)
+        self.particle_indices = quad_indices(MAX_PARTICLES)
+        
+        # Числа: [x, y, возраст, rgb, глифы]; глифы разложены при рождении
+        self.numbers = []
+        self.number_vertices = [0.0] * (MAX_NUMBERS * MAX_NUMBER_GLYPHS * QUAD_SIZE)
+        self.number_indices = quad_indices(MAX_NUMBERS * MAX_NUMBER_GLYPHS)
+        
+        with self.canvas:
+            self.particle_mesh = Mesh(fmt=VERTEX_FORMAT, mode='triangles')
+            self.number_mesh = Mesh(fmt=VERTEX_FORMAT, mode='triangles', texture=self.atlas.texture)
+    
+    # ---------- рождение ----------
+    
+    def burst(self, x, y, color, count, speed=dp(220), size=dp(4)):
+        # Сверх бюджета частицы не рождаются: при лавине нажатий хватает уже летящих
+        count = min(count, MAX_PARTICLES - self.particles)
+        rnd = self.random.random
+        rgb = tuple(color[:3])
+        for i in range(self.particles, self.particles + count):
+            v = speed * (0.4 + 0.6 * rnd())
+            dx, dy = rnd() * 2 - 1, rnd() * 2 - 1
+            norm = max(0.01, (dx * dx + dy * dy) ** 0.5)
+            self.px[i] = x
+            self.py[i] = y
+            self.vx[i] = v * dx / norm
+            self.vy[i] = v * dy / norm + speed * 0.5
+            self.age[i] = 0.0
+            self.life[i] = PARTICLE_LIFE[0] + (PARTICLE_LIFE[1] - PARTICLE_LIFE[0]) * rnd()
+            self.size_of[i] = size * (0.6 + 0.8 * rnd())
+            self.rgb[i] = rgb
+        self.particles += count
+        self.start()
+    
+    def float_text(self, x, y, text, color, font_size=None):
+        # Глифы раскладываются один раз: кадр только сдвигает готовые четырёхугольники
+        atlas = self.atlas
+        scale = (font_size or sp(NUMBER_FONT_SP)) / atlas.font_size
+        glyphs = []
+        left = 0.0
+        for ch in text[:MAX_NUMBER_GLYPHS]:
+            w, h, u0, v0, u1, v1 = atlas.glyphs.get(ch) or atlas.fallback
+            if ch != ' ':
+                glyphs.append((left, w * scale, h * scale, u0, v0, u1, v1))
+            left += w * scale
+        # Колебание по x: числа от частых нажатий не ложатся друг на друга
+        x += (self.random.random() - 0.5) * dp(24) - left / 2
+        if len(self.numbers) >= MAX_NUMBERS:
+            self.numbers.pop(0)
+        self.numbers.append([x, y, 0.0, tuple(color[:3]), glyphs])
+        self.start()
+    
+    # ---------- кадр ----------
+    
+    def start(self):
+        if self.ticker is None:
+            self.ticker = Clock.schedule_interval(self.step, 0)
+    
+    def step(self, dt):
+        # После паузы приложения dt большой: эффекты просто доживают за один кадр
+        self.step_particles(dt)
+        self.step_numbers(dt)
+        if not self.particles and not self.numbers:
+            self.ticker = None
+            return False
+    
+    def step_particles(self, dt):
+        px, py, vx, vy = self.px, self.py, self.vx, self.vy
+        age, life, size_of, rgb = self.age, self.life, self.size_of, self.rgb
+        vertices = self.particle_vertices
+        fall = GRAVITY * dt
+        n = self.particles
+        i = 0
+        while i < n:
+            a = age[i] + dt
+            if a >= life[i]:
+                # Умершую заменяет последняя живая: живые остаются в начале пула
+                n -= 1
+                px[i], py[i], vx[i], vy[i] = px[n], py[n], vx[n], vy[n]
+                age[i], life[i], size_of[i], rgb[i] = age[n], life[n], size_of[n], rgb[n]
+                continue
+            age[i] = a
+            vy[i] -= fall
+            x = px[i] = px[i] + vx[i] * dt
+            y = py[i] = py[i] + vy[i] * dt
+            alpha = 1.0 - a / life[i]
+            s = size_of[i] * (0.5 + 0.5 * alpha)
+            r, g, b = rgb[i]
+            o = i * QUAD_SIZE
+            vertices[o:o + QUAD_SIZE] = (
+                x - s, y - s, 0, 0, r, g, b, alpha,
+                x + s, y - s, 0, 0, r, g, b, alpha,
+                x + s, y + s, 0, 0, r, g, b, alpha,
+                x - s, y + s, 0, 0, r, g, b, alpha,
+            )
+            i += 1
+        self.particles = n
+        # На GPU уходит только живая часть пула
+        self.particle_mesh.vertices = vertices[:QUAD_SIZE * n]
+        self.particle_mesh.indices = self.particle_indices[:6 * n]
+    
+    def step_numbers(self, dt):
+        vertices = self.number_vertices
+        alive = []
+        o = 0
+        for number in self.numbers:
+            x, y, a, (r, g, b), glyphs = number
+            a += dt
+            if a >= NUMBER_LIFE:
+                continue
+            number[2] = a
+            alive.append(number)
+            t = a / NUMBER_LIFE
+            # Подъём с замедлением, затухание во второй половине жизни
+            y += NUMBER_RISE * t * (2 - t)
+            alpha = min(1.0, 2 - 2 * t)
+            y = round(y)
+            for left, w, h, u0, v0, u1, v1 in glyphs:
+                x0 = round(x + left)
+                x1 = round(x + left + w)
+                y1 = y + round(h)
+                vertices[o:o + QUAD_SIZE] = (
+                    x0, y, u0, v0, r, g, b, alpha,
+                    x1, y, u1, v0, r, g, b, alpha,
+                    x1, y1, u1, v1, r, g, b, alpha,
+                    x0, y1, u0, v1, r, g, b, alpha,
+                )
+                o += QUAD_SIZE
+        self.numbers = alive
+        self.number_mesh.vertices = vertices[:o]
+        self.number_mesh.indices = self.number_indices[:6 * (o // QUAD_SIZE)]
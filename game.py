@@ -0,0 +1,831 @@
+"""
+STAR EMPIRE — игровое ядро
+Конфигурация и GameManager без зависимостей от Kivy.
+json импортируется лениво (в saves): он тянет за собой re и заметно замедляет импорт ядра.
+"""
+
+import bisect
+import math
+import random
+import os
+
+from achievements import AchievementIndex
+from bignum import Big, format_num
+from clocks import RealClock
+from rng import new_seed, restore_streams
+from saves import JournalWriter, SaveWriter, load_save, snapshot
+from state import RESOURCES, SHIP_SLOTS, UPGRADE_SLOTS, GameState, Levels
+
+
+# ============== КОНФИГУРАЦИЯ ==============
+
+# Ресурсы (RESOURCES) — фиксированные поля состояния, см. state.py
+
+# effect: 'click' — прибавка к клику по ресурсу, 'auto' — доход в секунду;
+# power — сколько даёт один уровень. Контент-паки дополняют каталог (catalog.py)
+UPGRADES = {
+    'energy_click': {'name': 'Energy Click', 'base_cost': 10, 'cost_mult': 1.5, 'resource': 'energy',
+                     'effect': 'click', 'power': 1},
+    'metal_click': {'name': 'Metal Click', 'base_cost': 25, 'cost_mult': 1.6, 'resource': 'metal',
+                    'effect': 'click', 'power': 1},
+    'crystal_click': {'name': 'Crystal Click', 'base_cost': 100, 'cost_mult': 1.8, 'resource': 'crystal',
+                      'effect': 'click', 'power': 1},
+    'energy_auto': {'name': 'Auto Energy', 'base_cost': 50, 'cost_mult': 1.7, 'resource': 'energy',
+                    'effect': 'auto', 'power': 1},
+    'metal_auto': {'name': 'Auto Metal', 'base_cost': 150, 'cost_mult': 1.8, 'resource': 'metal',
+                   'effect': 'auto', 'power': 1},
+    'crystal_auto': {'name': 'Auto Crystal', 'base_cost': 500, 'cost_mult': 2.0, 'resource': 'crystal',
+                     'effect': 'auto', 'power': 1},
+}
+
+# Клик без улучшений: энергия всегда даёт хотя бы 1
+CLICK_BASE = {'energy': 1}
+
+SHIPS = {
+    'scout': {'name': 'Scout', 'cost': {'metal': 100}, 'time': 30,
+              'rewards': {'energy': (50, 150), 'metal': (20, 50)}},
+    'miner': {'name': 'Miner', 'cost': {'metal': 300, 'energy': 100}, 'time': 60,
+              'rewards': {'metal': (100, 300), 'crystal': (5, 20)}},
+    'cruiser': {'name': 'Cruiser', 'cost': {'metal': 1000, 'crystal': 50}, 'time': 120,
+                'rewards': {'energy': (200, 500), 'metal': (150, 400), 'crystal': (20, 50)}},
+}
+
+BOSSES = {
+    'asteroid': {'name': 'Giant Asteroid', 'hp': 100, 'reward': {'metal': 500, 'crystal': 25}, 'cooldown': 60},
+    'pirate': {'name': 'Pirate Fleet', 'hp': 500, 'reward': {'energy': 1000, 'metal': 750}, 'cooldown': 180},
+    'alien': {'name': 'Alien Titan', 'hp': 2000, 'reward': {'crystal': 200, 'prestige_points': 1}, 'cooldown': 600},
+}
+
+# Варианты массовой покупки улучшений
+BUY_AMOUNTS = (1, 10, 100, 'max')
+
+# Престиж: очки = floor(sqrt(взвешенная сумма ресурсов) / делитель), каждое очко даёт +10%
+PRESTIGE_WEIGHTS = {'energy': 1, 'metal': 2, 'crystal': 5}
+PRESTIGE_DIVISOR = 50
+PRESTIGE_MIN_TOTAL = 10000
+PRESTIGE_BONUS = 0.1
+
+# Ежедневная награда (до множителя престижа) и её период
+DAILY_REWARD = {'energy': 100, 'metal': 50, 'crystal': 10}
+DAILY_COOLDOWN = 86400
+
+# Достижения: порог по одной статистике. Статистики — поля состояния и производные
+# (ships/upgrades — сумма уровней, bosses_killed — число разных убитых боссов)
+ACHIEVEMENT_STATS = RESOURCES + ('total_clicks', 'play_time', 'boss_kills', 'bosses_killed',
+                                 'prestige_points', 'upgrades', 'ships')
+
+ACHIEVEMENTS = {
+    'clicks_100': {'name': 'Tapper', 'stat': 'total_clicks', 'threshold': 100},
+    'clicks_1000': {'name': 'Drummer', 'stat': 'total_clicks', 'threshold': 1000},
+    'clicks_10000': {'name': 'Piston', 'stat': 'total_clicks', 'threshold': 10000},
+    'energy_1k': {'name': 'Charged', 'stat': 'energy', 'threshold': 1000},
+    'energy_1m': {'name': 'Power Plant', 'stat': 'energy', 'threshold': 10 ** 6},
+    'metal_1k': {'name': 'Scrap Heap', 'stat': 'metal', 'threshold': 1000},
+    'metal_1m': {'name': 'Foundry', 'stat': 'metal', 'threshold': 10 ** 6},
+    'crystal_100': {'name': 'Shiny', 'stat': 'crystal', 'threshold': 100},
+    'crystal_100k': {'name': 'Crystal Palace', 'stat': 'crystal', 'threshold': 10 ** 5},
+    'upgrades_10': {'name': 'Tinkerer', 'stat': 'upgrades', 'threshold': 10},
+    'upgrades_100': {'name': 'Engineer', 'stat': 'upgrades', 'threshold': 100},
+    'ships_1': {'name': 'First Flight', 'stat': 'ships', 'threshold': 1},
+    'ships_25': {'name': 'Squadron', 'stat': 'ships', 'threshold': 25},
+    'ships_100': {'name': 'Armada', 'stat': 'ships', 'threshold': 100},
+    'boss_kills_1': {'name': 'Giant Slayer', 'stat': 'boss_kills', 'threshold': 1},
+    'boss_kills_50': {'name': 'Bounty Hunter', 'stat': 'boss_kills', 'threshold': 50},
+    'bosses_all': {'name': 'Nemesis', 'stat': 'bosses_killed', 'threshold': 3},
+    'prestige_1': {'name': 'Reborn', 'stat': 'prestige_points', 'threshold': 1},
+    'prestige_25': {'name': 'Ascended', 'stat': 'prestige_points', 'threshold': 25},
+    'play_hour': {'name': 'Commander', 'stat': 'play_time', 'threshold': 3600},
+    'play_day': {'name': 'Admiral', 'stat': 'play_time', 'threshold': 86400},
+}
+
+# Максимум времени оффлайн, который засчитывается при возвращении (секунды)
+OFFLINE_CAP = 8 * 3600
+
+# Шаг перемотки fast_forward (игровые секунды): автодоход и бой линейны внутри шага
+FAST_FORWARD_STEP = 600
+
+
+# Урон флота по выбранному боссу в секунду на один корабль (до множителя престижа)
+FLEET_DPS_PER_SHIP = 1.0
+
+# Выше этого числа кораблей награда разыгрывается одной нормальной выборкой
+EXACT_ROLL_LIMIT = 16
+
+# Шанс бонуса за клик и его размер (до множителя престижа)
+BONUS_CHANCE = 0.03
+BONUS_RANGE = (10, 50)
+
+# Независимые потоки случайности: клики/бонусы и награды экспедиций
+RNG_STREAMS = ('mine', 'expeditions')
+
+# Интервал автосохранения в auto_collect (секунды); журнал пишет мало — можно чаще
+SAVE_INTERVAL = 30
+JOURNAL_SAVE_INTERVAL = 5
+
+
+# ============== ИНДЕКС КАТАЛОГА ==============
+
+# effect -> resource -> [(key, power)]: эффекты считаются без перебора всего каталога
+UPGRADE_EFFECTS = {'click': {}, 'auto': {}}
+
+
+# Растёт при каждой пересборке индекса: экраны сверяют с ним списки каталога вместо самих словарей
+catalog_stamp = 0
+
+
+def catalog_version():
+    return catalog_stamp
+
+
+def index_catalog():
+    # Пересборка на месте: модули, импортировавшие словари, видят изменения
+    global catalog_stamp
+    catalog_stamp += 1
+    UPGRADE_SLOTS.clear()
+    UPGRADE_SLOTS.update((key, slot) for slot, key in enumerate(UPGRADES))
+    SHIP_SLOTS.clear()
+    SHIP_SLOTS.update((key, slot) for slot, key in enumerate(SHIPS))
+    for effect in UPGRADE_EFFECTS.values():
+        effect.clear()
+        for res in RESOURCES:
+            effect[res] = []
+    for key, upg in UPGRADES.items():
+        UPGRADE_EFFECTS[upg['effect']][upg['resource']].append((key, upg.get('power', 1)))
+
+
+index_catalog()
+
+
+# ============== ПЛАТФОРМА ==============
+
+def is_android():
+    # Та же проверка, что и в kivy.utils.platform, без импорта Kivy
+    return 'ANDROID_ARGUMENT' in os.environ or 'ANDROID_PRIVATE' in os.environ
+
+
+# ============== ВЫБОРКИ ==============
+
+def binomial(n, p, rng=random):
+    # Число успехов из n испытаний одной выборкой, без n бросков
+    if n <= 0 or p <= 0:
+        return 0
+    if n * p < 30:
+        # Обращение функции распределения: O(n*p) шагов, один random()
+        q = 1 - p
+        s = p / q
+        a = (n + 1) * s
+        r = q ** n
+        u = rng.random()
+        k = 0
+        while u > r and k < n:
+            u -= r
+            k += 1
+            r *= a / k - s
+        return k
+    sd = math.sqrt(n * p * (1 - p))
+    return min(n, max(0, int(round(rng.gauss(n * p, sd)))))
+
+
+def roll_sum(low, high, count, rng=random):
+    # Сумма count независимых randint(low, high) одной выборкой (ЦПТ)
+    if count <= EXACT_ROLL_LIMIT:
+        return sum(rng.randint(low, high) for _ in range(count))
+    mean = count * (low + high) / 2
+    sd = math.sqrt(count * ((high - low + 1) ** 2 - 1) / 12)
+    return min(count * high, max(count * low, int(round(rng.gauss(mean, sd)))))
+
+
+# ============== ИГРОВОЙ МЕНЕДЖЕР ==============
+
+class GameManager:
+    def __init__(self, save_path=None, offline_cap=OFFLINE_CAP, clock=None, data=None, seed=None,
+                 journal=False):
+        # clock — источник времени (clocks.py, по умолчанию RealClock); data — готовое состояние
+        # (реплей) вместо чтения сохранения; journal — дописывать изменения в журнал вместо полной перезаписи
+        self.clock = RealClock() if clock is None else clock
+        self.offline_cap = offline_cap
+        self.save_interval = JOURNAL_SAVE_INTERVAL if journal else SAVE_INTERVAL
+        self.offline_summary = None
+        # Ревизии ключей data: экраны перерисовываются только при изменениях
+        self.revision = 0
+        self.revisions = {}
+        self.power_cache = None
+        self.effect_cache = None
+        # Ресурсы, изменённые не автодоходом (покупки, клики, награды)
+        self.balance_revision = 0
+        self.cost_cache = {}
+        self.afford_cache = None
+        # Номер пересборки индекса доступности: экраны кешируют по нему порядок строк
+        self.afford_version = 0
+        self.save_path = save_path or self.get_save_path()
+        self.writer = (JournalWriter if journal else SaveWriter)(self.save_path)
+        self.data = self.load_game() if data is None else self.restore(data)
+        if self.data.seed is None:
+            self.data.seed = new_seed() if seed is None else seed
+        self.rng = restore_streams(RNG_STREAMS, self.data.seed, self.data.rng)
+        # Первая проверка смотрит все статистики: каталог мог пополниться после сохранения
+        self.achievements = AchievementIndex(ACHIEVEMENTS, self.data.achievements,
+                                             convert={res: Big for res in RESOURCES})
+        self.achievement_revision = -1
+        self.last_save = self.clock()
+        self.event_text = ""
+        # Визуальные эффекты: callable(kind, key, amount); без экрана (реплей, CLI) — None
+        self.on_effect = None
+        if data is None:
+            self.catch_up()
+    
+    def get_save_path(self):
+        if is_android():
+            try:
+                from android.storage import app_storage_path
+                return os.path.join(app_storage_path(), 'save.json')
+            except:
+                pass
+        return os.path.join(os.path.expanduser('~'), '.starempire_save.json')
+    
+    def load_game(self):
+        # Снимок + хвост журнала; писатель узнаёт, что уже лежит на диске
+        saved, seq, clean = load_save(self.save_path)
+        if saved is not None:
+            self.writer.prime(snapshot(saved), seq, clean)
+        return self.restore(saved)
+    
+    def restore(self, saved):
+        # JSON сохранения -> GameState; None — новая игра
+        return GameState.from_json(saved)
+    
+    def save_game(self, wait=False):
+        # Снимок берётся здесь, сериализация и fsync — в потоке SaveWriter.
+        # Состояние игры не меняется: last_seen двигают только начисления (auto_collect, catch_up),
+        # иначе автосохранение внутри шага цикла расходилось бы с реплеем
+        self.sync_rng()
+        self.writer.submit(self.data.to_json())
+        if wait:
+            self.writer.flush()
+    
+    def sync_rng(self):
+        # Состояния потоков кладутся в data перед снимком/хешем
+        self.data.rng = {name: stream.getstate() for name, stream in self.rng.items()}
+    
+    def state_hash(self):
+        # Отпечаток состояния для сверки реплея с записью
+        import hashlib
+        import json
+        self.sync_rng()
+        text = json.dumps(self.data.to_json(), sort_keys=True, separators=(',', ':'))
+        return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+    
+    def mark(self, *keys, income=False):
+        # income=True — линейный автодоход: он не сдвигает прогноз доступности
+        self.revision += 1
+        for key in keys:
+            self.revisions[key] = self.revision
+            if not income and key in RESOURCES:
+                self.balance_revision = self.revision
+    
+    def emit(self, kind, key, amount):
+        # kind: 'tap' | 'bonus' | 'returned' — key ресурс; 'boss' — key босс, amount убийств
+        if self.on_effect is not None:
+            self.on_effect(kind, key, amount)
+    
+    def changed_since(self, revision, keys):
+        revisions = self.revisions
+        return any(revisions.get(key, 0) > revision for key in keys)
+    
+    def get_prestige_mult(self):
+        return 1.0 + self.data.prestige_points * PRESTIGE_BONUS
+    
+    def fleet_power(self):
+        # (кораблей всего, множитель престижа) пересчитываются только при их изменении
+        stamp = (self.revisions.get('ships', 0), self.revisions.get('prestige_points', 0))
+        if self.power_cache is None or self.power_cache[0] != stamp:
+            total_ships = self.data.ships.total()
+            self.power_cache = (stamp, total_ships, self.get_prestige_mult())
+        return self.power_cache[1], self.power_cache[2]
+    
+    def upgrade_effects(self):
+        # {'click'|'auto': {resource: сумма level * power}} по индексу каталога,
+        # пересчёт только при смене уровней улучшений
+        stamp = self.revisions.get('upgrades', 0)
+        if self.effect_cache is None or self.effect_cache[0] != stamp:
+            levels = self.data.upgrades
+            effects = {}
+            for effect, by_res in UPGRADE_EFFECTS.items():
+                effects[effect] = {res: sum(levels.get(key, 0) * power for key, power in entries)
+                                   for res, entries in by_res.items()}
+            for res, base in CLICK_BASE.items():
+                effects['click'][res] += base
+            self.effect_cache = (stamp, effects)
+        return self.effect_cache[1]
+    
+    def fleet_dps(self):
+        total_ships, mult = self.fleet_power()
+        return total_ships * FLEET_DPS_PER_SHIP * mult
+    
+    def mine(self, resource, n=1):
+        # n — сколько нажатий применить разом (буфер кадра на экране)
+        if n <= 0:
+            return
+        if resource not in RESOURCES:
+            return
+        mult = self.get_prestige_mult()
+        amount = self.upgrade_effects()['click'][resource] * mult
+        
+        data = self.data
+        setattr(data, resource, getattr(data, resource) + amount * n)
+        data.total_clicks += n
+        self.mark(resource, 'total_clicks')
+        self.emit('tap', resource, amount * n)
+        
+        rng = self.rng['mine']
+        if n == 1:
+            if rng.random() < BONUS_CHANCE:
+                bonus = rng.choice(['energy', 'metal', 'crystal'])
+                bonus_amount = int(rng.randint(*BONUS_RANGE) * mult)
+                setattr(data, bonus, getattr(data, bonus) + bonus_amount)
+                self.mark(bonus)
+                self.emit('bonus', bonus, bonus_amount)
+                self.event_text = f"BONUS! +{bonus_amount} {bonus.upper()}"
+            return
+        
+        # Пачка: число бонусов ~ Binomial(n, 3%), затем делим их между ресурсами
+        bonuses = binomial(n, BONUS_CHANCE, rng)
+        if not bonuses:
+            return
+        left = bonuses
+        gained = []
+        for i, bonus in enumerate(RESOURCES):
+            count = left if i == len(RESOURCES) - 1 else binomial(left, 1 / (len(RESOURCES) - i), rng)
+            left -= count
+            if count:
+                bonus_amount = int(roll_sum(*BONUS_RANGE, count, rng) * mult)
+                setattr(data, bonus, getattr(data, bonus) + bonus_amount)
+                gained.append(f"+{bonus_amount} {bonus.upper()}")
+                self.emit('bonus', bonus, bonus_amount)
+        self.mark(*RESOURCES)
+        self.event_text = f"BONUS x{bonuses}! " + ' '.join(gained)
+    
+    def next_cost(self, key):
+        # Цена следующего уровня; пересчёт только при смене уровня
+        level = self.data.upgrades.get(key, 0)
+        cached = self.cost_cache.get(key)
+        if cached is not None and cached[0] == level:
+            return cached[1]
+        cost = self.upgrade_cost(key, 1, level)
+        self.cost_cache[key] = (level, cost)
+        return cost
+    
+    def upgrade_cost(self, key, count=1, level=None):
+        # Сумма геометрической прогрессии: base * r^L * (r^n - 1) / (r - 1)
+        upg = UPGRADES[key]
+        if level is None:
+            if count == 1:
+                return self.next_cost(key)
+            level = self.data.upgrades.get(key, 0)
+        if count <= 0:
+            return Big(0)
+        r = upg['cost_mult']
+        try:
+            # Пока цена помещается во float — та же формула, что и раньше
+            first = upg['base_cost'] * (r ** level)
+            if count == 1:
+                return Big(int(first))
+            return Big(int(first * (r ** count - 1) / (r - 1)))
+        except OverflowError:
+            first = Big(r) ** level * upg['base_cost']
+            if count == 1:
+                return first
+            return first * (Big(r) ** count - 1) / (r - 1)
+    
+    def max_affordable(self, key):
+        upg = UPGRADES[key]
+        level = self.data.upgrades.get(key, 0)
+        budget = getattr(self.data, upg['resource'])
+        r = upg['cost_mult']
+        first = self.upgrade_cost(key, 1, level)
+        if budget < first:
+            return 0
+        n = int((budget * (r - 1) / first + 1).log10() / math.log10(r))
+        # Поправка на погрешность float и округление цены
+        while n > 0 and self.upgrade_cost(key, n, level) > budget:
+            n -= 1
+        while self.upgrade_cost(key, n + 1, level) <= budget:
+            n += 1
+        return n
+    
+    def income_rates(self):
+        mult = self.get_prestige_mult()
+        auto = self.upgrade_effects()['auto']
+        return {res: auto[res] * mult for res in RESOURCES}
+    
+    def affordability_index(self, now=None):
+        # [(момент доступности, key)] по возрастанию. Момент абсолютный, поэтому
+        # автодоход его не меняет: индекс пересобирается только после покупок,
+        # кликов, наград и смены уровней/престижа
+        stamp = (self.revisions.get('upgrades', 0), self.revisions.get('prestige_points', 0),
+                 self.balance_revision)
+        if self.afford_cache is not None and self.afford_cache[0] == stamp:
+            return self.afford_cache[1]
+        if now is None:
+            now = self.clock()
+        rates = self.income_rates()
+        index = []
+        for key, upg in UPGRADES.items():
+            res = upg['resource']
+            cost = self.next_cost(key)
+            have = getattr(self.data, res)
+            if have >= cost:
+                at = now
+            elif rates[res] > 0:
+                at = now + float((cost - have) / rates[res])
+            else:
+                at = math.inf
+            index.append((at, key))
+        index.sort()
+        self.afford_version += 1
+        self.afford_cache = (stamp, index, dict((key, at) for at, key in index), [at for at, key in index])
+        return index
+    
+    def next_affordable(self, now=None):
+        # (момент, key) ближайшего улучшения, которое станет доступно позже now; None — ждать нечего.
+        # Индекс отсортирован по моменту: двоичный поиск вместо прохода по каталогу
+        if now is None:
+            now = self.clock()
+        index = self.affordability_index(now)
+        i = bisect.bisect_right(self.afford_cache[3], now)
+        if i < len(index) and index[i][0] < math.inf:
+            return index[i]
+        return None
+    
+    def time_to_afford(self, key, now=None):
+        # Секунды до покупки следующего уровня на автодоходе; None — не накопить
+        if now is None:
+            now = self.clock()
+        self.affordability_index(now)
+        at = self.afford_cache[2][key]
+        if at == math.inf:
+            return None
+        return max(0.0, at - now)
+    
+    def upgrade_preview(self, key, amount=1):
+        level = self.data.upgrades.get(key, 0)
+        if amount == 'max':
+            count = max(1, self.max_affordable(key))
+        else:
+            count = amount
+        return count, self.upgrade_cost(key, count, level), level + count
+    
+    def buy_upgrade(self, key, amount=1):
+        if key not in UPGRADES:
+            return False
+        upg = UPGRADES[key]
+        level = self.data.upgrades.get(key, 0)
+        if amount == 'max':
+            count = self.max_affordable(key)
+            if count <= 0:
+                return False
+        elif isinstance(amount, int) and not isinstance(amount, bool) and amount > 0:
+            count = amount
+        else:
+            # Ноль и отрицательные количества «покупали» уровни бесплатно или продавали их
+            return False
+        cost = self.upgrade_cost(key, count, level)
+        
+        data = self.data
+        res = upg['resource']
+        if getattr(data, res) >= cost:
+            setattr(data, res, getattr(data, res) - cost)
+            data.upgrades[key] = level + count
+            self.mark(upg['resource'], 'upgrades')
+            return True
+        return False
+    
+    def buy_ship(self, key):
+        if key not in SHIPS:
+            return False
+        ship = SHIPS[key]
+        
+        data = self.data
+        can_buy = all(getattr(data, res) >= cost for res, cost in ship['cost'].items())
+        if can_buy:
+            for res, cost in ship['cost'].items():
+                setattr(data, res, getattr(data, res) - cost)
+            data.ships[key] = data.ships.get(key, 0) + 1
+            self.mark('ships', *ship['cost'])
+            return True
+        return False
+    
+    def ships_away(self, key):
+        return sum(exp['count'] for exp in self.data.expeditions if exp['ship'] == key)
+    
+    def idle_ships(self, key):
+        return self.data.ships.get(key, 0) - self.ships_away(key)
+    
+    def send_expedition(self, key, count=None):
+        # count=None — отправить все свободные корабли этого типа одной группой
+        if key not in SHIPS:
+            return 0
+        idle = self.idle_ships(key)
+        count = idle if count is None else min(count, idle)
+        if count <= 0:
+            return 0
+        ship = SHIPS[key]
+        self.data.expeditions.append({'ship': key, 'count': count, 'return': self.clock() + ship['time']})
+        self.mark('expeditions')
+        self.event_text = f"{count}x {ship['name']} sent!"
+        return count
+    
+    def collect_returned(self, now=None):
+        # Стоимость зависит от числа групп, а не от числа кораблей в них
+        if now is None:
+            now = self.clock()
+        mult = self.get_prestige_mult()
+        gained = {}
+        returned = {}
+        away = []
+        data = self.data
+        for exp in data.expeditions:
+            key = exp['ship']
+            if exp['return'] > now or key not in SHIPS:
+                away.append(exp)
+                continue
+            count = exp['count']
+            returned[key] = returned.get(key, 0) + count
+            for res, (min_r, max_r) in SHIPS[key]['rewards'].items():
+                amount = int(roll_sum(min_r, max_r, count, self.rng['expeditions']) * mult)
+                setattr(data, res, getattr(data, res) + amount)
+                gained[res] = gained.get(res, 0) + amount
+        
+        if returned:
+            data.expeditions = away
+            self.mark('expeditions', *gained)
+            for res, amount in gained.items():
+                self.emit('returned', res, amount)
+            self.event_text = "Returned: " + ', '.join(f"{n}x {SHIPS[k]['name']}" for k, n in returned.items())
+        return returned, gained
+    
+    def attack_boss(self, key):
+        if key not in BOSSES:
+            return
+        boss = BOSSES[key]
+        
+        bd = self.data.bosses.get(key)
+        if bd is None:
+            bd = self.data.bosses[key] = {'hp': boss['hp'], 'cooldown': 0}
+        
+        if self.clock() < bd.get('cooldown', 0):
+            return
+        if bd['hp'] <= 0:
+            bd['hp'] = boss['hp']
+            self.mark('bosses')
+            return
+        
+        total_ships, mult = self.fleet_power()
+        base_damage = self.upgrade_effects()['click']['energy']
+        damage = int((base_damage + total_ships * 5) * mult)
+        
+        bd['hp'] = max(0, bd['hp'] - damage)
+        self.mark('bosses')
+        
+        if bd['hp'] <= 0:
+            self.reward_boss(key, 1)
+            bd['cooldown'] = self.clock() + boss['cooldown']
+            self.event_text = f"BOSS {boss['name']} DEFEATED!"
+    
+    def reward_boss(self, key, kills):
+        data = self.data
+        for res, amount in BOSSES[key]['reward'].items():
+            setattr(data, res, getattr(data, res) + amount * kills)
+            self.mark(res)
+        data.boss_kills += kills
+        if key not in data.bosses_killed:
+            data.bosses_killed.append(key)
+        self.mark('boss_kills', 'bosses_killed')
+        self.emit('boss', key, kills)
+    
+    def set_target(self, key):
+        self.data.target_boss = key if key in BOSSES else None
+        self.mark('target_boss')
+    
+    def time_to_kill(self, key, now=None):
+        # Секунды до следующего убийства флотом; None, если урона нет
+        dps = self.fleet_dps()
+        if dps <= 0 or key not in BOSSES:
+            return None
+        if now is None:
+            now = self.clock()
+        boss = BOSSES[key]
+        bd = self.data.bosses.get(key, {'hp': boss['hp'], 'cooldown': 0})
+        wait = max(0, bd.get('cooldown', 0) - now)
+        hp = bd['hp'] if bd['hp'] > 0 and wait == 0 else boss['hp']
+        return wait + hp / dps
+    
+    def advance_combat(self, start, end):
+        # Пассивный бой флота с целью на отрезке [start, end] в замкнутой форме:
+        # убийства, кулдауны и возрождения считаются без пошаговой симуляции
+        key = self.data.target_boss
+        dps = self.fleet_dps()
+        if key not in BOSSES or dps <= 0 or end <= start:
+            return 0
+        boss = BOSSES[key]
+        bd = self.data.bosses.setdefault(key, {'hp': boss['hp'], 'cooldown': 0})
+        
+        t = start
+        if bd['hp'] <= 0:
+            t = max(t, bd.get('cooldown', 0))
+            if t >= end:
+                return 0
+            bd['hp'] = boss['hp']
+            bd['cooldown'] = 0
+        
+        first_kill = t + bd['hp'] / dps
+        if first_kill > end:
+            bd['hp'] -= dps * (end - t)
+            self.mark('bosses')
+            return 0
+        
+        # Полный цикл: кулдаун + время убийства свежего босса
+        period = boss['cooldown'] + boss['hp'] / dps
+        kills = 1 + int((end - first_kill) // period)
+        last_kill = first_kill + (kills - 1) * period
+        respawn = last_kill + boss['cooldown']
+        if respawn <= end:
+            bd['hp'] = boss['hp'] - dps * (end - respawn)
+            bd['cooldown'] = 0
+        else:
+            bd['hp'] = 0
+            bd['cooldown'] = respawn
+        self.mark('bosses')
+        self.reward_boss(key, kills)
+        self.event_text = f"Fleet defeated {boss['name']} x{kills}!"
+        return kills
+    
+    def can_claim_daily(self):
+        return self.clock() - self.data.last_daily >= DAILY_COOLDOWN
+    
+    def claim_daily(self):
+        if self.can_claim_daily():
+            mult = self.get_prestige_mult()
+            data = self.data
+            for res, amount in DAILY_REWARD.items():
+                setattr(data, res, getattr(data, res) + int(amount * mult))
+            data.last_daily = self.clock()
+            self.mark('energy', 'metal', 'crystal', 'last_daily')
+            self.event_text = "Daily bonus claimed!"
+            return True
+        return False
+    
+    def prestige_earn(self):
+        # -> (взвешенная сумма ресурсов, очки за престиж сейчас)
+        total = Big(0)
+        for res, weight in PRESTIGE_WEIGHTS.items():
+            total += getattr(self.data, res) * weight
+        return total, int(total ** 0.5 / PRESTIGE_DIVISOR)
+    
+    def do_prestige(self):
+        total, earn = self.prestige_earn()
+        
+        if earn > 0 and total >= PRESTIGE_MIN_TOTAL:
+            data = self.data
+            data.prestige_points += earn
+            data.run_time = 0
+            for res in RESOURCES:
+                setattr(data, res, Big(0))
+            data.upgrades = Levels(UPGRADE_SLOTS)
+            data.ships = Levels(SHIP_SLOTS)
+            data.expeditions = []
+            data.bosses = {}
+            self.mark('prestige_points', 'run_time', 'energy', 'metal', 'crystal',
+                      'upgrades', 'ships', 'expeditions', 'bosses')
+            self.event_text = f"PRESTIGE! +{earn} points!"
+            return True
+        return False
+    
+    def auto_collect(self, dt, now=None):
+        # Отрезок [now - dt, now]; now=None — по часам. Цикл передаёт конец шага явно
+        mult = self.get_prestige_mult()
+        auto = self.upgrade_effects()['auto']
+        data = self.data
+        for res in RESOURCES:
+            rate = auto[res]
+            if rate:
+                setattr(data, res, getattr(data, res) + rate * mult * dt)
+                self.mark(res, income=True)
+        data.play_time += dt
+        data.run_time += dt
+        self.mark('play_time', 'run_time')
+        
+        if now is None:
+            now = self.clock()
+        self.advance_combat(now - dt, now)
+        data.last_seen = now
+        self.check_achievements()
+        
+        if self.clock() - self.last_save > self.save_interval:
+            self.save_game()
+            self.last_save = self.clock()
+    
+    def tick(self):
+        # Автодоход за время с прошлого учёта по часам игры: ускоренные часы — ускоренный доход
+        dt = self.clock() - self.data.last_seen
+        if dt > 0:
+            self.auto_collect(dt)
+    
+    def fast_forward(self, seconds, step=FAST_FORWARD_STEP):
+        # Перемотка на seconds игрового времени без ожидания: шагами автодохода, как в открытой
+        # игре (бой, достижения, кулдауны). Перемотанное время не торопит автосохранение — одно в конце
+        advance = getattr(self.clock, 'advance', None)
+        if advance is None:
+            raise TypeError("fast_forward needs a clock with advance() (see clocks.py)")
+        left = seconds
+        while left > 0:
+            dt = min(step, left)
+            advance(dt)
+            self.last_save += dt
+            self.auto_collect(dt)
+            left -= dt
+        self.save_game()
+        self.last_save = self.clock()
+    
+    def catch_up(self, now=None):
+        # Начисление за время оффлайн одной формулой, без пошаговой симуляции
+        if now is None:
+            now = self.clock()
+        data = self.data
+        last_seen = data.last_seen
+        data.last_seen = now
+        if not last_seen or now <= last_seen:
+            return None
+        
+        away = now - last_seen
+        elapsed = min(away, self.offline_cap)
+        mult = self.get_prestige_mult()
+        auto = self.upgrade_effects()['auto']
+        
+        summary = {'away': away, 'elapsed': elapsed, 'capped': away > elapsed,
+                   'resources': {}, 'expeditions': {}, 'bosses': []}
+        
+        for res in RESOURCES:
+            amount = auto[res] * mult * elapsed
+            if amount:
+                setattr(data, res, getattr(data, res) + amount)
+                self.mark(res)
+                summary['resources'][res] = amount
+        data.play_time += elapsed
+        data.run_time += elapsed
+        self.mark('play_time', 'run_time')
+        
+        # Экспедиции, вернувшиеся за время отсутствия
+        cutoff = last_seen + elapsed
+        returned, gained = self.collect_returned(cutoff)
+        for res, amount in gained.items():
+            summary['resources'][res] = summary['resources'].get(res, 0) + amount
+        summary['expeditions'] = returned
+        
+        # Пассивный бой с выбранным боссом за всё время отсутствия
+        kills = self.advance_combat(last_seen, cutoff)
+        summary['boss_kills'] = kills
+        if kills:
+            for res, amount in BOSSES[data.target_boss]['reward'].items():
+                summary['resources'][res] = summary['resources'].get(res, 0) + amount * kills
+        
+        # Боссы, у которых истёк кулдаун, возрождаются
+        for key, bd in data.bosses.items():
+            if key in BOSSES and bd.get('hp', 0) <= 0 and bd.get('cooldown', 0) <= cutoff:
+                bd['hp'] = BOSSES[key]['hp']
+                bd['cooldown'] = 0
+                self.mark('bosses')
+                summary['bosses'].append(key)
+        
+        self.offline_summary = summary
+        gained = ' '.join(f"+{format_num(v)}{k[0].upper()}" for k, v in summary['resources'].items())
+        if gained:
+            self.event_text = f"Welcome back! {gained}"
+        self.check_achievements()
+        return summary
+    
+    def stat_value(self, stat):
+        # Производные статистики считаются из состояния, остальные — поля как есть
+        data = self.data
+        if stat in ('upgrades', 'ships'):
+            return getattr(data, stat).total()
+        if stat == 'bosses_killed':
+            return len(data.bosses_killed)
+        return getattr(data, stat)
+    
+    def check_achievements(self):
+        # Только статистики, изменившиеся с прошлой проверки, и по каждой — ближайший порог
+        stamp = self.achievement_revision
+        self.achievement_revision = self.revision
+        revisions = self.revisions
+        unlocked = []
+        for stat in self.achievements.stats():
+            if revisions.get(stat, 0) > stamp:
+                unlocked += self.achievements.advance(stat, self.stat_value(stat))
+        if unlocked:
+            self.data.achievements.extend(unlocked)
+            self.mark('achievements')
+            banner = "ACHIEVEMENT: " + ', '.join(self.achievements.definitions[key]['name'] for key in unlocked)
+            # Дописывается к ещё не показанному событию: после catch_up там сводка «Welcome back»
+            self.event_text = f"{self.event_text} | {banner}" if self.event_text else banner
+        return unlocked
@@ -0,0 +1,131 @@
+"""
+STAR EMPIRE — счётчики из атласа глифов
+Символы растеризуются один раз в общую текстуру (Fbo). AtlasLabel рисует строку
+одним Mesh из четырёхугольников: смена текста меняет только вершины
+и текстурные координаты, без раскладки текста и загрузки текстуры.
+"""
+
+from kivy.core.text import Label as CoreLabel
+from kivy.graphics import ClearBuffers, ClearColor, Color, Fbo, Mesh, Rectangle
+from kivy.metrics import sp
+from kivy.properties import ColorProperty, NumericProperty, StringProperty
+from kivy.uix.widget import Widget
+
+
+# Весь печатный ASCII: цифры, суффиксы K/M/B/T, экспонента и подписи вида "[E]", "+5E /sec"
+GLYPHS = ''.join(chr(code) for code in range(32, 127))
+
+# Кегль глифов в атласе; счётчики другого размера масштабируют четырёхугольники
+ATLAS_FONT_SP = 24
+
+ATLAS_WIDTH = 1024
+
+# Зазор между глифами: линейная фильтрация не захватывает соседа
+GLYPH_PADDING = 2
+
+
+class GlyphAtlas:
+    instance = None
+    
+    @classmethod
+    def get(cls):
+        # Один атлас на процесс: строится при первом счётчике (главный экран на старте)
+        if cls.instance is None:
+            cls.instance = cls()
+        return cls.instance
+    
+    def __init__(self, font_size=None):
+        self.font_size = font_size or sp(ATLAS_FONT_SP)
+        self.sources = []
+        for ch in GLYPHS:
+            label = CoreLabel(text=ch, font_size=self.font_size)
+            label.refresh()
+            self.sources.append((ch, label.texture))
+        
+        # Раскладка строками фиксированной ширины
+        self.line_height = max(texture.height for _, texture in self.sources)
+        self.places = {}
+        x = y = 0
+        for ch, texture in self.sources:
+            if x + texture.width > ATLAS_WIDTH:
+                x = 0
+                y += self.line_height + GLYPH_PADDING
+            self.places[ch] = (x, y, texture.width, texture.height)
+            x += texture.width + GLYPH_PADDING
+        width, height = ATLAS_WIDTH, y + self.line_height
+        
+        self.fbo = Fbo(size=(width, height))
+        self.redraw()
+        self.texture = self.fbo.texture
+        # ch -> (ширина, высота в пикселях атласа, u0, v0, u1, v1)
+        self.glyphs = {ch: (w, h, x / width, y / height, (x + w) / width, (y + h) / height)
+                       for ch, (x, y, w, h) in self.places.items()}
+        self.fallback = self.glyphs['?']
+    
+    def redraw(self):
+        # Содержимое Fbo теряется вместе с GL-контекстом (Android после паузы): рисуем заново
+        fbo = self.fbo
+        fbo.clear()
+        with fbo:
+            ClearColor(0, 0, 0, 0)
+            ClearBuffers()
+            Color(1, 1, 1, 1)
+            for ch, texture in self.sources:
+                x, y, w, h = self.places[ch]
+                Rectangle(texture=texture, pos=(x, y), size=(w, h))
+        fbo.draw()
+
+
+class AtlasLabel(Widget):
+    # Замена Label для часто меняющихся чисел: текст центрируется, '\n' — новая строка
+    text = StringProperty('')
+    font_size = NumericProperty(sp(15))
+    color = ColorProperty([1, 1, 1, 1])
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.atlas = GlyphAtlas.get()
+        with self.canvas:
+            self.tint = Color(*self.color)
+            self.mesh = Mesh(mode='triangles', texture=self.atlas.texture)
+        self.bind(pos=self.layout, size=self.layout, text=self.layout, font_size=self.layout)
+        self.bind(color=self.update_color)
+        self.layout()
+    
+    def update_color(self, *args):
+        self.tint.rgba = self.color
+    
+    def layout(self, *args):
+        glyphs = self.atlas.glyphs
+        fallback = self.atlas.fallback
+        scale = self.font_size / self.atlas.font_size
+        line_height = self.atlas.line_height * scale
+        lines = self.text.split('\n')
+        top = self.center_y + line_height * len(lines) / 2
+        
+        vertices = []
+        indices = []
+        for row, line in enumerate(lines):
+            width = sum((glyphs.get(ch) or fallback)[0] for ch in line) * scale
+            x = self.center_x - width / 2
+            y = round(top - line_height * (row + 1))
+            for ch in line:
+                w, h, u0, v0, u1, v1 = glyphs.get(ch) or fallback
+                w *= scale
+                if ch != ' ':
+                    # Целые пиксели: иначе глифы размываются при выборке из атласа
+                    left, right, high = round(x), round(x + w), y + round(h * scale)
+                    i = len(vertices) // 4
+                    vertices += (left, y, u0, v0, right, y, u1, v0, right, high, u1, v1, left, high, u0, v1)
+                    indices += (i, i + 1, i + 2, i + 2, i + 3, i)
+                x += w
+        self.mesh.vertices = vertices
+        self.mesh.indices = indices
+
+
+def attach(button, **kwargs):
+    # Надпись кнопки из атласа: собственный текст кнопки пуст и не растеризуется
+    label = AtlasLabel(pos=button.pos, size=button.size, **kwargs)
+    button.bind(pos=label.setter('pos'), size=label.setter('size'))
+    button.add_widget(label)
+    return label
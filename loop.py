@@ -0,0 +1,121 @@
+"""
+STAR EMPIRE — игровой цикл
+Один цикл вместо отдельных таймеров дохода и перерисовки. Игровое время копится
+и тратится фиксированными шагами auto_collect с явным концом шага, поэтому
+результат не зависит от дрожания dt кадров и одинаков в реплее. Частоту задаёт
+приложение: полная на переднем плане, ноль на паузе; время паузы досчитывается
+при возобновлении одним вычислением (catch_up). Без Kivy.
+"""
+
+import time
+
+
+# Шаг симуляции (игровые секунды): степень двойки — курсор копится без ошибки округления
+SIM_STEP = 0.25
+
+# Частота тиков на переднем плане (в секунду): по шагу на тик, перерисовка после шагов
+FOREGROUND_RATE = 4
+
+# Больше шагов за тик не делается: остаток целыми шагами досчитывается одним вызовом (перерасход)
+MAX_STEPS = 8
+
+# Окно, за которое считаются тики и шаги в секунду (реальные секунды)
+STATS_WINDOW = 5.0
+
+
+class GameLoop:
+    def __init__(self, game, step=SIM_STEP, max_steps=MAX_STEPS, render=None):
+        # render — перерисовка после шагов тика (экран приложения); None — без неё
+        self.game = game
+        self.step = step
+        self.max_steps = max_steps
+        self.render = render
+        # Игра учтена до этого момента по её часам
+        self.time = game.data.last_seen or game.clock()
+        self.rate = 0
+        self.window_start = time.perf_counter()
+        self.window_ticks = 0
+        self.window_steps = 0
+        self.stats = {
+            'rate': 0, 'ticks_per_sec': 0.0, 'steps_per_sec': 0.0,
+            'ticks': 0, 'steps': 0, 'overruns': 0, 'overrun_seconds': 0.0,
+            'tick_ms': 0.0, 'max_tick_ms': 0.0,
+            'pauses': 0, 'settled_seconds': 0.0,
+        }
+    
+    def set_rate(self, rate):
+        # Расписание тиков держит приложение; здесь — для статистики
+        self.rate = self.stats['rate'] = rate
+    
+    def tick(self):
+        start = time.perf_counter()
+        game = self.game
+        step = self.step
+        now = game.clock()
+        t = self.time
+        steps = 0
+        while t + step <= now and steps < self.max_steps:
+            t += step
+            game.auto_collect(step, t)
+            steps += 1
+        behind = now - t
+        if behind >= step:
+            # Тик не успел (долгий кадр, ускоренные часы): отставание — одним вызовом,
+            # auto_collect линеен, бой считается в замкнутой форме
+            bulk = behind - behind % step
+            t += bulk
+            game.auto_collect(bulk, t)
+            self.stats['overruns'] += 1
+            self.stats['overrun_seconds'] += bulk
+        self.time = t
+        if self.render is not None:
+            self.render()
+        self.record(start, steps)
+    
+    def record(self, start, steps):
+        end = time.perf_counter()
+        stats = self.stats
+        ms = (end - start) * 1000
+        stats['ticks'] += 1
+        stats['steps'] += steps
+        stats['tick_ms'] = ms
+        stats['max_tick_ms'] = max(stats['max_tick_ms'], ms)
+        self.window_ticks += 1
+        self.window_steps += steps
+        elapsed = end - self.window_start
+        if elapsed >= STATS_WINDOW:
+            stats['ticks_per_sec'] = self.window_ticks / elapsed
+            stats['steps_per_sec'] = self.window_steps / elapsed
+            self.window_start = end
+            self.window_ticks = self.window_steps = 0
+    
+    def settle(self):
+        # Остаток меньше шага — одним неполным шагом: игра учтена ровно до «сейчас»
+        now = self.game.clock()
+        if now > self.time:
+            self.game.auto_collect(now - self.time, now)
+            self.time = now
+    
+    def pause(self):
+        self.settle()
+        self.stats['pauses'] += 1
+    
+    def resume(self):
+        # Время паузы — одним вычислением оффлайн-начисления (с его лимитом)
+        summary = self.game.catch_up()
+        if summary is not None:
+            self.stats['settled_seconds'] += summary['elapsed']
+        self.time = self.game.data.last_seen
+        return summary
+    
+    def fast_forward(self, seconds):
+        # Перемотка QA: игра сама делает шаги, курсор цикла переезжает в новое «сейчас»
+        self.settle()
+        self.game.fast_forward(seconds)
+        self.time = self.game.data.last_seen
+    
+    def summary(self):
+        s = self.stats
+        return (f"loop {s['ticks_per_sec']:.1f}t/s {s['steps_per_sec']:.1f}st/s "
+                f"tick {s['tick_ms']:.1f}ms max {s['max_tick_ms']:.1f}ms | "
+                f"overruns {s['overruns']} paused {s['pauses']}x settled {s['settled_seconds']:.0f}s")
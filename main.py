@@ -3,15 +3,20 @@ STAR EMPIRE — Космическая Idle-RPG
 Стабильная версия для Android
 """
 
-import json
-import random
-import time
+# Отсчёт фаз запуска начинается до тяжёлых импортов Kivy
+from startup import startup
+
 import os
+import threading
+import time
 
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.floatlayout import FloatLayout
 from kivy.uix.gridlayout import GridLayout
-from kivy.uix.scrollview import ScrollView
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.uix.button import Button
 from kivy.uix.label import Label
 from kivy.uix.progressbar import ProgressBar
@@ -19,233 +24,40 @@ from kivy.uix.screenmanager import ScreenManager, Screen, SlideTransition
 from kivy.uix.popup import Popup
 from kivy.graphics import Color, Rectangle, Ellipse
 from kivy.clock import Clock
-from kivy.animation import Animation
+from kivy.logger import Logger
 from kivy.metrics import dp, sp
-from kivy.utils import platform
-
-
-# ============== КОНФИГУРАЦИЯ ==============
-
-UPGRADES = {
-    'energy_click': {'name': 'Energy Click', 'base_cost': 10, 'cost_mult': 1.5, 'resource': 'energy'},
-    'metal_click': {'name': 'Metal Click', 'base_cost': 25, 'cost_mult': 1.6, 'resource': 'metal'},
-    'crystal_click': {'name': 'Crystal Click', 'base_cost': 100, 'cost_mult': 1.8, 'resource': 'crystal'},
-    'energy_auto': {'name': 'Auto Energy', 'base_cost': 50, 'cost_mult': 1.7, 'resource': 'energy'},
-    'metal_auto': {'name': 'Auto Metal', 'base_cost': 150, 'cost_mult': 1.8, 'resource': 'metal'},
-    'crystal_auto': {'name': 'Auto Crystal', 'base_cost': 500, 'cost_mult': 2.0, 'resource': 'crystal'},
-}
-
-SHIPS = {
-    'scout': {'name': 'Scout', 'cost': {'metal': 100}, 'time': 30,
-              'rewards': {'energy': (50, 150), 'metal': (20, 50)}},
-    'miner': {'name': 'Miner', 'cost': {'metal': 300, 'energy': 100}, 'time': 60,
-              'rewards': {'metal': (100, 300), 'crystal': (5, 20)}},
-    'cruiser': {'name': 'Cruiser', 'cost': {'metal': 1000, 'crystal': 50}, 'time': 120,
-                'rewards': {'energy': (200, 500), 'metal': (150, 400), 'crystal': (20, 50)}},
-}
-
-BOSSES = {
-    'asteroid': {'name': 'Giant Asteroid', 'hp': 100, 'reward': {'metal': 500, 'crystal': 25}, 'cooldown': 60},
-    'pirate': {'name': 'Pirate Fleet', 'hp': 500, 'reward': {'energy': 1000, 'metal': 750}, 'cooldown': 180},
-    'alien': {'name': 'Alien Titan', 'hp': 2000, 'reward': {'crystal': 200, 'prestige_points': 1}, 'cooldown': 600},
-}
-
-
-# ============== ИГРОВОЙ МЕНЕДЖЕР ==============
-
-class GameManager:
-    def __init__(self):
-        self.save_path = self.get_save_path()
-        self.data = self.load_game()
-        self.last_save = time.time()
-        self.event_text = ""
-    
-    def get_save_path(self):
-        if platform == 'android':
-            try:
-                from android.storage import app_storage_path
-                return os.path.join(app_storage_path(), 'save.json')
-            except:
-                pass
-        return os.path.join(os.path.expanduser('~'), '.starempire_save.json')
-    
-    def load_game(self):
-        default = {
-            'energy': 0, 'metal': 0, 'crystal': 0,
-            'upgrades': {}, 'ships': {}, 'expeditions': {},
-            'bosses': {}, 'achievements': [],
-            'prestige_points': 0, 'total_clicks': 0,
-            'play_time': 0, 'last_daily': 0, 'bosses_killed': []
-        }
-        try:
-            if os.path.exists(self.save_path):
-                with open(self.save_path, 'r') as f:
-                    saved = json.load(f)
-                    for key in default:
-                        if key not in saved:
-                            saved[key] = default[key]
-                    return saved
-        except:
-            pass
-        return default
-    
-    def save_game(self):
-        try:
-            with open(self.save_path, 'w') as f:
-                json.dump(self.data, f)
-        except:
-            pass
-    
-    def get_prestige_mult(self):
-        return 1.0 + (self.data.get('prestige_points', 0) * 0.1)
-    
-    def mine(self, resource):
-        mult = self.get_prestige_mult()
-        if resource == 'energy':
-            amount = max(1, self.data['upgrades'].get('energy_click', 0) + 1) * mult
-        elif resource == 'metal':
-            amount = self.data['upgrades'].get('metal_click', 0) * mult
-        elif resource == 'crystal':
-            amount = self.data['upgrades'].get('crystal_click', 0) * mult
-        else:
-            return
-        
-        self.data[resource] = self.data.get(resource, 0) + amount
-        self.data['total_clicks'] = self.data.get('total_clicks', 0) + 1
-        
-        if random.random() < 0.03:
-            bonus = random.choice(['energy', 'metal', 'crystal'])
-            bonus_amount = int(random.randint(10, 50) * mult)
-            self.data[bonus] += bonus_amount
-            self.event_text = f"BONUS! +{bonus_amount} {bonus.upper()}"
-    
-    def buy_upgrade(self, key):
-        if key not in UPGRADES:
-            return False
-        upg = UPGRADES[key]
-        level = self.data['upgrades'].get(key, 0)
-        cost = int(upg['base_cost'] * (upg['cost_mult'] ** level))
-        
-        if self.data[upg['resource']] >= cost:
-            self.data[upg['resource']] -= cost
-            self.data['upgrades'][key] = level + 1
-            return True
-        return False
-    
-    def buy_ship(self, key):
-        if key not in SHIPS:
-            return
-        ship = SHIPS[key]
-        
-        if key in self.data.get('expeditions', {}):
-            exp_time = self.data['expeditions'][key]
-            if time.time() >= exp_time:
-                for res, (min_r, max_r) in ship['rewards'].items():
-                    amount = int(random.randint(min_r, max_r) * self.get_prestige_mult())
-                    self.data[res] = self.data.get(res, 0) + amount
-                del self.data['expeditions'][key]
-                self.event_text = f"{ship['name']} returned!"
-            return
-        
-        ships_owned = self.data.get('ships', {})
-        if ships_owned.get(key, 0) > 0:
-            if 'expeditions' not in self.data:
-                self.data['expeditions'] = {}
-            self.data['expeditions'][key] = time.time() + ship['time']
-            self.event_text = f"{ship['name']} sent!"
-            return
-        
-        can_buy = all(self.data.get(res, 0) >= cost for res, cost in ship['cost'].items())
-        if can_buy:
-            for res, cost in ship['cost'].items():
-                self.data[res] -= cost
-            if 'ships' not in self.data:
-                self.data['ships'] = {}
-            self.data['ships'][key] = self.data['ships'].get(key, 0) + 1
-    
-    def attack_boss(self, key):
-        if key not in BOSSES:
-            return
-        boss = BOSSES[key]
-        
-        if 'bosses' not in self.data:
-            self.data['bosses'] = {}
-        if key not in self.data['bosses']:
-            self.data['bosses'][key] = {'hp': boss['hp'], 'cooldown': 0}
-        
-        bd = self.data['bosses'][key]
-        
-        if time.time() < bd.get('cooldown', 0):
-            return
-        if bd['hp'] <= 0:
-            bd['hp'] = boss['hp']
-            return
-        
-        total_ships = sum(self.data.get('ships', {}).values())
-        base_damage = 1 + self.data['upgrades'].get('energy_click', 0)
-        damage = int((base_damage + total_ships * 5) * self.get_prestige_mult())
-        
-        bd['hp'] = max(0, bd['hp'] - damage)
-        
-        if bd['hp'] <= 0:
-            for res, amount in boss['reward'].items():
-                if res == 'prestige_points':
-                    self.data['prestige_points'] = self.data.get('prestige_points', 0) + amount
-                else:
-                    self.data[res] = self.data.get(res, 0) + amount
-            bd['cooldown'] = time.time() + boss['cooldown']
-            self.event_text = f"BOSS {boss['name']} DEFEATED!"
-    
-    def can_claim_daily(self):
-        last = self.data.get('last_daily', 0)
-        return time.time() - last >= 86400
-    
-    def claim_daily(self):
-        if self.can_claim_daily():
-            mult = self.get_prestige_mult()
-            self.data['energy'] += int(100 * mult)
-            self.data['metal'] += int(50 * mult)
-            self.data['crystal'] += int(10 * mult)
-            self.data['last_daily'] = time.time()
-            self.event_text = "Daily bonus claimed!"
-            return True
-        return False
-    
-    def do_prestige(self):
-        total = self.data['energy'] + self.data['metal'] * 2 + self.data['crystal'] * 5
-        earn = int(total ** 0.5 / 50)
-        
-        if earn > 0 and total >= 10000:
-            self.data['prestige_points'] = self.data.get('prestige_points', 0) + earn
-            self.data['energy'] = 0
-            self.data['metal'] = 0
-            self.data['crystal'] = 0
-            self.data['upgrades'] = {}
-            self.data['ships'] = {}
-            self.data['expeditions'] = {}
-            self.data['bosses'] = {}
-            self.event_text = f"PRESTIGE! +{earn} points!"
-            return True
-        return False
-    
-    def auto_collect(self, dt):
-        mult = self.get_prestige_mult()
-        self.data['energy'] += self.data['upgrades'].get('energy_auto', 0) * mult * dt
-        self.data['metal'] += self.data['upgrades'].get('metal_auto', 0) * mult * dt
-        self.data['crystal'] += self.data['upgrades'].get('crystal_auto', 0) * mult * dt
-        self.data['play_time'] = self.data.get('play_time', 0) + dt
-        
-        if time.time() - self.last_save > 30:
-            self.save_game()
-            self.last_save = time.time()
+
+from advisor import advise_prestige, summarize_buys
+from bignum import format_duration, format_num
+from catalog import load_packs
+from clocks import TIME_SCALE_ENV, make_clock
+from effects import EffectsLayer
+from game import (GameManager, UPGRADES, SHIPS, BOSSES, BUY_AMOUNTS, PRESTIGE_BONUS, PRESTIGE_MIN_TOTAL,
+                  PRESTIGE_WEIGHTS, catalog_version)
+from glyphs import AtlasLabel, GlyphAtlas, attach
+from loop import FOREGROUND_RATE, GameLoop
+from profiler import profiler
+
+
+startup.mark('imports')
 
 
 # ============== БАЗОВЫЙ ЭКРАН ==============
 
+# Счётчики обновлений виджетов и экранов (для отладки производительности)
+refresh_stats = {'widgets_set': 0, 'widgets_skipped': 0, 'screens_updated': 0, 'screens_skipped': 0}
+
+
 class BaseScreen(Screen):
+    # Ключи game.data, от которых зависит содержимое экрана
+    watch = ()
+    
     def __init__(self, game, **kwargs):
         super().__init__(**kwargs)
         self.game = game
+        self.seen_revision = -1
+        self.seen_volatile = None
+        self.shown = {}
         
         with self.canvas.before:
             Color(0.05, 0.05, 0.12, 1)
@@ -255,13 +67,58 @@ class BaseScreen(Screen):
     def update_bg(self, *args):
         self.bg.pos = self.pos
         self.bg.size = self.size
+    
+    def on_pre_enter(self, *args):
+        self.refresh(force=True)
+    
+    def volatile_key(self):
+        # Значение, меняющееся без записи в data (таймеры, event_text)
+        return None
+    
+    def refresh(self, force=False):
+        volatile = self.volatile_key()
+        if (not force and volatile == self.seen_volatile
+                and not self.game.changed_since(self.seen_revision, self.watch)):
+            refresh_stats['screens_skipped'] += 1
+            return
+        self.seen_revision = self.game.revision
+        self.seen_volatile = volatile
+        refresh_stats['screens_updated'] += 1
+        self.update()
+    
+    def set(self, widget, prop, value):
+        # Свойство виджета меняется только если отображаемое значение другое
+        key = (widget, prop)
+        if self.shown.get(key) == value:
+            refresh_stats['widgets_skipped'] += 1
+            return
+        self.shown[key] = value
+        setattr(widget, prop, value)
+        refresh_stats['widgets_set'] += 1
+
+
+def catalog_view(screen, viewclass, row_height):
+    # Виртуальный список: виджеты создаются под видимую область и переиспользуются
+    rv = RecycleView(do_scroll_x=False)
+    rv.screen = screen
+    rv.viewclass = viewclass
+    rows = RecycleBoxLayout(orientation='vertical', spacing=dp(8), padding=dp(5),
+                            default_size=(None, row_height), default_size_hint=(1, None),
+                            size_hint_y=None)
+    rows.bind(minimum_height=rows.setter('height'))
+    rv.add_widget(rows)
+    return rv
 
 
 # ============== ГЛАВНЫЙ ЭКРАН ==============
 
 class MainScreen(BaseScreen):
+    watch = ('energy', 'metal', 'crystal', 'upgrades', 'prestige_points', 'last_daily')
+    
     def __init__(self, game, **kwargs):
         super().__init__(game, **kwargs)
+        self.pending_taps = {}
+        self.flush_trigger = Clock.create_trigger(self.flush_taps)
         
         layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(8))
         
@@ -274,8 +131,9 @@ class MainScreen(BaseScreen):
             color=(0.9, 0.8, 1, 1)
         ))
         
+        # Счётчики, которые меняются каждый тик, — из атласа глифов, без растеризации текста
         # Престиж
-        self.prestige_lbl = Label(
+        self.prestige_lbl = AtlasLabel(
             text='Prestige: x1.0',
             font_size=sp(14),
             size_hint=(1, 0.04),
@@ -286,9 +144,9 @@ class MainScreen(BaseScreen):
         # Ресурсы
         res_box = BoxLayout(size_hint=(1, 0.12), spacing=dp(5))
         
-        self.energy_lbl = Label(text='[E] 0', font_size=sp(18), color=(0.3, 0.8, 1, 1))
-        self.metal_lbl = Label(text='[M] 0', font_size=sp(18), color=(0.7, 0.7, 0.7, 1))
-        self.crystal_lbl = Label(text='[C] 0', font_size=sp(18), color=(0.9, 0.4, 1, 1))
+        self.energy_lbl = AtlasLabel(text='[E] 0', font_size=sp(18), color=(0.3, 0.8, 1, 1))
+        self.metal_lbl = AtlasLabel(text='[M] 0', font_size=sp(18), color=(0.7, 0.7, 0.7, 1))
+        self.crystal_lbl = AtlasLabel(text='[C] 0', font_size=sp(18), color=(0.9, 0.4, 1, 1))
         
         res_box.add_widget(self.energy_lbl)
         res_box.add_widget(self.metal_lbl)
@@ -296,7 +154,7 @@ class MainScreen(BaseScreen):
         layout.add_widget(res_box)
         
         # Авто-доход
-        self.auto_lbl = Label(
+        self.auto_lbl = AtlasLabel(
             text='Auto: +0/s',
             font_size=sp(12),
             size_hint=(1, 0.03),
@@ -308,28 +166,25 @@ class MainScreen(BaseScreen):
         mine_grid = GridLayout(cols=3, size_hint=(1, 0.25), spacing=dp(8))
         
         self.energy_btn = Button(
-            text='ENERGY\n+1',
-            font_size=sp(16),
             background_color=(0.1, 0.3, 0.6, 1),
             background_normal=''
         )
         self.energy_btn.bind(on_release=lambda x: self.do_mine('energy'))
+        self.energy_btn_lbl = attach(self.energy_btn, text='ENERGY\n+1', font_size=sp(16))
         
         self.metal_btn = Button(
-            text='METAL\n+0',
-            font_size=sp(16),
             background_color=(0.3, 0.3, 0.35, 1),
             background_normal=''
         )
         self.metal_btn.bind(on_release=lambda x: self.do_mine('metal'))
+        self.metal_btn_lbl = attach(self.metal_btn, text='METAL\n+0', font_size=sp(16))
         
         self.crystal_btn = Button(
-            text='CRYSTAL\n+0',
-            font_size=sp(16),
             background_color=(0.4, 0.1, 0.5, 1),
             background_normal=''
         )
         self.crystal_btn.bind(on_release=lambda x: self.do_mine('crystal'))
+        self.crystal_btn_lbl = attach(self.crystal_btn, text='CRYSTAL\n+0', font_size=sp(16))
         
         mine_grid.add_widget(self.energy_btn)
         mine_grid.add_widget(self.metal_btn)
@@ -385,58 +240,88 @@ class MainScreen(BaseScreen):
         self.manager.current = name
     
     def do_mine(self, resource):
-        self.game.mine(resource)
-        self.update()
+        # Нажатия копятся до конца кадра и применяются одной пачкой
+        self.pending_taps[resource] = self.pending_taps.get(resource, 0) + 1
+        self.flush_trigger()
+    
+    def flush_taps(self, dt=0):
+        taps, self.pending_taps = self.pending_taps, {}
+        for resource, n in taps.items():
+            self.game.mine(resource, n)
+        self.refresh()
+    
+    def volatile_key(self):
+        if self.game.can_claim_daily():
+            daily = -1
+        else:
+            daily = int((self.game.clock() - self.game.data.last_daily) // 60)
+        return daily, self.game.event_text
     
     def format_num(self, n):
-        n = int(n)
-        if n >= 1000000:
-            return f"{n/1000000:.1f}M"
-        if n >= 1000:
-            return f"{n/1000:.1f}K"
-        return str(n)
+        return format_num(n)
     
     def update(self, dt=0):
         d = self.game.data
         mult = self.game.get_prestige_mult()
         
-        self.energy_lbl.text = f"[E] {self.format_num(d['energy'])}"
-        self.metal_lbl.text = f"[M] {self.format_num(d['metal'])}"
-        self.crystal_lbl.text = f"[C] {self.format_num(d['crystal'])}"
+        self.set(self.energy_lbl, 'text', f"[E] {self.format_num(d.energy)}")
+        self.set(self.metal_lbl, 'text', f"[M] {self.format_num(d.metal)}")
+        self.set(self.crystal_lbl, 'text', f"[C] {self.format_num(d.crystal)}")
         
-        e_click = max(1, d['upgrades'].get('energy_click', 0) + 1) * mult
-        m_click = d['upgrades'].get('metal_click', 0) * mult
-        c_click = d['upgrades'].get('crystal_click', 0) * mult
+        effects = self.game.upgrade_effects()
+        e_click = effects['click']['energy'] * mult
+        m_click = effects['click']['metal'] * mult
+        c_click = effects['click']['crystal'] * mult
         
-        self.energy_btn.text = f"ENERGY\n+{int(e_click)}"
-        self.metal_btn.text = f"METAL\n+{int(m_click)}"
-        self.crystal_btn.text = f"CRYSTAL\n+{int(c_click)}"
+        self.set(self.energy_btn_lbl, 'text', f"ENERGY\n+{int(e_click)}")
+        self.set(self.metal_btn_lbl, 'text', f"METAL\n+{int(m_click)}")
+        self.set(self.crystal_btn_lbl, 'text', f"CRYSTAL\n+{int(c_click)}")
         
-        e_auto = d['upgrades'].get('energy_auto', 0) * mult
-        m_auto = d['upgrades'].get('metal_auto', 0) * mult
-        c_auto = d['upgrades'].get('crystal_auto', 0) * mult
-        self.auto_lbl.text = f"Auto: +{int(e_auto)}E +{int(m_auto)}M +{int(c_auto)}C /sec"
+        e_auto = effects['auto']['energy'] * mult
+        m_auto = effects['auto']['metal'] * mult
+        c_auto = effects['auto']['crystal'] * mult
+        self.set(self.auto_lbl, 'text', f"Auto: +{int(e_auto)}E +{int(m_auto)}M +{int(c_auto)}C /sec")
         
-        self.prestige_lbl.text = f"Prestige: x{mult:.1f} | Points: {d.get('prestige_points', 0)}"
+        self.set(self.prestige_lbl, 'text', f"Prestige: x{mult:.1f} | Points: {d.prestige_points}")
         
         if self.game.can_claim_daily():
-            self.daily_btn.text = "DAILY BONUS READY!"
-            self.daily_btn.background_color = (0.2, 0.6, 0.2, 1)
+            self.set(self.daily_btn, 'text', "DAILY BONUS READY!")
+            self.set(self.daily_btn, 'background_color', (0.2, 0.6, 0.2, 1))
         else:
-            remaining = 86400 - (time.time() - d.get('last_daily', 0))
+            remaining = 86400 - (self.game.clock() - d.last_daily)
             h = int(remaining // 3600)
             m = int((remaining % 3600) // 60)
-            self.daily_btn.text = f"Daily in: {h}h {m}m"
-            self.daily_btn.background_color = (0.3, 0.3, 0.3, 1)
+            self.set(self.daily_btn, 'text', f"Daily in: {h}h {m}m")
+            self.set(self.daily_btn, 'background_color', (0.3, 0.3, 0.3, 1))
         
         if self.game.event_text:
-            self.event_lbl.text = self.game.event_text
+            self.set(self.event_lbl, 'text', self.game.event_text)
             self.game.event_text = ""
 
 
 # ============== ЭКРАН УЛУЧШЕНИЙ ==============
 
+class UpgradeRow(RecycleDataViewBehavior, Button):
+    # Переиспользуемая строка списка: виджеты есть только у видимых улучшений
+    key = None
+    
+    def __init__(self, **kwargs):
+        super().__init__(font_size=sp(14), background_color=(0.15, 0.2, 0.25, 1),
+                         background_normal='', **kwargs)
+        self.screen = None
+    
+    def refresh_view_attrs(self, rv, index, data):
+        super().refresh_view_attrs(rv, index, data)
+        self.screen = rv.screen
+        self.screen.update_row(self)
+    
+    def on_release(self):
+        self.screen.buy(self.key)
+
+
 class UpgradesScreen(BaseScreen):
+    watch = ('energy', 'metal', 'crystal', 'upgrades')
+    
     def __init__(self, game, **kwargs):
         super().__init__(game, **kwargs)
         
@@ -449,26 +334,29 @@ class UpgradesScreen(BaseScreen):
             color=(0.5, 1, 0.5, 1)
         ))
         
-        scroll = ScrollView(size_hint=(1, 0.8))
-        self.grid = GridLayout(cols=1, spacing=dp(8), size_hint_y=None, padding=dp(5))
-        self.grid.bind(minimum_height=self.grid.setter('height'))
-        
-        self.buttons = {}
-        for key in UPGRADES:
+        # Количество уровней за одно нажатие
+        self.buy_amount = 1
+        amount_row = GridLayout(cols=len(BUY_AMOUNTS), size_hint=(1, 0.06), spacing=dp(3))
+        self.amount_buttons = {}
+        for amount in BUY_AMOUNTS:
             btn = Button(
-                text='',
-                font_size=sp(14),
-                size_hint_y=None,
-                height=dp(60),
-                background_color=(0.15, 0.2, 0.25, 1),
+                text='MAX' if amount == 'max' else f'x{amount}',
+                font_size=sp(12),
+                background_color=(0.2, 0.2, 0.3, 1),
                 background_normal=''
             )
-            btn.bind(on_release=lambda x, k=key: self.buy(k))
-            self.buttons[key] = btn
-            self.grid.add_widget(btn)
-        
-        scroll.add_widget(self.grid)
-        layout.add_widget(scroll)
+            btn.bind(on_release=lambda x, a=amount: self.set_amount(a))
+            self.amount_buttons[amount] = btn
+            amount_row.add_widget(btn)
+        layout.add_widget(amount_row)
+        
+        self.rv = catalog_view(self, UpgradeRow, dp(72))
+        self.rv.size_hint = (1, 0.74)
+        layout.add_widget(self.rv)
+        self.order = ()
+        self.order_version = -1
+        self.soonest = None
+        self.now = self.game.clock()
         
         back = Button(
             text='< BACK',
@@ -483,31 +371,113 @@ class UpgradesScreen(BaseScreen):
         self.add_widget(layout)
     
     def buy(self, key):
-        self.game.buy_upgrade(key)
-        self.update()
+        self.game.buy_upgrade(key, self.buy_amount)
+        self.refresh()
+    
+    def set_amount(self, amount):
+        self.buy_amount = amount
+        self.refresh(force=True)
+    
+    def volatile_key(self):
+        # Тикаем раз в секунду, пока хоть одно улучшение ждёт накопления
+        now = self.game.clock()
+        if self.game.next_affordable(now) is not None:
+            return int(now)
+        return None
     
     def go_back(self):
         self.manager.transition = SlideTransition(direction='right')
         self.manager.current = 'main'
     
     def update(self, dt=0):
+        self.now = now = self.game.clock()
+        for amount, btn in self.amount_buttons.items():
+            self.set(btn, 'background_color', (0.3, 0.4, 0.6, 1) if amount == self.buy_amount else (0.2, 0.2, 0.3, 1))
+        
+        # Порядок — по прогнозу доступности; данные списка меняются только при пересборке индекса
+        index = self.game.affordability_index(now)
+        if self.game.afford_version != self.order_version:
+            self.order_version = self.game.afford_version
+            order = tuple(key for at, key in index)
+            if order != self.order:
+                self.order = order
+                self.rv.data = [{'key': key} for key in order]
+        soonest = self.game.next_affordable(now)
+        self.soonest = soonest[1] if soonest else None
+        
+        # Обновляются только строки на экране; остальные — при прокрутке
+        for row in self.rv.layout_manager.children:
+            self.update_row(row)
+    
+    def update_row(self, row):
+        key = row.key
+        upg = UPGRADES.get(key)
+        if upg is None:
+            return
         d = self.game.data
-        for key, upg in UPGRADES.items():
-            level = d['upgrades'].get(key, 0)
-            cost = int(upg['base_cost'] * (upg['cost_mult'] ** level))
-            res = upg['resource'][0].upper()
-            current = d[upg['resource']]
-            
-            can = current >= cost
-            color = (0.2, 0.4, 0.2, 1) if can else (0.2, 0.2, 0.25, 1)
-            
-            self.buttons[key].text = f"{upg['name']}\nLevel: {level} | Cost: {cost} {res}"
-            self.buttons[key].background_color = color
+        level = d.upgrades.get(key, 0)
+        count, cost, new_level = self.game.upgrade_preview(key, self.buy_amount)
+        res = upg['resource'][0].upper()
+        
+        if getattr(d, upg['resource']) >= cost:
+            color = (0.2, 0.4, 0.2, 1)
+        elif key == self.soonest:
+            color = (0.35, 0.3, 0.1, 1)
+        else:
+            color = (0.2, 0.2, 0.25, 1)
+        
+        text = f"{upg['name']}\nLevel: {level} -> {new_level} (x{count}) | Cost: {format_num(cost)} {res}"
+        eta = self.game.time_to_afford(key, self.now)
+        if eta:
+            text += f"\nNext level affordable in {format_duration(eta)}"
+        self.set(row, 'text', text)
+        self.set(row, 'background_color', color)
 
 
 # ============== ЭКРАН КОРАБЛЕЙ ==============
 
+class ShipRow(RecycleDataViewBehavior, BoxLayout):
+    key = None
+    
+    def __init__(self, **kwargs):
+        super().__init__(orientation='vertical', **kwargs)
+        self.screen = None
+        row = BoxLayout(size_hint=(1, 0.7), spacing=dp(5))
+        
+        self.btn = Button(
+            text='',
+            font_size=sp(13),
+            background_color=(0.15, 0.2, 0.3, 1),
+            background_normal='',
+            size_hint=(0.6, 1)
+        )
+        self.btn.bind(on_release=lambda x: self.screen.handle_ship(self.key))
+        
+        self.send = Button(
+            text='SEND',
+            font_size=sp(13),
+            background_color=(0.15, 0.15, 0.2, 1),
+            background_normal='',
+            size_hint=(0.4, 1)
+        )
+        self.send.bind(on_release=lambda x: self.screen.send(self.key))
+        
+        self.status = Label(text='', font_size=sp(11), size_hint=(1, 0.3), color=(0.7, 1, 0.7, 1))
+        
+        row.add_widget(self.btn)
+        row.add_widget(self.send)
+        self.add_widget(row)
+        self.add_widget(self.status)
+    
+    def refresh_view_attrs(self, rv, index, data):
+        super().refresh_view_attrs(rv, index, data)
+        self.screen = rv.screen
+        self.screen.update_row(self)
+
+
 class ShipsScreen(BaseScreen):
+    watch = ('energy', 'metal', 'crystal', 'ships', 'expeditions')
+    
     def __init__(self, game, **kwargs):
         super().__init__(game, **kwargs)
         
@@ -527,33 +497,24 @@ class ShipsScreen(BaseScreen):
         )
         layout.add_widget(self.fleet_lbl)
         
-        scroll = ScrollView(size_hint=(1, 0.75))
-        self.grid = GridLayout(cols=1, spacing=dp(8), size_hint_y=None, padding=dp(5))
-        self.grid.bind(minimum_height=self.grid.setter('height'))
-        
-        self.ship_widgets = {}
-        for key, ship in SHIPS.items():
-            box = BoxLayout(orientation='vertical', size_hint_y=None, height=dp(80))
-            
-            btn = Button(
-                text='',
-                font_size=sp(13),
-                background_color=(0.15, 0.2, 0.3, 1),
-                background_normal='',
-                size_hint=(1, 0.7)
-            )
-            btn.bind(on_release=lambda x, k=key: self.handle_ship(k))
-            
-            status = Label(text='', font_size=sp(11), size_hint=(1, 0.3), color=(0.7, 1, 0.7, 1))
-            
-            box.add_widget(btn)
-            box.add_widget(status)
-            self.grid.add_widget(box)
-            
-            self.ship_widgets[key] = {'btn': btn, 'status': status}
-        
-        scroll.add_widget(self.grid)
-        layout.add_widget(scroll)
+        self.collect_btn = Button(
+            text='COLLECT ALL',
+            font_size=sp(14),
+            size_hint=(1, 0.06),
+            background_color=(0.2, 0.2, 0.25, 1),
+            background_normal=''
+        )
+        self.collect_btn.bind(on_release=lambda x: self.collect_all())
+        layout.add_widget(self.collect_btn)
+        
+        self.rv = catalog_view(self, ShipRow, dp(80))
+        self.rv.size_hint = (1, 0.69)
+        layout.add_widget(self.rv)
+        self.catalog_version = -1
+        self.now = self.game.clock()
+        self.away = {}
+        self.ready = {}
+        self.next_return = {}
         
         back = Button(
             text='< BACK',
@@ -569,7 +530,20 @@ class ShipsScreen(BaseScreen):
     
     def handle_ship(self, key):
         self.game.buy_ship(key)
-        self.update()
+        self.refresh()
+    
+    def send(self, key):
+        self.game.send_expedition(key)
+        self.refresh()
+    
+    def collect_all(self):
+        self.game.collect_returned()
+        self.refresh()
+    
+    def volatile_key(self):
+        if self.game.data.expeditions:
+            return int(self.game.clock())
+        return None
     
     def go_back(self):
         self.manager.transition = SlideTransition(direction='right')
@@ -577,39 +551,75 @@ class ShipsScreen(BaseScreen):
     
     def update(self, dt=0):
         d = self.game.data
-        ships = d.get('ships', {})
-        exps = d.get('expeditions', {})
+        self.now = now = self.game.clock()
+        
+        # Один проход по группам экспедиций: в пути, вернулись, ближайший возврат
+        away = {}
+        ready = {}
+        next_return = {}
+        for exp in d.expeditions:
+            key = exp['ship']
+            if exp['return'] <= now:
+                ready[key] = ready.get(key, 0) + exp['count']
+            else:
+                away[key] = away.get(key, 0) + exp['count']
+                next_return[key] = min(next_return.get(key, exp['return']), exp['return'])
+        self.away, self.ready, self.next_return = away, ready, next_return
+        
+        self.set(self.fleet_lbl, 'text', f"Ships owned: {d.ships.total()}")
+        total_ready = sum(ready.values())
+        if total_ready:
+            self.set(self.collect_btn, 'text', f"COLLECT ALL ({total_ready} ships)")
+            self.set(self.collect_btn, 'background_color', (0.2, 0.5, 0.2, 1))
+        else:
+            self.set(self.collect_btn, 'text', "COLLECT ALL")
+            self.set(self.collect_btn, 'background_color', (0.2, 0.2, 0.25, 1))
         
-        self.fleet_lbl.text = f"Ships owned: {sum(ships.values())}"
+        # Список строк пересобирается только после загрузки паков
+        version = catalog_version()
+        if version != self.catalog_version:
+            self.catalog_version = version
+            self.rv.data = [{'key': key} for key in SHIPS]
         
-        for key, ship in SHIPS.items():
-            owned = ships.get(key, 0)
-            w = self.ship_widgets[key]
-            
-            cost_str = ', '.join([f"{v}{k[0].upper()}" for k, v in ship['cost'].items()])
-            can = all(d.get(r, 0) >= c for r, c in ship['cost'].items())
-            
-            w['btn'].text = f"{ship['name']} (x{owned})\nCost: {cost_str}"
-            w['btn'].background_color = (0.2, 0.35, 0.2, 1) if can or owned > 0 else (0.15, 0.15, 0.2, 1)
-            
-            if key in exps:
-                remaining = max(0, int(exps[key] - time.time()))
-                if remaining > 0:
-                    w['status'].text = f"In expedition: {remaining}s"
-                    w['status'].color = (1, 1, 0.5, 1)
-                else:
-                    w['status'].text = "READY! Tap to collect"
-                    w['status'].color = (0.5, 1, 0.5, 1)
-            elif owned > 0:
-                w['status'].text = "Tap to send expedition"
-                w['status'].color = (0.6, 0.8, 1, 1)
-            else:
-                w['status'].text = ""
+        for row in self.rv.layout_manager.children:
+            self.update_row(row)
+    
+    def update_row(self, row):
+        key = row.key
+        ship = SHIPS.get(key)
+        if ship is None:
+            return
+        d = self.game.data
+        owned = d.ships.get(key, 0)
+        idle = owned - self.away.get(key, 0) - self.ready.get(key, 0)
+        
+        cost_str = ', '.join([f"{v}{k[0].upper()}" for k, v in ship['cost'].items()])
+        can = all(getattr(d, r) >= c for r, c in ship['cost'].items())
+        
+        self.set(row.btn, 'text', f"BUY {ship['name']} (x{owned})\nCost: {cost_str}")
+        self.set(row.btn, 'background_color', (0.2, 0.35, 0.2, 1) if can else (0.15, 0.15, 0.2, 1))
+        self.set(row.send, 'text', f"SEND\n{idle} idle")
+        self.set(row.send, 'background_color', (0.2, 0.3, 0.45, 1) if idle > 0 else (0.15, 0.15, 0.2, 1))
+        
+        if key in self.ready:
+            self.set(row.status, 'text', f"{self.ready[key]} READY! Tap COLLECT ALL")
+            self.set(row.status, 'color', (0.5, 1, 0.5, 1))
+        elif key in self.away:
+            remaining = max(0, int(self.next_return[key] - self.now))
+            self.set(row.status, 'text', f"In expedition: {self.away[key]} ships, next in {remaining}s")
+            self.set(row.status, 'color', (1, 1, 0.5, 1))
+        elif owned > 0:
+            self.set(row.status, 'text', "Tap SEND to launch an expedition")
+            self.set(row.status, 'color', (0.6, 0.8, 1, 1))
+        else:
+            self.set(row.status, 'text', "")
 
 
 # ============== ЭКРАН БОССОВ ==============
 
 class BossScreen(BaseScreen):
+    watch = ('bosses', 'target_boss', 'ships', 'prestige_points')
+    
     def __init__(self, game, **kwargs):
         super().__init__(game, **kwargs)
         
@@ -622,6 +632,14 @@ class BossScreen(BaseScreen):
             color=(1, 0.5, 0.5, 1)
         ))
         
+        self.fleet_lbl = Label(
+            text='Fleet DPS: 0',
+            font_size=sp(13),
+            size_hint=(1, 0.05),
+            color=(0.6, 0.8, 1, 1)
+        )
+        layout.add_widget(self.fleet_lbl)
+        
         self.boss_widgets = {}
         for key, boss in BOSSES.items():
             box = BoxLayout(orientation='vertical', size_hint=(1, 0.25), padding=dp(3))
@@ -630,22 +648,34 @@ class BossScreen(BaseScreen):
             hp_bar = ProgressBar(max=boss['hp'], value=boss['hp'], size_hint=(1, 0.2))
             hp_lbl = Label(text=f"HP: {boss['hp']}/{boss['hp']}", font_size=sp(12), size_hint=(1, 0.2))
             
+            row = BoxLayout(size_hint=(1, 0.35), spacing=dp(5))
             atk_btn = Button(
                 text='ATTACK',
                 font_size=sp(14),
-                size_hint=(1, 0.35),
+                size_hint=(0.65, 1),
                 background_color=(0.5, 0.2, 0.2, 1),
                 background_normal=''
             )
             atk_btn.bind(on_release=lambda x, k=key: self.attack(k))
             
+            target_btn = Button(
+                text='TARGET',
+                font_size=sp(12),
+                size_hint=(0.35, 1),
+                background_color=(0.2, 0.2, 0.3, 1),
+                background_normal=''
+            )
+            target_btn.bind(on_release=lambda x, k=key: self.toggle_target(k))
+            row.add_widget(atk_btn)
+            row.add_widget(target_btn)
+            
             box.add_widget(name)
             box.add_widget(hp_bar)
             box.add_widget(hp_lbl)
-            box.add_widget(atk_btn)
+            box.add_widget(row)
             layout.add_widget(box)
             
-            self.boss_widgets[key] = {'hp_bar': hp_bar, 'hp_lbl': hp_lbl, 'btn': atk_btn}
+            self.boss_widgets[key] = {'hp_bar': hp_bar, 'hp_lbl': hp_lbl, 'btn': atk_btn, 'target': target_btn}
         
         back = Button(
             text='< BACK',
@@ -661,7 +691,18 @@ class BossScreen(BaseScreen):
     
     def attack(self, key):
         self.game.attack_boss(key)
-        self.update()
+        self.refresh()
+    
+    def toggle_target(self, key):
+        self.game.set_target(None if self.game.data.target_boss == key else key)
+        self.refresh()
+    
+    def volatile_key(self):
+        now = self.game.clock()
+        d = self.game.data
+        if d.target_boss or any(bd.get('cooldown', 0) > now for bd in d.bosses.values()):
+            return int(now)
+        return None
     
     def go_back(self):
         self.manager.transition = SlideTransition(direction='right')
@@ -669,35 +710,56 @@ class BossScreen(BaseScreen):
     
     def update(self, dt=0):
         d = self.game.data
-        boss_data = d.get('bosses', {})
+        boss_data = d.bosses
+        target = d.target_boss
+        now = self.game.clock()
+        
+        dps = self.game.fleet_dps()
+        self.set(self.fleet_lbl, 'text', f"Fleet DPS: {dps:.1f}" + ("" if target else " | tap TARGET to auto-attack"))
         
         for key, boss in BOSSES.items():
             w = self.boss_widgets[key]
             bd = boss_data.get(key, {'hp': boss['hp'], 'cooldown': 0})
             
-            hp = bd.get('hp', boss['hp'])
+            hp = int(bd.get('hp', boss['hp']))
             cd = bd.get('cooldown', 0)
-            remaining = max(0, int(cd - time.time()))
+            remaining = max(0, int(cd - now))
             
-            w['hp_bar'].value = hp
-            w['hp_lbl'].text = f"HP: {hp}/{boss['hp']}"
+            hp_text = f"HP: {hp}/{boss['hp']}"
+            if key == target:
+                ttk = self.game.time_to_kill(key, now)
+                if ttk is not None:
+                    hp_text += f" | Kill in {int(ttk)}s"
+            self.set(w['hp_bar'], 'value', hp)
+            self.set(w['hp_lbl'], 'text', hp_text)
+            self.set(w['target'], 'text', "TARGETED" if key == target else "TARGET")
+            self.set(w['target'], 'background_color', (0.2, 0.4, 0.6, 1) if key == target else (0.2, 0.2, 0.3, 1))
             
             if remaining > 0:
-                w['btn'].text = f"Respawn: {remaining}s"
-                w['btn'].background_color = (0.3, 0.3, 0.3, 1)
+                self.set(w['btn'], 'text', f"Respawn: {remaining}s")
+                self.set(w['btn'], 'background_color', (0.3, 0.3, 0.3, 1))
             elif hp <= 0:
-                w['btn'].text = "Respawning..."
-                w['btn'].background_color = (0.3, 0.3, 0.3, 1)
+                self.set(w['btn'], 'text', "Respawning...")
+                self.set(w['btn'], 'background_color', (0.3, 0.3, 0.3, 1))
             else:
-                w['btn'].text = "ATTACK"
-                w['btn'].background_color = (0.6, 0.2, 0.2, 1)
+                self.set(w['btn'], 'text', "ATTACK")
+                self.set(w['btn'], 'background_color', (0.6, 0.2, 0.2, 1))
 
 
 # ============== ЭКРАН ПРЕСТИЖА ==============
 
+# Совет пересчитывается сразу после покупок/престижа, а от автодохода — не чаще раза в N секунд
+ADVICE_REFRESH = 5.0
+
+
 class PrestigeScreen(BaseScreen):
+    watch = ('energy', 'metal', 'crystal', 'prestige_points', 'upgrades', 'ships')
+    
     def __init__(self, game, **kwargs):
         super().__init__(game, **kwargs)
+        self.advice = None
+        self.advice_stamp = None
+        self.advice_at = 0
         
         layout = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(10))
         
@@ -709,7 +771,7 @@ class PrestigeScreen(BaseScreen):
         ))
         
         layout.add_widget(Label(
-            text='Reset progress for\npermanent bonuses!\n\nEach point = +10% production',
+            text=f'Reset progress for\npermanent bonuses!\n\nEach point = +{PRESTIGE_BONUS:.0%} production',
             font_size=sp(14),
             size_hint=(1, 0.2),
             halign='center'
@@ -731,6 +793,15 @@ class PrestigeScreen(BaseScreen):
         )
         layout.add_widget(self.earn_lbl)
         
+        self.advice_lbl = Label(
+            text='',
+            font_size=sp(12),
+            size_hint=(1, 0.14),
+            halign='center',
+            color=(0.7, 0.85, 1, 1)
+        )
+        layout.add_widget(self.advice_lbl)
+        
         self.prestige_btn = Button(
             text='PRESTIGE',
             font_size=sp(24),
@@ -743,7 +814,7 @@ class PrestigeScreen(BaseScreen):
         layout.add_widget(self.prestige_btn)
         
         self.req_lbl = Label(
-            text='Need: 10000 total resources',
+            text=self.requirement(),
             font_size=sp(12),
             size_hint=(1, 0.08),
             color=(0.6, 0.6, 0.6, 1)
@@ -762,6 +833,14 @@ class PrestigeScreen(BaseScreen):
         
         self.add_widget(layout)
     
+    def requirement(self, total=None):
+        # "Need: 10.0K (E x1 + M x2 + C x5)" — порог и веса из game.py
+        weights = ' + '.join(f"{res[0].upper()} x{w}" for res, w in PRESTIGE_WEIGHTS.items())
+        text = f"Need: {format_num(PRESTIGE_MIN_TOTAL)} ({weights})"
+        if total is not None:
+            text += f"\nhave: {format_num(total)}"
+        return text
+    
     def do_prestige(self):
         if self.game.do_prestige():
             self.go_back()
@@ -772,61 +851,353 @@ class PrestigeScreen(BaseScreen):
     
     def update(self, dt=0):
         d = self.game.data
-        points = d.get('prestige_points', 0)
+        points = d.prestige_points
         mult = self.game.get_prestige_mult()
         
-        total = d['energy'] + d['metal'] * 2 + d['crystal'] * 5
-        earn = int(total ** 0.5 / 50)
-        total_res = d['energy'] + d['metal'] + d['crystal']
+        # Взвешенная сумма и порог — те же, что проверяет do_prestige
+        total, earn = self.game.prestige_earn()
         
-        self.current_lbl.text = f"Current points: {points}\nMultiplier: x{mult:.1f}"
-        self.earn_lbl.text = f"You will earn: {earn} points"
+        self.set(self.current_lbl, 'text', f"Current points: {points}\nMultiplier: x{mult:.1f}")
+        self.set(self.earn_lbl, 'text', f"You will earn: {earn} points")
         
-        if total_res >= 10000 and earn > 0:
-            self.prestige_btn.background_color = (0.6, 0.5, 0.1, 1)
-            self.req_lbl.text = "Ready to prestige!"
-            self.req_lbl.color = (0.5, 1, 0.5, 1)
+        if total >= PRESTIGE_MIN_TOTAL and earn > 0:
+            self.set(self.prestige_btn, 'background_color', (0.6, 0.5, 0.1, 1))
+            self.set(self.req_lbl, 'text', "Ready to prestige!")
+            self.set(self.req_lbl, 'color', (0.5, 1, 0.5, 1))
         else:
-            self.prestige_btn.background_color = (0.3, 0.3, 0.3, 1)
-            self.req_lbl.text = f"Need: 10000 resources (have: {int(total_res)})"
-            self.req_lbl.color = (0.6, 0.6, 0.6, 1)
+            self.set(self.prestige_btn, 'background_color', (0.3, 0.3, 0.3, 1))
+            self.set(self.req_lbl, 'text', self.requirement(total))
+            self.set(self.req_lbl, 'color', (0.6, 0.6, 0.6, 1))
+        
+        self.set(self.advice_lbl, 'text', self.advice_text())
+    
+    def advice_text(self):
+        game = self.game
+        stamp = (game.revisions.get('upgrades', 0), game.revisions.get('ships', 0),
+                 game.revisions.get('prestige_points', 0), game.balance_revision)
+        # Пауза пересчёта — по реальному времени: это бюджет CPU, а не игровое время
+        now = time.time()
+        if stamp != self.advice_stamp or now - self.advice_at >= ADVICE_REFRESH:
+            self.advice = advise_prestige(game)
+            self.advice_stamp = stamp
+            self.advice_at = now
+        advice = self.advice
+        if advice is None:
+            return "Advisor: numbers too large to estimate"
+        lines = []
+        if advice['points'] > advice['points_now'] and advice['wait'] > 0:
+            lines.append(f"Best: {advice['points']} pts in {format_duration(advice['wait'])} "
+                         f"({advice['rate']:.1f}/h vs {advice['rate_now']:.1f}/h now)")
+            if advice['buys']:
+                lines.append(f"Buy first: {summarize_buys(advice['buys'])}")
+        elif advice['points_now'] > 0:
+            lines.append(f"Prestige now is best ({advice['rate_now']:.1f} pts/h)")
+        if advice['next'] is not None:
+            lines.append(f"Best buy: {advice['next']['name']} "
+                         f"(pays back in {format_duration(advice['next']['payback'])})")
+        return '\n'.join(lines)
+
+
+# ============== ПРОФИЛИРОВАНИЕ ==============
+
+class ProfilerOverlay(BoxLayout):
+    def __init__(self, game, loop, **kwargs):
+        super().__init__(orientation='vertical', size_hint=(0.6, 0.21),
+                         pos_hint={'right': 1, 'top': 1}, padding=dp(4), **kwargs)
+        self.game = game
+        self.loop = loop
+        
+        with self.canvas.before:
+            Color(0, 0, 0, 0.6)
+            self.bg = Rectangle(pos=self.pos, size=self.size)
+        self.bind(pos=self.update_bg, size=self.update_bg)
+        
+        self.stats_lbl = Label(text='', font_size=sp(10), halign='left', valign='top', size_hint=(1, 0.8))
+        self.stats_lbl.bind(size=self.stats_lbl.setter('text_size'))
+        self.add_widget(self.stats_lbl)
+        
+        export = Button(
+            text='EXPORT TRACE',
+            font_size=sp(10),
+            size_hint=(1, 0.2),
+            background_color=(0.3, 0.3, 0.4, 0.8),
+            background_normal=''
+        )
+        export.bind(on_release=lambda x: self.export())
+        self.add_widget(export)
+        
+        Clock.schedule_interval(profiler.frame, 0)
+        Clock.schedule_interval(self.update, 0.5)
+    
+    def update_bg(self, *args):
+        self.bg.pos = self.pos
+        self.bg.size = self.size
+    
+    def export(self):
+        path = profiler.export_chrome_trace(os.path.dirname(self.game.save_path))
+        self.game.event_text = f"Trace saved: {os.path.basename(path)}"
+    
+    def update(self, dt=0):
+        fs = profiler.frame_stats()
+        lines = [f"FPS {fs['fps']:.0f} | frame p50 {fs['p50_ms']:.1f}ms p99 {fs['p99_ms']:.1f}ms"]
+        for name, worst, avg in profiler.slowest(3):
+            lines.append(f"{name}: max {worst / 1e6:.2f}ms avg {avg / 1e6:.2f}ms")
+        lines.append(self.loop.summary())
+        lines.append(f"start: {startup.summary()}")
+        self.stats_lbl.text = '\n'.join(lines)
 
 
 # ============== ПРИЛОЖЕНИЕ ==============
 
+class LazyScreenManager(ScreenManager):
+    # Экраны строятся при первом переходе на них или в простое после старта
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.factories = {}
+    
+    def register(self, name, factory):
+        self.factories[name] = factory
+    
+    def build_screen(self, name):
+        factory = self.factories.pop(name, None)
+        if factory is None:
+            return None
+        start = time.perf_counter_ns()
+        screen = factory(name)
+        self.add_widget(screen)
+        if profiler.enabled:
+            profiler.record(f'build:{name}', start, time.perf_counter_ns())
+        return screen
+    
+    def build_next(self):
+        # Один экран за вызов, чтобы не занимать кадр целиком; True — остались ещё
+        if self.factories:
+            self.build_screen(next(iter(self.factories)))
+        return bool(self.factories)
+    
+    def get_screen(self, name):
+        if name in self.factories:
+            self.build_screen(name)
+        return super().get_screen(name)
+
+
+SCREENS = (
+    ('main', MainScreen),
+    ('upgrades', UpgradesScreen),
+    ('ships', ShipsScreen),
+    ('boss', BossScreen),
+    ('prestige', PrestigeScreen),
+)
+
+# Пауза после выхода на интерактив перед фоновой постройкой остальных экранов
+PREBUILD_DELAY = 1.0
+
+# Цвета эффектов — как у счётчиков ресурсов; убийство босса — золотой
+EFFECT_COLORS = {'energy': (0.3, 0.8, 1, 1), 'metal': (0.7, 0.7, 0.7, 1), 'crystal': (0.9, 0.4, 1, 1)}
+BOSS_EFFECT_COLOR = (1, 0.85, 0.3, 1)
+
+# QA-режим (задан STAREMPIRE_TIME_SCALE): клавиша перемотки и на сколько (секунды)
+FAST_FORWARD_KEY = 289  # F8
+FAST_FORWARD_SECONDS = 3600
+
+
 class StarEmpireApp(App):
     def build(self):
         self.title = 'Star Empire'
-        self.game = GameManager()
-        
-        sm = ScreenManager()
-        
-        self.main_screen = MainScreen(self.game, name='main')
-        self.upgrades_screen = UpgradesScreen(self.game, name='upgrades')
-        self.ships_screen = ShipsScreen(self.game, name='ships')
-        self.boss_screen = BossScreen(self.game, name='boss')
-        self.prestige_screen = PrestigeScreen(self.game, name='prestige')
+        self.game = None
+        self.sm = None
+        self.loaded = None
+        self.action_log = None
+        self.effects = None
+        self.loop = None
+        self.loop_event = None
+        
+        # Первый кадр — лёгкая заставка; сохранение грузится в фоне
+        self.root_layout = FloatLayout()
+        self.placeholder = Label(
+            text='STAR EMPIRE\nLoading...',
+            font_size=sp(28),
+            halign='center',
+            color=(0.9, 0.8, 1, 1)
+        )
+        self.root_layout.add_widget(self.placeholder)
         
-        sm.add_widget(self.main_screen)
-        sm.add_widget(self.upgrades_screen)
-        sm.add_widget(self.ships_screen)
-        sm.add_widget(self.boss_screen)
-        sm.add_widget(self.prestige_screen)
+        threading.Thread(target=self.load_in_background, name='game-loader', daemon=True).start()
+        Clock.schedule_interval(self.poll_loader, 0)
         
-        Clock.schedule_interval(self.update_all, 0.2)
-        Clock.schedule_interval(self.game.auto_collect, 1)
+        from kivy.core.window import Window
+        Window.bind(on_flip=self.on_flip)
+        startup.mark('build')
+        return self.root_layout
+    
+    def load_in_background(self):
+        # Без Kivy: паки, чтение сохранения и оффлайн-начисление
+        start = time.perf_counter_ns()
+        errors = {}
+        try:
+            loaded, errors = load_packs()
+            if loaded:
+                Logger.info(f"StarEmpire: content packs loaded: {', '.join(loaded)}")
+            game = GameManager(journal=True, clock=make_clock())
+        except Exception:
+            # Как и раньше: нечитаемое сохранение — не падение, а новая игра с нуля
+            Logger.exception("StarEmpire: loading failed, starting a fresh game")
+            game = None
+        try:
+            if game is None:
+                game = GameManager(journal=True, clock=make_clock(), data={})
+                game.event_text = "Save could not be loaded: new game started"
+            self.loaded = (game, errors, None)
+        except Exception as e:
+            self.loaded = (None, None, e)
+        if profiler.enabled:
+            profiler.record('game:load', start, time.perf_counter_ns())
+    
+    def poll_loader(self, dt):
+        if self.loaded is None:
+            return True
+        game, errors, error = self.loaded
+        if error is not None:
+            raise error
+        self.start_game(game, errors)
+        return False
+    
+    def start_game(self, game, errors):
+        startup.mark('loaded')
+        self.game = game
+        if errors:
+            self.game.event_text = "Content pack skipped: " + ', '.join(sorted(errors))
+        
+        if os.environ.get('STAREMPIRE_RECORD') == '1':
+            # Журнал действий для replay.py; пишется рядом с сохранением
+            from replay import ActionLog
+            self.action_log = ActionLog(self.game)
+        
+        sm = LazyScreenManager()
+        self.sm = sm
+        for name, cls in SCREENS:
+            sm.register(name, lambda name, cls=cls: self.make_screen(cls, name))
+        # Первый добавленный экран становится текущим; остальные — по требованию
+        sm.build_screen('main')
+        
+        # Один цикл: доход фиксированными шагами по часам игры, затем перерисовка текущего экрана
+        self.loop = GameLoop(self.game, render=lambda: self.update_all(0))
+        self.loop_tick = profiler.wrap('clock:loop', lambda dt: self.loop.tick())
+        self.run_loop(FOREGROUND_RATE)
+        if TIME_SCALE_ENV in os.environ:
+            from kivy.core.window import Window
+            Window.bind(on_key_down=self.on_qa_key)
+        
+        self.root_layout.remove_widget(self.placeholder)
+        self.root_layout.add_widget(sm)
+        # Эффекты поверх всех экранов; касания проходят насквозь
+        self.effects = EffectsLayer()
+        self.root_layout.add_widget(self.effects)
+        self.game.on_effect = self.show_effect
+        self.update_all(0)
+        
+        if not profiler.enabled:
+            return
         
-        return sm
+        # Замеры ставятся только при включённом профилировщике
+        self.game.save_game = profiler.wrap('save:snapshot', self.game.save_game)
+        self.game.writer.write = profiler.wrap('save:write', self.game.writer.write)
+        self.root_layout.add_widget(ProfilerOverlay(self.game, self.loop))
+    
+    def make_screen(self, cls, name):
+        screen = cls(self.game, name=name)
+        if profiler.enabled:
+            screen.update = profiler.wrap(f'update:{name}', screen.update)
+        return screen
+    
+    def on_flip(self, window):
+        # Кадр уже показан: первый — с заставкой, первый после загрузки — интерактив
+        startup.mark('first_frame')
+        if self.sm is None:
+            return
+        startup.mark('interactive')
+        window.unbind(on_flip=self.on_flip)
+        Clock.schedule_once(self.finish_startup, 0)
+    
+    def finish_startup(self, dt):
+        base = os.path.splitext(self.game.save_path)[0]
+        startup.save(base + '_startup.json')
+        Clock.schedule_once(self.prebuild_screens, PREBUILD_DELAY)
+    
+    def prebuild_screens(self, dt):
+        if self.sm.build_next():
+            Clock.schedule_once(self.prebuild_screens, 0.1)
+    
+    def show_effect(self, kind, key, amount):
+        # Нажатие — от кнопки добычи, награда — от счётчика ресурса на главном экране;
+        # на других экранах и для боссов — из центра окна
+        effects = self.effects
+        x, y = self.root_layout.center
+        if kind == 'boss':
+            effects.burst(x, y, BOSS_EFFECT_COLOR, 80, speed=dp(420), size=dp(5))
+            effects.float_text(x, y, "DEFEATED" if amount == 1 else f"{amount} KILLS",
+                               BOSS_EFFECT_COLOR, font_size=sp(28))
+            return
+        screen = self.sm.current_screen
+        if isinstance(screen, MainScreen):
+            anchor = getattr(screen, f"{key}_btn" if kind == 'tap' else f"{key}_lbl")
+            x, y = self.root_layout.to_widget(*anchor.to_window(*anchor.center))
+        color = EFFECT_COLORS[key]
+        effects.float_text(x, y, '+' + format_num(amount), color)
+        effects.burst(x, y, color, 6 if kind == 'tap' else 24)
+    
+    def on_qa_key(self, window, key, *args):
+        if key != FAST_FORWARD_KEY:
+            return False
+        start = time.perf_counter()
+        self.loop.fast_forward(FAST_FORWARD_SECONDS)
+        ms = (time.perf_counter() - start) * 1000
+        self.game.event_text = f"Fast-forward +{format_duration(FAST_FORWARD_SECONDS)} in {ms:.0f}ms"
+        self.update_all(0)
+        return True
+    
+    def run_loop(self, rate):
+        # rate — тиков в секунду; 0 — цикл стоит (пауза): в фоне CPU не тратится
+        if self.loop_event is not None:
+            self.loop_event.cancel()
+            self.loop_event = None
+        if rate:
+            self.loop_event = Clock.schedule_interval(self.loop_tick, 1 / rate)
+        self.loop.set_rate(rate)
     
     def update_all(self, dt):
-        self.main_screen.update(dt)
-        self.upgrades_screen.update(dt)
-        self.ships_screen.update(dt)
-        self.boss_screen.update(dt)
-        self.prestige_screen.update(dt)
+        # Невидимые экраны обновятся при переходе на них (on_pre_enter)
+        self.sm.current_screen.refresh()
+    
+    def on_pause(self):
+        if self.sm is not None:
+            # Доход учтён до момента паузы; остальное досчитает on_resume
+            self.run_loop(0)
+            self.loop.pause()
+            self.game.save_game()
+            self.save_action_log()
+        return True
+    
+    def on_resume(self):
+        # GL-контекст мог пересоздаться: атлас счётчиков рисуется заново
+        if GlyphAtlas.instance is not None:
+            GlyphAtlas.instance.redraw()
+        if self.sm is not None:
+            self.loop.resume()
+            self.run_loop(FOREGROUND_RATE)
+            self.update_all(0)
     
     def on_stop(self):
-        self.game.save_game()
+        # Пока сохранение грузится, записывать нечего
+        if self.sm is not None:
+            self.loop.settle()
+            self.game.save_game(wait=True)
+            self.save_action_log()
+    
+    def save_action_log(self):
+        if self.action_log is not None:
+            base = os.path.splitext(self.game.save_path)[0]
+            self.action_log.save(base + '_actions.json')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,329 @@
+"""
+STAR EMPIRE — популяционный симулятор баланса
+N игроков как структура массивов NumPy: ресурсы (N, R), уровни улучшений
+(N, U), корабли (N, S), очки престижа (N,). Шаг — автодоход, клики,
+экспедиции, бой флота, ежедневная награда, покупки и престиж векторными
+операциями; цены, доходы и формулы берутся из таблиц game.py.
+
+    python popsim.py --players 1000000 --hours 48 --step 30
+
+Модель — ожидания, а не броски: бонусы кликов и награды экспедиций
+начисляются средним значением, флот всё время в экспедициях, игрок
+возвращается раньше OFFLINE_CAP. Разброс даёт сама популяция: темп кликов,
+доля времени онлайн, стратегия покупок и порог престижа у каждого свои.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from catalog import load_packs
+from game import (RESOURCES, UPGRADES, SHIPS, BOSSES, CLICK_BASE, BONUS_CHANCE, BONUS_RANGE,
+                  FLEET_DPS_PER_SHIP, PRESTIGE_WEIGHTS, PRESTIGE_DIVISOR, PRESTIGE_MIN_TOTAL,
+                  PRESTIGE_BONUS, DAILY_REWARD, DAILY_COOLDOWN)
+
+
+# Стратегии покупок: множитель к цене при выборе улучшения (меньше — охотнее)
+POLICIES = {
+    'cheapest': {'click': 1.0, 'auto': 1.0},
+    'auto_first': {'click': 4.0, 'auto': 1.0},
+    'clicker': {'click': 1.0, 'auto': 4.0},
+}
+
+# Сколько улучшений игрок успевает купить за шаг, пока онлайн
+MAX_BUYS_PER_STEP = 8
+
+# Корабль покупается, только если после покупки остаётся столько же (запас на улучшения)
+SHIP_RESERVE = 2.0
+
+# Пороги престижа: игрок ждёт, пока награда не достигнет стольких очков
+PRESTIGE_THRESHOLDS = (1, 2, 5, 10)
+
+# Когда доля завершивших больше этой — массивы ужимаются до оставшихся
+COMPACT_SHARE = 0.25
+
+
+# ============== ТАБЛИЦЫ ==============
+
+class Tables:
+    # Конфиг игры в виде матриц; строится после загрузки контент-паков
+    def __init__(self):
+        self.resources = RESOURCES
+        res_index = {res: i for i, res in enumerate(RESOURCES)}
+        R = len(RESOURCES)
+        
+        self.upgrades = list(UPGRADES)
+        U = len(self.upgrades)
+        self.upgrade_res = np.array([res_index[UPGRADES[k]['resource']] for k in self.upgrades])
+        self.base_cost = np.array([float(UPGRADES[k]['base_cost']) for k in self.upgrades])
+        self.cost_mult = np.array([float(UPGRADES[k]['cost_mult']) for k in self.upgrades])
+        self.click = np.zeros((U, R))
+        self.auto = np.zeros((U, R))
+        for i, key in enumerate(self.upgrades):
+            upg = UPGRADES[key]
+            target = self.click if upg['effect'] == 'click' else self.auto
+            target[i, self.upgrade_res[i]] = upg.get('power', 1)
+        self.click_base = np.array([float(CLICK_BASE.get(res, 0)) for res in RESOURCES])
+        self.policy_weights = np.array([[POLICIES[name][UPGRADES[k]['effect']] for k in self.upgrades]
+                                        for name in POLICIES])
+        
+        self.ships = list(SHIPS)
+        S = len(self.ships)
+        self.ship_cost = np.zeros((S, R))
+        self.ship_income = np.zeros((S, R))
+        for i, key in enumerate(self.ships):
+            ship = SHIPS[key]
+            for res, cost in ship['cost'].items():
+                self.ship_cost[i, res_index[res]] = cost
+            # Средняя награда за рейс / длительность рейса
+            for res, (low, high) in ship['rewards'].items():
+                self.ship_income[i, res_index[res]] = (low + high) / 2 / ship['time']
+        
+        self.bosses = list(BOSSES)
+        B = len(self.bosses)
+        self.boss_hp = np.array([float(BOSSES[k]['hp']) for k in self.bosses])
+        self.boss_cooldown = np.array([float(BOSSES[k]['cooldown']) for k in self.bosses])
+        self.boss_reward = np.zeros((B, R))
+        self.boss_points = np.zeros(B)
+        for i, key in enumerate(self.bosses):
+            for res, amount in BOSSES[key]['reward'].items():
+                if res in res_index:
+                    self.boss_reward[i, res_index[res]] = amount
+                elif res == 'prestige_points':
+                    self.boss_points[i] = amount
+        
+        self.weights = np.array([float(PRESTIGE_WEIGHTS.get(res, 0)) for res in RESOURCES])
+        self.daily = np.array([float(DAILY_REWARD.get(res, 0)) for res in RESOURCES])
+        self.bonus = BONUS_CHANCE * (BONUS_RANGE[0] + BONUS_RANGE[1]) / 2 / R
+        # Ценность награды босса в ресурсах престижа — по ней флот выбирает цель
+        self.boss_value = self.boss_reward @ self.weights
+
+
+# ============== ПОПУЛЯЦИЯ ==============
+
+class Population:
+    def __init__(self, n, tables, seed=1):
+        self.t = tables
+        rng = np.random.default_rng(seed)
+        R, U, S = len(tables.resources), len(tables.upgrades), len(tables.ships)
+        
+        self.ids = np.arange(n)
+        self.res = np.zeros((n, R))
+        self.levels = np.zeros((n, U), dtype=np.int32)
+        self.cost = np.tile(tables.base_cost, (n, 1))
+        self.ships = np.zeros((n, S))
+        self.points = np.zeros(n)
+        
+        # Поведение: клики в секунду онлайн, доля времени онлайн, стратегия, порог престижа
+        self.tap_rate = rng.lognormal(mean=np.log(2.0), sigma=0.6, size=n)
+        self.online = rng.uniform(0.05, 0.5, size=n)
+        self.policy = rng.integers(0, len(POLICIES), size=n)
+        self.threshold = rng.choice(np.array(PRESTIGE_THRESHOLDS), size=n)
+        self.rng = rng
+        
+        self.first_prestige = np.full(n, np.nan)
+        # Результаты игроков, выбывших при ужатии массивов
+        self.done_ids = []
+        self.done_times = []
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def step(self, now, dt, daily):
+        t = self.t
+        mult = 1.0 + self.points * PRESTIGE_BONUS
+        
+        # Доход: авто + клики онлайн (поровну по ресурсам) + средний бонус кликов
+        taps = self.tap_rate * self.online * dt
+        click_power = t.click_base + self.levels @ t.click
+        income = self.levels @ t.auto * dt
+        income += click_power * (taps / len(t.resources))[:, None]
+        income += (taps * t.bonus)[:, None]
+        
+        # Экспедиции: флот всё время в рейсах, награда растёт с множителем
+        income += self.ships @ t.ship_income * dt
+        
+        # Бой: каждый игрок бьёт самого выгодного босса, убийства — в замкнутой форме
+        dps = self.ships.sum(axis=1) * FLEET_DPS_PER_SHIP * mult
+        with np.errstate(divide='ignore'):
+            kill_rate = 1.0 / (t.boss_cooldown + t.boss_hp / dps[:, None])
+        best = np.argmax(kill_rate * t.boss_value, axis=1)
+        kills = kill_rate[np.arange(len(self)), best] * dt
+        self.res += income * mult[:, None] + t.boss_reward[best] * kills[:, None]
+        self.points += t.boss_points[best] * kills
+        
+        if daily:
+            self.res += t.daily * mult[:, None]
+        
+        self.buy_upgrades()
+        self.buy_ships()
+        self.prestige(now)
+    
+    def buy_upgrades(self):
+        t = self.t
+        # Покупают только те, кто сейчас онлайн
+        active = np.nonzero(self.rng.random(len(self)) < self.online)[0]
+        weights = t.policy_weights[self.policy[active]]
+        for _ in range(MAX_BUYS_PER_STEP):
+            if not len(active):
+                break
+            cost = self.cost[active]
+            have = self.res[active][:, t.upgrade_res]
+            score = np.where(have >= cost, cost * weights, np.inf)
+            pick = np.argmin(score, axis=1)
+            rows = np.isfinite(score[np.arange(len(active)), pick])
+            active, pick, weights = active[rows], pick[rows], weights[rows]
+            self.res[active, t.upgrade_res[pick]] -= self.cost[active, pick]
+            self.levels[active, pick] += 1
+            self.cost[active, pick] *= t.cost_mult[pick]
+    
+    def buy_ships(self):
+        t = self.t
+        # Самый дорогой корабль, на который хватает с запасом
+        can = (self.res[:, None, :] >= t.ship_cost[None] * SHIP_RESERVE).all(axis=2)
+        has = can.any(axis=1)
+        pick = len(t.ships) - 1 - np.argmax(can[:, ::-1], axis=1)
+        rows = np.nonzero(has)[0]
+        pick = pick[rows]
+        self.res[rows] -= t.ship_cost[pick]
+        self.ships[rows, pick] += 1
+    
+    def prestige(self, now):
+        t = self.t
+        total = self.res @ t.weights
+        earn = np.floor(np.sqrt(total) / PRESTIGE_DIVISOR)
+        rows = np.nonzero((total >= PRESTIGE_MIN_TOTAL) & (earn > 0) & (earn >= self.threshold))[0]
+        if not len(rows):
+            return
+        self.points[rows] += earn[rows]
+        self.res[rows] = 0
+        self.levels[rows] = 0
+        self.cost[rows] = t.base_cost
+        self.ships[rows] = 0
+        first = rows[np.isnan(self.first_prestige[rows])]
+        self.first_prestige[first] = now
+    
+    def compact(self):
+        # Выбывшие (уже с первым престижем) больше не считаются каждый шаг
+        done = ~np.isnan(self.first_prestige)
+        self.done_ids.append(self.ids[done])
+        self.done_times.append(self.first_prestige[done])
+        keep = ~done
+        for name in ('ids', 'res', 'levels', 'cost', 'ships', 'points', 'tap_rate',
+                     'online', 'policy', 'threshold', 'first_prestige'):
+            setattr(self, name, getattr(self, name)[keep])
+    
+    def results(self, n):
+        # -> время первого престижа по исходному id (NaN — не успел), стратегия, порог
+        times = np.full(n, np.nan)
+        for ids, done in zip(self.done_ids, self.done_times):
+            times[ids] = done
+        times[self.ids] = self.first_prestige
+        return times
+
+
+def simulate(players, hours, step, seed=1, until_first=True, progress=None):
+    tables = Tables()
+    pop = Population(players, tables, seed)
+    policy, threshold = pop.policy.copy(), pop.threshold.copy()
+    horizon = hours * 3600
+    now = 0.0
+    next_daily = 0.0
+    while now < horizon and len(pop):
+        now += step
+        daily = now >= next_daily
+        if daily:
+            next_daily += DAILY_COOLDOWN
+        pop.step(now, step, daily)
+        if until_first and np.count_nonzero(~np.isnan(pop.first_prestige)) > COMPACT_SHARE * len(pop):
+            pop.compact()
+        if progress is not None:
+            progress(now, pop)
+    return pop.results(players), policy, threshold
+
+
+# ============== ОТЧЁТ ==============
+
+def summarize(times, policy, threshold):
+    hours = times / 3600
+    done = ~np.isnan(hours)
+    summary = {'players': len(times), 'prestiged': int(done.sum()),
+               'share': float(done.mean()) if len(times) else 0.0}
+    if done.any():
+        summary['hours'] = {f'p{q}': float(np.percentile(hours[done], q)) for q in (10, 25, 50, 75, 90, 99)}
+    by_policy = {}
+    for i, name in enumerate(POLICIES):
+        mask = done & (policy == i)
+        by_policy[name] = float(np.median(hours[mask])) if mask.any() else None
+    summary['median_by_policy'] = by_policy
+    by_threshold = {}
+    for value in PRESTIGE_THRESHOLDS:
+        mask = done & (threshold == value)
+        by_threshold[str(value)] = float(np.median(hours[mask])) if mask.any() else None
+    summary['median_by_threshold'] = by_threshold
+    return summary
+
+
+def histogram(times, bins=24, width=50):
+    hours = times[~np.isnan(times)] / 3600
+    if not len(hours):
+        return "nobody reached prestige"
+    counts, edges = np.histogram(hours, bins=bins)
+    peak = counts.max()
+    lines = []
+    for count, low, high in zip(counts, edges[:-1], edges[1:]):
+        bar = '#' * int(round(count / peak * width)) if peak else ''
+        lines.append(f"{low:7.1f}-{high:<7.1f}h {count:>9} {bar}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Star Empire population balance simulator')
+    parser.add_argument('--players', type=int, default=100000)
+    parser.add_argument('--hours', type=float, default=48)
+    parser.add_argument('--step', type=float, default=30, help='simulation step, seconds')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--keep-going', action='store_true', help='keep simulating players after first prestige')
+    parser.add_argument('--json', help='write the summary to this file')
+    args = parser.parse_args()
+    
+    loaded, errors = load_packs()
+    for name, error in sorted(errors.items()):
+        print(f"content pack skipped: {name}: {error}")
+    
+    report_every = max(1, int(3600 / args.step))
+    steps = [0]
+    def progress(now, pop):
+        steps[0] += 1
+        if steps[0] % report_every == 0:
+            print(f"  t={now / 3600:6.1f}h active={len(pop)}", file=sys.stderr)
+    
+    start = time.perf_counter()
+    times, policy, threshold = simulate(args.players, args.hours, args.step, args.seed,
+                                        until_first=not args.keep_going, progress=progress)
+    elapsed = time.perf_counter() - start
+    
+    summary = summarize(times, policy, threshold)
+    summary['seconds'] = elapsed
+    print(f"{args.players} players, {args.hours:g}h at {args.step:g}s steps in {elapsed:.1f}s")
+    print(f"reached first prestige: {summary['prestiged']} ({summary['share']:.1%})")
+    if 'hours' in summary:
+        print('time to first prestige, hours: ' +
+              ' '.join(f"{q} {v:.1f}" for q, v in summary['hours'].items()))
+    print('median by policy: ' + ', '.join(f"{k} {v:.1f}h" if v is not None else f"{k} -"
+                                           for k, v in summary['median_by_policy'].items()))
+    print('median by threshold: ' + ', '.join(f"{k}pt {v:.1f}h" if v is not None else f"{k}pt -"
+                                              for k, v in summary['median_by_threshold'].items()))
+    print(histogram(times))
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
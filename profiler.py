@@ -0,0 +1,118 @@
+"""
+STAR EMPIRE — профилировщик
+Опциональный замер колбэков, update() экранов и сохранений в кольцевые
+буферы фиксированного размера с экспортом в формат Chrome trace.
+Включается переменной окружения STAREMPIRE_PROFILE=1; выключенный
+профилировщик возвращает функции без обёрток и ничего не стоит.
+"""
+
+import os
+import threading
+import time
+
+
+EVENT_BUFFER_SIZE = 8192
+FRAME_BUFFER_SIZE = 600
+
+
+class Ring:
+    __slots__ = ('size', 'items', 'index', 'count')
+    
+    def __init__(self, size):
+        self.size = size
+        self.items = [None] * size
+        self.index = 0
+        self.count = 0
+    
+    def push(self, item):
+        self.items[self.index] = item
+        self.index = (self.index + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+    
+    def values(self):
+        # От старых к новым
+        if self.count < self.size:
+            return self.items[:self.count]
+        return self.items[self.index:] + self.items[:self.index]
+
+
+class Profiler:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter_ns()
+        self.events = Ring(EVENT_BUFFER_SIZE)
+        self.frames = Ring(FRAME_BUFFER_SIZE)
+        # name -> [вызовов, суммарно нс, максимум нс]
+        self.stats = {}
+    
+    def wrap(self, name, fn):
+        if not self.enabled:
+            return fn
+        perf = time.perf_counter_ns
+        record = self.record
+        
+        def timed(*args, **kwargs):
+            start = perf()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, start, perf())
+        return timed
+    
+    def record(self, name, start, end):
+        duration = end - start
+        with self.lock:
+            self.events.push((name, start, duration, threading.get_ident()))
+            stat = self.stats.get(name)
+            if stat is None:
+                self.stats[name] = [1, duration, duration]
+            else:
+                stat[0] += 1
+                stat[1] += duration
+                if duration > stat[2]:
+                    stat[2] = duration
+    
+    def frame(self, dt):
+        self.frames.push(dt)
+    
+    def frame_stats(self):
+        frames = sorted(self.frames.values())
+        if not frames:
+            return {'fps': 0.0, 'p50_ms': 0.0, 'p99_ms': 0.0}
+        total = sum(frames)
+        return {
+            'fps': len(frames) / total if total > 0 else 0.0,
+            'p50_ms': frames[len(frames) // 2] * 1000,
+            'p99_ms': frames[min(len(frames) - 1, int(len(frames) * 0.99))] * 1000,
+        }
+    
+    def slowest(self, n=3):
+        with self.lock:
+            items = [(name, stat[2], stat[1] / stat[0]) for name, stat in self.stats.items()]
+        items.sort(key=lambda item: item[1], reverse=True)
+        return items[:n]
+    
+    def chrome_trace(self):
+        with self.lock:
+            events = self.events.values()
+        pid = os.getpid()
+        return {
+            'displayTimeUnit': 'ms',
+            'traceEvents': [
+                {'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                 'ts': (start - self.origin) / 1000, 'dur': duration / 1000}
+                for name, start, duration, tid in events
+            ],
+        }
+    
+    def export_chrome_trace(self, directory):
+        import json
+        path = os.path.join(directory, time.strftime('trace-%Y%m%d-%H%M%S.json'))
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        return path
+
+
+profiler = Profiler(enabled=os.environ.get('STAREMPIRE_PROFILE') == '1')
@@ -0,0 +1,236 @@
+"""
+STAR EMPIRE — запись и воспроизведение сессий
+ActionLog перехватывает действия игрока и пишет компактный журнал:
+[мс с прошлого действия, код действия, аргументы...] плюс хеши состояния
+через каждые HASH_INTERVAL действий. replay() прогоняет журнал без ожидания
+реального времени и сверяет хеши — для поиска рассинхронов и балансных багов.
+
+    python replay.py session_actions.json           # прогон и сверка
+    python replay.py --synthetic 1000000            # скорость на сгенерированной сессии
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+from clocks import FixedClock
+from game import GameManager, RESOURCES, UPGRADES, SHIPS, BOSSES
+from saves import snapshot
+
+
+LOG_VERSION = 1
+
+# Каждые N действий в журнал пишется хеш состояния
+HASH_INTERVAL = 1000
+
+# Действие -> параметры, которые попадают в журнал (остальные не влияют на состояние)
+ACTIONS = {
+    'mine': ('resource', 'n'),
+    'buy_upgrade': ('key', 'amount'),
+    'buy_ship': ('key',),
+    'send_expedition': ('key', 'count'),
+    'collect_returned': ('now',),
+    'attack_boss': ('key',),
+    'set_target': ('key',),
+    'claim_daily': (),
+    'do_prestige': (),
+    'auto_collect': ('dt', 'now'),
+    'catch_up': ('now',),
+    'save_game': (),
+}
+OPS = tuple(ACTIONS)
+
+
+class ActionLog:
+    def __init__(self, game, hash_interval=HASH_INTERVAL):
+        self.game = game
+        self.hash_interval = hash_interval
+        self.real_clock = game.clock
+        self.frozen = None
+        self.depth = 0
+        self.names = []
+        self.name_index = {}
+        self.actions = []
+        self.hashes = []
+        
+        # Внутри действия время заморожено и округлено до мс: реплей увидит ровно те же значения
+        self.start_ms = self.last_ms = int(self.real_clock() * 1000)
+        # Журнал сам становится часами игры: перемотка (advance) проходит к настоящим часам
+        game.clock = self
+        game.sync_rng()
+        self.start = snapshot(game.data)
+        # Живая игра продолжает с того же сериализованного состояния, что и реплей
+        game.data = game.restore(snapshot(self.start))
+        game.mark(*game.data)
+        for op in OPS:
+            setattr(game, op, self.wrap(OPS.index(op), getattr(game, op)))
+    
+    def __call__(self):
+        if self.frozen is not None:
+            return self.frozen
+        return int(self.real_clock() * 1000) / 1000
+    
+    def advance(self, seconds):
+        self.real_clock.advance(seconds)
+    
+    def wrap(self, code, fn):
+        params = ACTIONS[OPS[code]]
+        
+        def recorded(*args, **kwargs):
+            # Вложенные вызовы (catch_up -> collect_returned) — часть внешнего действия
+            if self.depth:
+                return fn(*args, **kwargs)
+            args = list(args[:len(params)])
+            for name in params[len(args):]:
+                if name not in kwargs:
+                    break
+                args.append(kwargs[name])
+            now_ms = max(self.last_ms, int(self.real_clock() * 1000))
+            self.frozen = now_ms / 1000
+            self.depth += 1
+            try:
+                return fn(*args)
+            finally:
+                self.depth -= 1
+                self.frozen = None
+                self.append(now_ms, code, args)
+        return recorded
+    
+    def encode(self, value):
+        # Строки — отрицательные ссылки на таблицу имён; числа и None — как есть
+        if not isinstance(value, str):
+            return value
+        index = self.name_index.get(value)
+        if index is None:
+            index = self.name_index[value] = len(self.names)
+            self.names.append(value)
+        return -1 - index
+    
+    def append(self, now_ms, code, args):
+        self.actions.append([now_ms - self.last_ms, code] + [self.encode(a) for a in args])
+        self.last_ms = now_ms
+        if len(self.actions) % self.hash_interval == 0:
+            self.hashes.append([len(self.actions), self.game.state_hash()])
+    
+    def to_json(self):
+        hashes = list(self.hashes)
+        if not hashes or hashes[-1][0] != len(self.actions):
+            hashes.append([len(self.actions), self.game.state_hash()])
+        return {'version': LOG_VERSION, 'ops': OPS, 'names': self.names,
+                'start_ms': self.start_ms, 'start': self.start,
+                'actions': self.actions, 'hashes': hashes}
+    
+    def save(self, path):
+        import json
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.to_json(), f, separators=(',', ':'))
+        os.replace(tmp, path)
+
+
+def load_log(path):
+    import json
+    with open(path, 'r') as f:
+        log = json.load(f)
+    if log.get('version') != LOG_VERSION:
+        raise ValueError(f"unsupported action log version: {log.get('version')}")
+    return log
+
+
+def replay(log, check=True):
+    # -> (результат, игра). Останавливается на первом расхождении хеша
+    # Время реплея: выставляется из журнала перед каждым действием
+    clock = FixedClock(log['start_ms'] / 1000)
+    game = GameManager(save_path=os.devnull, clock=clock, data=snapshot(log['start']))
+    game.save_interval = math.inf
+    game.writer.write = lambda data: None
+    
+    ops = [getattr(game, name) for name in log['ops']]
+    names = log['names']
+    hashes = dict(log['hashes']) if check else {}
+    now_ms = log['start_ms']
+    mismatch = None
+    done = 0
+    
+    start = time.perf_counter()
+    for done, entry in enumerate(log['actions'], 1):
+        now_ms += entry[0]
+        clock.now = now_ms / 1000
+        ops[entry[1]](*[names[-1 - a] if isinstance(a, int) and a < 0 else a for a in entry[2:]])
+        if done in hashes:
+            got = game.state_hash()
+            if got != hashes[done]:
+                mismatch = (done, hashes[done], got)
+                break
+    elapsed = time.perf_counter() - start
+    
+    return {'actions': done, 'seconds': elapsed, 'mismatch': mismatch}, game
+
+
+# ============== СИНТЕТИЧЕСКАЯ СЕССИЯ ==============
+
+def synthetic_log(count, seed=1):
+    # Бот с фиксированным расписанием: клики, покупки, флот, боссы, тики дохода
+    import random
+    clock = FixedClock(1.7e9)
+    game = GameManager(save_path=os.devnull, clock=clock, data={}, seed=seed)
+    game.save_interval = math.inf
+    game.writer.write = lambda data: None
+    log = ActionLog(game)
+    
+    bot = random.Random(seed)
+    upgrades = list(UPGRADES)
+    ships = list(SHIPS)
+    bosses = list(BOSSES)
+    for i in range(count):
+        clock.now += bot.choice((0.05, 0.1, 0.2, 1.0))
+        roll = bot.random()
+        if roll < 0.6:
+            game.mine(bot.choice(RESOURCES), bot.randint(1, 4))
+        elif roll < 0.75:
+            game.auto_collect(1.0)
+        elif roll < 0.85:
+            game.buy_upgrade(bot.choice(upgrades), bot.choice((1, 10, 'max')))
+        elif roll < 0.9:
+            game.buy_ship(bot.choice(ships))
+        elif roll < 0.94:
+            game.send_expedition(bot.choice(ships))
+        elif roll < 0.97:
+            game.collect_returned()
+        elif roll < 0.99:
+            game.attack_boss(bot.choice(bosses))
+        else:
+            game.claim_daily()
+    return log.to_json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Star Empire action log replayer')
+    parser.add_argument('log', nargs='?', help='action log written with STAREMPIRE_RECORD=1')
+    parser.add_argument('--synthetic', type=int, default=0, help='generate a bot session of N actions instead')
+    parser.add_argument('--no-check', action='store_true', help='skip state hash verification')
+    args = parser.parse_args()
+    
+    if args.synthetic:
+        log = synthetic_log(args.synthetic)
+    elif args.log:
+        log = load_log(args.log)
+    else:
+        parser.error('give a log path or --synthetic N')
+    
+    result, game = replay(log, check=not args.no_check)
+    rate = result['actions'] / result['seconds'] * 60 if result['seconds'] else 0
+    print(f"replayed {result['actions']} actions in {result['seconds']:.2f}s ({rate:,.0f} actions/min)")
+    if result['mismatch']:
+        index, expected, got = result['mismatch']
+        print(f"DESYNC after action {index}: expected {expected}, got {got}")
+        return 1
+    if not args.no_check:
+        print(f"state hashes match ({len(log['hashes'])} checkpoints)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
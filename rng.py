@@ -0,0 +1,64 @@
+"""
+STAR EMPIRE — случайность
+Детерминированные потоки по подсистемам: состояние каждого — одно 64-битное
+число (splitmix64), поэтому оно целиком хранится в сохранении и сессию
+можно воспроизвести с любого места.
+"""
+
+import os
+import random
+import zlib
+
+
+MASK64 = (1 << 64) - 1
+GOLDEN = 0x9E3779B97F4A7C15
+
+
+def new_seed():
+    return int.from_bytes(os.urandom(8), 'little')
+
+
+def derive_seed(seed, name):
+    # Потоки одной игры не пересекаются: у каждого свой сдвиг от общего зерна
+    return (seed + zlib.crc32(name.encode()) * GOLDEN) & MASK64
+
+
+class Stream(random.Random):
+    # random/getrandbits переопределены — randint, choice, gauss работают поверх них
+    def seed(self, a=None, version=2):
+        self.state = (new_seed() if a is None else int(a)) & MASK64
+        self.gauss_next = None
+    
+    def next64(self):
+        self.state = z = (self.state + GOLDEN) & MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+        return z ^ (z >> 31)
+    
+    def random(self):
+        return (self.next64() >> 11) * (1.0 / 9007199254740992.0)
+    
+    def getrandbits(self, k):
+        if k <= 64:
+            return self.next64() >> (64 - k)
+        value = 0
+        for shift in range(0, k, 64):
+            value |= self.next64() << shift
+        return value & ((1 << k) - 1)
+    
+    def getstate(self):
+        return [self.state, self.gauss_next]
+    
+    def setstate(self, state):
+        self.state, self.gauss_next = int(state[0]) & MASK64, state[1]
+
+
+def restore_streams(names, seed, saved):
+    # Сохранённое состояние, иначе — свежий поток от зерна игры
+    streams = {}
+    for name in names:
+        stream = Stream(derive_seed(seed, name))
+        if saved.get(name) is not None:
+            stream.setstate(saved[name])
+        streams[name] = stream
+    return streams
@@ -0,0 +1,256 @@
+"""
+STAR EMPIRE — запись сохранений
+Фоновая атомарная запись: снимок -> temp-файл -> fsync -> rename,
+с хранением нескольких последних рабочих поколений. В режиме журнала
+между полными снимками дописываются только изменившиеся ключи.
+"""
+
+import logging
+import os
+import threading
+import time
+
+
+# Сколько предыдущих поколений сохранения держать рядом с основным файлом
+SAVE_GENERATIONS = 3
+
+# Размер журнала, после которого он сворачивается в полный снимок
+JOURNAL_COMPACT_BYTES = 64 * 1024
+
+# Номер последней записи журнала, уже вошедшей в снимок (служебный ключ файла)
+JOURNAL_SEQ_KEY = 'journal_seq'
+
+# Не равно никакому значению из JSON: ключа не было в прошлом снимке
+MISSING = object()
+
+log = logging.getLogger(__name__)
+
+
+def snapshot(value):
+    # Быстрая копия JSON-совместимых данных (dict/list/скаляры; Big, GameState, Levels -> JSON)
+    if isinstance(value, dict):
+        return {k: snapshot(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [snapshot(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, tuple)):
+        return value
+    return value.to_json()
+
+
+def generation_path(path, n):
+    return path if n == 0 else f"{path}.{n}"
+
+
+def journal_path(path):
+    return path + '.journal'
+
+
+def write_atomic(path, data, generations=SAVE_GENERATIONS):
+    import json
+    text = json.dumps(data)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    
+    # Сдвигаем старые поколения: save.json -> save.json.1 -> save.json.2 ...
+    for n in range(generations, 0, -1):
+        older = generation_path(path, n - 1)
+        if os.path.exists(older):
+            os.replace(older, generation_path(path, n))
+    os.replace(tmp, path)
+    
+    try:
+        fd = os.open(os.path.dirname(path) or '.', os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+    return len(text)
+
+
+def load_latest(path, generations=SAVE_GENERATIONS):
+    # Первое читаемое поколение; повреждённые файлы пропускаются
+    import json
+    for n in range(generations + 1):
+        candidate = generation_path(path, n)
+        try:
+            with open(candidate, 'r') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if isinstance(saved, dict):
+            return saved
+    return None
+
+
+def load_save(path, generations=SAVE_GENERATIONS):
+    # -> (данные, последний номер журнала, применён ли журнал целиком).
+    # Номер нужен писателю и при битом журнале: новые записи должны быть старше всех старых
+    import json
+    saved = load_latest(path, generations)
+    if saved is None:
+        return None, 0, False
+    seq = saved.pop(JOURNAL_SEQ_KEY, 0)
+    try:
+        with open(journal_path(path), 'r') as f:
+            lines = f.readlines()
+    except OSError:
+        return saved, seq, True
+    applied = seq
+    clean = True
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # Оборванная запись в хвосте: дописывать после неё нельзя
+            clean = False
+            break
+        seq = max(seq, record['seq'])
+        if not clean or record['seq'] <= applied:
+            continue
+        if record['seq'] != applied + 1:
+            # Разрыв: журнал относится к более новому снимку, чем удалось прочитать
+            clean = False
+            continue
+        saved.update(record['set'])
+        for key in record['del']:
+            saved.pop(key, None)
+        applied = record['seq']
+    return saved, seq, clean
+
+
+class SaveWriter:
+    def __init__(self, path, generations=SAVE_GENERATIONS):
+        self.path = path
+        self.generations = generations
+        self.cond = threading.Condition()
+        self.pending = None
+        self.pending_since = 0
+        self.busy = False
+        self.thread = None
+        self.stats = {'saves': 0, 'coalesced': 0, 'errors': 0, 'bytes': 0,
+                      'last_write': 0.0, 'last_latency': 0.0, 'max_latency': 0.0}
+    
+    def submit(self, data):
+        with self.cond:
+            if self.pending is not None:
+                self.stats['coalesced'] += 1
+            else:
+                self.pending_since = time.perf_counter()
+            self.pending = data
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='save-writer', daemon=True)
+                self.thread.start()
+            self.cond.notify_all()
+    
+    def run(self):
+        while True:
+            with self.cond:
+                while self.pending is None:
+                    self.cond.wait()
+                data, since = self.pending, self.pending_since
+                self.pending = None
+                self.busy = True
+            
+            start = time.perf_counter()
+            try:
+                self.write(data)
+                done = time.perf_counter()
+                self.stats['saves'] += 1
+                self.stats['last_write'] = done - start
+                self.stats['last_latency'] = done - since
+                self.stats['max_latency'] = max(self.stats['max_latency'], done - since)
+            except Exception:
+                # Неудачный снимок (диск, не-JSON значение) не должен останавливать поток:
+                # следующий снимок пишется как обычно
+                log.exception("save to %s failed", self.path)
+                self.stats['errors'] += 1
+                self.failed()
+            finally:
+                with self.cond:
+                    self.busy = False
+                    self.cond.notify_all()
+    
+    def failed(self):
+        # После ошибки записи; полному снимку нечего восстанавливать
+        pass
+    
+    def prime(self, data, seq, clean):
+        # Состояние на диске после загрузки; полной записи оно не нужно
+        pass
+    
+    def write(self, data):
+        self.stats['bytes'] += write_atomic(self.path, data, self.generations)
+        # Журнал от прошлого режима устарел относительно полного снимка
+        if os.path.exists(journal_path(self.path)):
+            os.remove(journal_path(self.path))
+    
+    def flush(self, timeout=5.0):
+        # Дождаться записи всех отправленных снимков (например, в on_stop)
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while self.pending is not None or self.busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+        return True
+
+
+class JournalWriter(SaveWriter):
+    # Дописывает изменившиеся ключи; сравнение со снимком на диске — в потоке записи
+    def __init__(self, path, generations=SAVE_GENERATIONS, compact_bytes=JOURNAL_COMPACT_BYTES):
+        super().__init__(path, generations)
+        self.compact_bytes = compact_bytes
+        self.base = None
+        self.seq = 0
+        self.journal_size = 0
+        self.stats.update({'records': 0, 'compactions': 0})
+    
+    def prime(self, data, seq, clean):
+        # Без чистого журнала первая запись — сразу полный снимок
+        self.seq = seq
+        if not clean:
+            return
+        self.base = data
+        try:
+            self.journal_size = os.path.getsize(journal_path(self.path))
+        except OSError:
+            self.journal_size = 0
+    
+    def write(self, data):
+        if self.base is None or self.journal_size >= self.compact_bytes:
+            self.compact(data)
+            return
+        changed = {key: value for key, value in data.items() if self.base.get(key, MISSING) != value}
+        removed = [key for key in self.base if key not in data]
+        if not changed and not removed:
+            return
+        import json
+        line = json.dumps({'seq': self.seq + 1, 'set': changed, 'del': removed}, separators=(',', ':')) + '\n'
+        with open(journal_path(self.path), 'a') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self.seq += 1
+        self.base = data
+        self.journal_size += len(line)
+        self.stats['records'] += 1
+        self.stats['bytes'] += len(line)
+    
+    def failed(self):
+        # Хвост журнала мог оборваться на середине записи: следующая запись — полный снимок
+        self.base = None
+    
+    def compact(self, data):
+        # Снимок помнит номер последней записи: хвост журнала старше него при загрузке пропускается
+        self.stats['bytes'] += write_atomic(self.path, dict(data, **{JOURNAL_SEQ_KEY: self.seq}), self.generations)
+        with open(journal_path(self.path), 'w'):
+            pass
+        self.base = data
+        self.journal_size = 0
+        self.stats['compactions'] += 1
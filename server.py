@@ -0,0 +1,422 @@
+"""
+STAR EMPIRE — сервер сессий
+asyncio-сервер без Kivy: тысячи игроков, у каждого свой GameManager.
+Действия — JSON поверх HTTP/1.1 (keep-alive), доход всех сессий начисляет
+один общий планировщик, простаивающие сессии выгружаются на диск.
+
+    python server.py --port 8765 --save-dir server_saves
+
+    POST /session/<player>/mine          {"resource": "energy", "n": 5}
+    POST /session/<player>/buy_upgrade   {"key": "energy_click", "amount": 10}
+    GET  /session/<player>               состояние
+    GET  /stats                          сессии, запросы/с, отставание тика
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog import load_packs
+from game import GameManager, RESOURCES, UPGRADES, SHIPS, BOSSES, BUY_AMOUNTS
+from profiler import Ring
+from saves import snapshot, write_atomic
+
+
+# Период общего тика дохода (секунды)
+TICK_INTERVAL = 1.0
+
+# Сессия без запросов дольше этого выгружается на диск
+IDLE_TIMEOUT = 300
+
+# Как часто активные сессии сохраняются
+SESSION_SAVE_INTERVAL = 30
+
+# Потоки для чтения/записи сохранений: событийный цикл не ждёт диск
+IO_WORKERS = 4
+
+MAX_BODY = 16 * 1024
+MAX_TAPS = 1000
+LAG_SAMPLES = 600
+
+# Отчёт о нагрузке в консоль (секунды)
+REPORT_INTERVAL = 10
+
+PLAYER_RE = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+# Ключи состояния, которые видит клиент
+STATE_KEYS = ('energy', 'metal', 'crystal', 'upgrades', 'ships', 'prestige_points',
+              'bosses', 'target_boss', 'total_clicks', 'last_daily', 'boss_kills', 'achievements')
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 431: 'Request Header Fields Too Large', 500: 'Internal Server Error'}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def name_arg(table):
+    def check(value):
+        if not isinstance(value, str) or value not in table:
+            raise RequestError(400, f"unknown name: {value!r}")
+        return value
+    return check
+
+
+def int_arg(low, high):
+    def check(value):
+        if not isinstance(value, int) or isinstance(value, bool) or not low <= value <= high:
+            raise RequestError(400, f"expected integer {low}..{high}")
+        return value
+    return check
+
+
+def amount_arg(value):
+    if value not in BUY_AMOUNTS or isinstance(value, bool):
+        raise RequestError(400, f"amount must be one of {list(BUY_AMOUNTS)}")
+    return value
+
+
+# Действие -> (параметр, проверка, значение по умолчанию). Время клиент не передаёт
+ACTIONS = {
+    'mine': (('resource', name_arg(RESOURCES), None), ('n', int_arg(1, MAX_TAPS), 1)),
+    'buy_upgrade': (('key', name_arg(UPGRADES), None), ('amount', amount_arg, 1)),
+    'buy_ship': (('key', name_arg(SHIPS), None),),
+    'send_expedition': (('key', name_arg(SHIPS), None),),
+    'collect_returned': (),
+    'attack_boss': (('key', name_arg(BOSSES), None),),
+    'set_target': (('key', name_arg(BOSSES), None),),
+    'claim_daily': (),
+    'do_prestige': (),
+}
+
+
+class CaptureWriter:
+    # Вместо потока записи на каждую сессию: save_game() лишь отдаёт снимок хосту
+    def __init__(self):
+        self.pending = None
+    
+    def submit(self, data):
+        self.pending = data
+    
+    def flush(self, timeout=None):
+        return True
+    
+    def take(self):
+        data, self.pending = self.pending, None
+        return data
+
+
+class Session:
+    __slots__ = ('player', 'game', 'last_active', 'last_save', 'saving')
+    
+    def __init__(self, player, game):
+        self.player = player
+        self.game = game
+        self.last_active = time.monotonic()
+        self.last_save = self.last_active
+        self.saving = False
+
+
+class SessionHost:
+    def __init__(self, save_dir, tick=TICK_INTERVAL, idle_timeout=IDLE_TIMEOUT,
+                 save_interval=SESSION_SAVE_INTERVAL):
+        self.save_dir = save_dir
+        self.tick = tick
+        self.idle_timeout = idle_timeout
+        self.save_interval = save_interval
+        self.sessions = {}
+        self.loading = {}
+        self.io = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix='session-io')
+        self.lag = Ring(LAG_SAMPLES)
+        self.stats = {'requests': 0, 'errors': 0, 'rps': 0.0, 'ticks': 0, 'tick_ms': 0.0,
+                      'loads': 0, 'saves': 0, 'save_errors': 0, 'evictions': 0}
+        os.makedirs(save_dir, exist_ok=True)
+    
+    def save_path(self, player):
+        return os.path.join(self.save_dir, f'{player}.json')
+    
+    # ---------- сессии ----------
+    
+    def open_game(self, player):
+        # В потоке ввода-вывода: чтение сохранения и оффлайн-начисление
+        game = GameManager(save_path=self.save_path(player))
+        game.writer = CaptureWriter()
+        game.save_interval = math.inf
+        return game
+    
+    async def session(self, player):
+        session = self.sessions.get(player)
+        if session is not None:
+            return session
+        # Параллельные запросы одного игрока ждут одну загрузку
+        future = self.loading.get(player)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(self.io, self.open_game, player)
+            self.loading[player] = future
+            try:
+                game = await future
+            finally:
+                del self.loading[player]
+            self.stats['loads'] += 1
+            session = self.sessions[player] = Session(player, game)
+            return session
+        await future
+        return self.sessions[player]
+    
+    async def save(self, session):
+        if session.saving:
+            return False
+        session.saving = True
+        session.game.save_game()
+        data = session.game.writer.take()
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self.io, write_atomic, self.save_path(session.player), data)
+            self.stats['saves'] += 1
+            return True
+        except OSError:
+            self.stats['save_errors'] += 1
+            return False
+        finally:
+            session.saving = False
+            session.last_save = time.monotonic()
+    
+    async def evict(self, session):
+        started = time.monotonic()
+        if not await self.save(session):
+            return
+        # Пока писали, игрок мог вернуться — тогда сессия остаётся
+        if session.last_active <= started and self.sessions.get(session.player) is session:
+            del self.sessions[session.player]
+            self.stats['evictions'] += 1
+    
+    def close(self):
+        # Остановка сервера: всё сохраняется синхронно
+        for session in list(self.sessions.values()):
+            session.game.save_game()
+            try:
+                write_atomic(self.save_path(session.player), session.game.writer.take())
+                self.stats['saves'] += 1
+            except OSError:
+                self.stats['save_errors'] += 1
+        self.sessions.clear()
+        self.io.shutdown(wait=True)
+    
+    # ---------- планировщик ----------
+    
+    async def scheduler(self):
+        loop = asyncio.get_running_loop()
+        next_at = loop.time() + self.tick
+        last_report = last_rate = loop.time()
+        last_requests = 0
+        while True:
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+            start = loop.time()
+            self.lag.push(start - next_at)
+            self.tick_sessions()
+            self.stats['ticks'] += 1
+            self.stats['tick_ms'] = (loop.time() - start) * 1000
+            
+            # Запросы в секунду — за последний интервал между тиками
+            self.stats['rps'] = (self.stats['requests'] - last_requests) / max(start - last_rate, 1e-6)
+            last_requests, last_rate = self.stats['requests'], start
+            if start - last_report >= REPORT_INTERVAL:
+                last_report = start
+                print(self.report(), flush=True)
+            
+            # Пропущенные из-за перегрузки тики не догоняются пачкой: dt сессий и так честный
+            next_at = max(next_at + self.tick, loop.time())
+    
+    def tick_sessions(self):
+        # Игровое время — по часам каждой игры (tick), простой и сохранения — по монотонным
+        mono = time.monotonic()
+        for session in list(self.sessions.values()):
+            session.game.tick()
+            if session.saving:
+                continue
+            if mono - session.last_active > self.idle_timeout:
+                asyncio.ensure_future(self.evict(session))
+            elif mono - session.last_save > self.save_interval:
+                asyncio.ensure_future(self.save(session))
+    
+    def lag_stats(self):
+        lags = sorted(self.lag.values())
+        if not lags:
+            return {'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+        return {
+            'p50_ms': lags[len(lags) // 2] * 1000,
+            'p99_ms': lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1000,
+            'max_ms': lags[-1] * 1000,
+        }
+    
+    def report(self):
+        lag = self.lag_stats()
+        return (f"sessions {len(self.sessions)} | {self.stats['rps']:.0f} req/s | "
+                f"tick {self.stats['tick_ms']:.1f}ms lag p50 {lag['p50_ms']:.1f}ms "
+                f"p99 {lag['p99_ms']:.1f}ms | saves {self.stats['saves']} evicted {self.stats['evictions']}")
+    
+    # ---------- API ----------
+    
+    async def dispatch(self, method, path, body):
+        parts = [p for p in path.split('?', 1)[0].split('/') if p]
+        if parts == ['stats']:
+            if method != 'GET':
+                raise RequestError(405, 'use GET')
+            return dict(self.stats, sessions=len(self.sessions), loading=len(self.loading),
+                        tick_lag=self.lag_stats())
+        if len(parts) not in (2, 3) or parts[0] != 'session':
+            raise RequestError(404, 'not found')
+        player = parts[1]
+        if not PLAYER_RE.match(player):
+            raise RequestError(400, 'bad player id')
+        
+        if len(parts) == 2:
+            if method != 'GET':
+                raise RequestError(405, 'use GET')
+            session = await self.session(player)
+            session.last_active = time.monotonic()
+            return self.state(session)
+        
+        action = parts[2]
+        if action not in ACTIONS:
+            raise RequestError(404, f"unknown action: {action}")
+        if method != 'POST':
+            raise RequestError(405, 'use POST')
+        try:
+            params = json.loads(body) if body else {}
+        except ValueError:
+            raise RequestError(400, 'body must be JSON')
+        if not isinstance(params, dict):
+            raise RequestError(400, 'body must be a JSON object')
+        args = []
+        for name, check, default in ACTIONS[action]:
+            if name in params:
+                args.append(check(params[name]))
+            elif default is not None:
+                args.append(default)
+            else:
+                raise RequestError(400, f"missing parameter: {name}")
+        
+        session = await self.session(player)
+        session.last_active = time.monotonic()
+        result = getattr(session.game, action)(*args)
+        return dict(self.state(session), result=result)
+    
+    def state(self, session):
+        game = session.game
+        state = {key: snapshot(getattr(game.data, key)) for key in STATE_KEYS}
+        state['event'] = game.event_text
+        game.event_text = ""
+        return state
+    
+    async def read_head(self, reader):
+        # -> (строка запроса, заголовки); b'' — клиент закрыл соединение
+        try:
+            line = await reader.readline()
+            headers = {}
+            while line:
+                header = await reader.readline()
+                if header in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = header.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+        except ValueError:
+            # Строка длиннее лимита потока (LimitOverrunError внутри readline)
+            raise RequestError(431, 'request line or header too large')
+        return line, headers
+    
+    def respond(self, writer, status, payload, keep):
+        data = json.dumps(payload, separators=(',', ':')).encode()
+        writer.write((f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                      f"Content-Type: application/json\r\n"
+                      f"Content-Length: {len(data)}\r\n"
+                      f"Connection: {'keep-alive' if keep else 'close'}\r\n\r\n").encode() + data)
+    
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line, headers = await self.read_head(reader)
+                except RequestError as e:
+                    # Где кончается слишком длинная строка, неизвестно: ответ и закрытие
+                    self.stats['errors'] += 1
+                    self.respond(writer, e.status, {'error': str(e)}, keep=False)
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                
+                try:
+                    method, path, version = line.decode('latin-1').split()
+                    length = int(headers.get('content-length', 0))
+                    if length > MAX_BODY:
+                        raise RequestError(413, 'body too large')
+                    body = await reader.readexactly(length) if length else b''
+                    self.stats['requests'] += 1
+                    status, payload = 200, await self.dispatch(method, path, body)
+                except RequestError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except ValueError:
+                    status, payload = 400, {'error': 'malformed request'}
+                    version = 'HTTP/1.0'
+                except asyncio.IncompleteReadError:
+                    raise
+                except Exception as e:
+                    status, payload = 500, {'error': f"{e.__class__.__name__}: {e}"}
+                if status != 200:
+                    self.stats['errors'] += 1
+                
+                keep = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                self.respond(writer, status, payload, keep)
+                await writer.drain()
+                if not keep or status == 413:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_BODY)
+        print(f"serving on {host}:{port}, saves in {self.save_dir}", flush=True)
+        scheduler = asyncio.ensure_future(self.scheduler())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            scheduler.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Star Empire session server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--save-dir', default='server_saves')
+    parser.add_argument('--tick', type=float, default=TICK_INTERVAL)
+    parser.add_argument('--idle', type=float, default=IDLE_TIMEOUT, help='seconds before an idle session is evicted')
+    args = parser.parse_args()
+    
+    loaded, errors = load_packs()
+    for name, error in sorted(errors.items()):
+        print(f"content pack skipped: {name}: {error}")
+    host = SessionHost(args.save_dir, tick=args.tick, idle_timeout=args.idle)
+    try:
+        asyncio.run(host.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        host.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
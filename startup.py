@@ -0,0 +1,65 @@
+"""
+STAR EMPIRE — замер холодного старта
+Фазы запуска отсчитываются от старта процесса (на Linux/Android — по /proc,
+иначе от импорта модуля) и складываются в короткую историю рядом с сохранением.
+"""
+
+import os
+import time
+
+
+# Сколько последних запусков хранить в истории
+STARTUP_HISTORY = 20
+
+
+def process_age():
+    # Секунды с момента запуска процесса; None — если платформа не даёт узнать
+    try:
+        with open('/proc/self/stat') as f:
+            # Имя процесса в скобках может содержать пробелы — режем по ')'
+            fields = f.read().rpartition(')')[2].split()
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - int(fields[19]) / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupTimer:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        age = process_age()
+        # Время до импорта (интерпретатор, загрузчик) — отдельной фазой
+        self.offset = age or 0.0
+        self.phases = {'process': self.offset} if age is not None else {}
+    
+    def elapsed(self):
+        return self.offset + time.perf_counter() - self.origin
+    
+    def mark(self, phase):
+        # Фаза фиксируется один раз: повторные вызовы (resume и т.п.) игнорируются
+        if phase not in self.phases:
+            self.phases[phase] = self.elapsed()
+        return self.phases[phase]
+    
+    def summary(self):
+        return ' | '.join(f"{phase} {at * 1000:.0f}ms" for phase, at in self.phases.items())
+    
+    def save(self, path, history=STARTUP_HISTORY):
+        import json
+        try:
+            with open(path, 'r') as f:
+                runs = json.load(f)
+            if not isinstance(runs, list):
+                runs = []
+        except (OSError, ValueError):
+            runs = []
+        runs.append(dict(self.phases, at=time.time()))
+        try:
+            with open(path, 'w') as f:
+                json.dump(runs[-history:], f)
+        except OSError:
+            pass
+
+
+startup = StartupTimer()
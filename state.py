@@ -0,0 +1,221 @@
+"""
+STAR EMPIRE — состояние игры
+GameState хранит фиксированные поля в __slots__ вместо словаря со строковыми
+ключами, уровни улучшений и кораблей — массивы по порядку каталога.
+Формат сохранения прежний: from_json/to_json переводят туда и обратно без потерь.
+"""
+
+from array import array
+
+from bignum import Big
+from saves import MISSING, snapshot
+
+
+# Ресурсы хранятся как Big: они растут без ограничений
+RESOURCES = ('energy', 'metal', 'crystal')
+
+# Поля сохранения в порядке файла; всё остальное из JSON попадает в extra
+FIELDS = RESOURCES + (
+    'upgrades', 'ships', 'expeditions', 'bosses', 'achievements',
+    'prestige_points', 'total_clicks', 'play_time', 'run_time', 'last_daily', 'bosses_killed',
+    'last_seen', 'target_boss', 'boss_kills', 'seed', 'rng',
+)
+FIELD_SET = frozenset(FIELDS)
+
+# key -> номер в каталоге. Заполняет game.index_catalog(); паки только дописывают
+# новые ключи в конец, поэтому номера уже созданных состояний не сдвигаются
+UPGRADE_SLOTS = {}
+SHIP_SLOTS = {}
+
+
+class Levels:
+    # Уровни по номеру в каталоге; словарный интерфейс — для экранов и старого кода.
+    # Ключи не из каталога (пак удалён) лежат в extra и сохраняются как есть
+    __slots__ = ('index', 'levels', 'extra')
+    
+    def __init__(self, index, levels=None):
+        self.index = index
+        self.levels = array('q', bytes(8 * len(index)))
+        self.extra = None
+        if levels:
+            for key, level in levels.items():
+                self[key] = level
+    
+    def at(self, slot):
+        # Уровень по номеру: каталог мог вырасти после создания массива
+        try:
+            return self.levels[slot]
+        except IndexError:
+            return 0
+    
+    def get(self, key, default=0):
+        # Ключ каталога без уровня — 0, как у некупленного
+        try:
+            return self.levels[self.index[key]]
+        except KeyError:
+            return default if self.extra is None else self.extra.get(key, default)
+        except IndexError:
+            return 0
+    
+    def __getitem__(self, key):
+        level = self.get(key, MISSING)
+        if level is MISSING:
+            raise KeyError(key)
+        return level
+    
+    def __setitem__(self, key, level):
+        slot = self.index.get(key)
+        if slot is None:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = level
+            return
+        levels = self.levels
+        if slot >= len(levels):
+            levels.extend(bytes(8 * (slot + 1 - len(levels))))
+        levels[slot] = int(level)
+    
+    def total(self):
+        return sum(self.levels) + (sum(self.extra.values()) if self.extra else 0)
+    
+    def items(self):
+        # Только ненулевые уровни — как в словаре, где некупленных ключей нет
+        levels = self.levels
+        for key, slot in self.index.items():
+            if slot < len(levels) and levels[slot]:
+                yield key, levels[slot]
+        if self.extra:
+            yield from self.extra.items()
+    
+    def keys(self):
+        return [key for key, _ in self.items()]
+    
+    def values(self):
+        return [level for _, level in self.items()]
+    
+    def __iter__(self):
+        return iter(self.keys())
+    
+    def __len__(self):
+        return sum(1 for _ in self.items())
+    
+    def __contains__(self, key):
+        return self.get(key, 0) != 0 or (self.extra is not None and key in self.extra)
+    
+    def __eq__(self, other):
+        if isinstance(other, Levels):
+            other = other.to_json()
+        return self.to_json() == other
+    
+    def __repr__(self):
+        return f"Levels({self.to_json()!r})"
+    
+    def to_json(self):
+        return dict(self.items())
+
+
+class GameState:
+    # Поля — атрибуты (state.energy, state.ships.get(key)); data['key'] и data.get
+    # оставлены для кода, которому удобнее обращаться по имени
+    __slots__ = FIELDS + ('extra',)
+    
+    def __init__(self):
+        self.energy = Big(0)
+        self.metal = Big(0)
+        self.crystal = Big(0)
+        self.upgrades = Levels(UPGRADE_SLOTS)
+        self.ships = Levels(SHIP_SLOTS)
+        self.expeditions = []
+        self.bosses = {}
+        self.achievements = []
+        self.prestige_points = 0
+        self.total_clicks = 0
+        self.play_time = 0
+        self.run_time = 0
+        self.last_daily = 0
+        self.bosses_killed = []
+        self.last_seen = 0
+        self.target_boss = None
+        self.boss_kills = 0
+        self.seed = None
+        self.rng = {}
+        self.extra = None
+    
+    @classmethod
+    def from_json(cls, saved):
+        # Недостающие поля — значения по умолчанию; контейнеры из saved берутся без копии
+        state = cls()
+        if not saved:
+            return state
+        for key, value in saved.items():
+            state[key] = value
+        for res in RESOURCES:
+            setattr(state, res, Big.from_json(getattr(state, res)))
+        # Сохранения до run_time: забег считается с начала игры
+        if 'run_time' not in saved:
+            state.run_time = state.play_time
+        # Старый формат: одна экспедиция на тип корабля {key: return_time}
+        if isinstance(state.expeditions, dict):
+            state.expeditions = [{'ship': key, 'count': 1, 'return': t}
+                                 for key, t in state.expeditions.items()]
+        return state
+    
+    def to_json(self):
+        data = {name: snapshot(getattr(self, name)) for name in FIELDS}
+        if self.extra:
+            data.update(snapshot(self.extra))
+        return data
+    
+    # ---------- словарный интерфейс ----------
+    
+    def __getitem__(self, key):
+        if key in FIELD_SET:
+            return getattr(self, key)
+        if self.extra is None or key not in self.extra:
+            raise KeyError(key)
+        return self.extra[key]
+    
+    def __setitem__(self, key, value):
+        if key in FIELD_SET:
+            # Уровни из словаря (сохранение, data['upgrades'] = {}) переводятся в массив
+            if key == 'upgrades' and not isinstance(value, Levels):
+                value = Levels(UPGRADE_SLOTS, value)
+            elif key == 'ships' and not isinstance(value, Levels):
+                value = Levels(SHIP_SLOTS, value)
+            setattr(self, key, value)
+            return
+        if self.extra is None:
+            self.extra = {}
+        self.extra[key] = value
+    
+    def get(self, key, default=None):
+        if key in FIELD_SET:
+            return getattr(self, key)
+        return default if self.extra is None else self.extra.get(key, default)
+    
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+    
+    def __contains__(self, key):
+        return key in FIELD_SET or (self.extra is not None and key in self.extra)
+    
+    def __iter__(self):
+        yield from FIELDS
+        if self.extra:
+            yield from list(self.extra)
+    
+    def keys(self):
+        return list(self)
+    
+    def items(self):
+        return [(key, self[key]) for key in self]
+    
+    def __eq__(self, other):
+        if isinstance(other, GameState):
+            other = other.to_json()
+        return self.to_json() == other
+    
+    def __repr__(self):
+        return f"GameState({self.to_json()!r})"
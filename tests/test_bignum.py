@@ -0,0 +1,48 @@
+"""
+Big: точность в диапазоне float, согласованность с обычными числами, форматирование.
+"""
+
+import math
+import os
+
+import pytest
+
+from advisor import prestige_points
+from bignum import Big, format_num
+from game import GameManager, PRESTIGE_DIVISOR
+
+
+def test_prestige_points_at_square_boundaries():
+    # (50k)^2 — ровно k очков; на единицу меньше — k-1. Советник считает через math.sqrt
+    game = GameManager(save_path=os.devnull, data={})
+    for k in range(1, 2001):
+        for total in ((PRESTIGE_DIVISOR * k) ** 2, (PRESTIGE_DIVISOR * k) ** 2 - 1):
+            game.data.energy = Big(total)
+            _, earn = game.prestige_earn()
+            assert earn == int(math.sqrt(total) / PRESTIGE_DIVISOR), total
+            assert earn == prestige_points(total) or total < 10000
+
+
+def test_pow_outside_float_range():
+    assert (Big('1e400') ** 0.5).log10() == pytest.approx(200)
+    assert (Big('4e300') ** 2).log10() == pytest.approx(math.log10(16) + 600)
+
+
+def test_hash_agrees_with_eq():
+    for value in (0, 5, -7, 0.1 + 0.2, 1e15 + 1, 2.5e200):
+        assert Big(value) == value
+        assert hash(Big(value)) == hash(value)
+    assert len({Big(5), 5, 5.0}) == 1
+
+
+@pytest.mark.parametrize('value, text', [
+    (999949, '999.9K'),
+    (999960, '1.0M'),
+    (-999960, '-1.0M'),
+    (999.96e6, '1.0B'),
+    (Big('9.9996e65'), '1.00e66'),
+    (Big('9.9996e70'), '1.00e71'),
+    (float('inf'), 'inf'),
+])
+def test_format_num_rounds_into_next_tier(value, text):
+    assert format_num(value) == text
@@ -0,0 +1,40 @@
+"""
+GameManager: покупки через публичный API ядра (UI, реплей и сервер зовут его напрямую).
+"""
+
+import os
+
+import pytest
+
+from bignum import Big
+from clocks import FixedClock
+from game import GameManager
+
+
+@pytest.mark.parametrize('amount', [-3, 0, 1.5, True, None, '10', 'all'])
+def test_buy_upgrade_rejects_invalid_amount(amount):
+    game = GameManager(save_path=os.devnull, data={})
+    game.data.upgrades['energy_click'] = 5
+    game.data.energy = Big(1e9)
+    assert game.buy_upgrade('energy_click', amount) is False
+    assert game.data.upgrades['energy_click'] == 5
+    assert game.data.energy == 1e9
+
+
+@pytest.mark.parametrize('amount', [1, 10, 'max'])
+def test_buy_upgrade_valid_amount(amount):
+    game = GameManager(save_path=os.devnull, data={})
+    game.data.energy = Big(1e9)
+    assert game.buy_upgrade('energy_click', amount) is True
+    assert game.data.upgrades['energy_click'] >= (1 if amount == 'max' else amount)
+    assert game.data.energy < 1e9
+
+
+def test_achievement_banner_keeps_offline_summary():
+    clock = FixedClock(1.7e9)
+    game = GameManager(save_path=os.devnull, clock=clock, data={'last_seen': 1.7e9 - 3600})
+    game.data.upgrades['energy_auto'] = 10
+    game.mark('upgrades')
+    game.catch_up()
+    assert game.event_text.startswith("Welcome back! ")
+    assert "ACHIEVEMENT: Charged" in game.event_text
@@ -0,0 +1,48 @@
+"""
+Запись и воспроизведение: сессия игрового цикла, пересекающая автосохранения,
+воспроизводится без расхождения хешей.
+"""
+
+import json
+import os
+import random
+
+from catalog import load_packs
+from clocks import FixedClock
+from game import GameManager
+from loop import GameLoop
+from replay import ActionLog, replay
+
+
+def recorded_loop_session(ticks, save_interval):
+    load_packs()
+    clock = FixedClock(1.7e9)
+    game = GameManager(save_path=os.devnull, clock=clock, data={}, seed=5)
+    game.save_interval = save_interval
+    game.writer.write = lambda data: None
+    game.data.upgrades['energy_auto'] = 7
+    game.data.ships['scout'] = 30
+    game.mark('upgrades', 'ships')
+    # Хеш после каждого действия: расхождение видно сразу после автосохранения
+    log = ActionLog(game, hash_interval=1)
+    game.set_target('asteroid')
+    loop = GameLoop(game)
+    rnd = random.Random(3)
+    saves = 0
+    for i in range(ticks):
+        # Часы между тиками идут неровно и не кратно шагу цикла
+        clock.now += rnd.uniform(0.05, 0.6)
+        last_save = game.last_save
+        loop.tick()
+        saves += game.last_save != last_save
+        if i % 7 == 0:
+            game.mine('energy', 2)
+    return json.loads(json.dumps(log.to_json())), saves
+
+
+def test_loop_session_replays_across_autosaves():
+    log, saves = recorded_loop_session(600, save_interval=5)
+    assert saves > 10
+    result, _ = replay(log)
+    assert result['mismatch'] is None
+    assert result['actions'] == len(log['actions'])
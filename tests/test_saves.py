@@ -0,0 +1,24 @@
+"""
+Фоновая запись сохранений: ошибка одного снимка не останавливает поток записи.
+"""
+
+import pytest
+
+from saves import JournalWriter, SaveWriter, load_save
+
+
+@pytest.mark.parametrize('writer_cls', [SaveWriter, JournalWriter])
+def test_bad_snapshot_does_not_stop_writer(tmp_path, writer_cls):
+    path = str(tmp_path / 'save.json')
+    writer = writer_cls(path)
+    writer.submit({'energy': 1})
+    assert writer.flush()
+    # set не сериализуется в JSON: снимок теряется, поток живёт дальше
+    writer.submit({'energy': 2, 'bad': {1, 2}})
+    assert writer.flush()
+    assert writer.stats['errors'] == 1
+    writer.submit({'energy': 3})
+    assert writer.flush()
+    assert not writer.busy
+    data, _, _ = load_save(path)
+    assert data == {'energy': 3}
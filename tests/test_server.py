@@ -0,0 +1,33 @@
+"""
+Сервер сессий: разбор HTTP на живом соединении.
+"""
+
+import asyncio
+
+from server import MAX_BODY, SessionHost
+
+
+async def exchange(host, request):
+    server = await asyncio.start_server(host.handle, '127.0.0.1', 0, limit=MAX_BODY)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(request)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        return response
+
+
+def test_oversized_request_line_gets_431(tmp_path):
+    host = SessionHost(str(tmp_path))
+    try:
+        request = b'GET /' + b'a' * 70 * 1024 + b' HTTP/1.1\r\nHost: x\r\n\r\n'
+        response = asyncio.run(exchange(host, request))
+        assert response.startswith(b'HTTP/1.1 431 ')
+        assert host.stats['errors'] == 1
+        # Обычный запрос после этого обслуживается
+        response = asyncio.run(exchange(host, b'GET /stats HTTP/1.1\r\nConnection: close\r\n\r\n'))
+        assert response.startswith(b'HTTP/1.1 200 ')
+    finally:
+        host.close()